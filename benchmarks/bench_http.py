@@ -0,0 +1,51 @@
+# gpt_agents_py | James Delancey | MIT License
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_overhead import logging_to_devnull
+from benchmarks.common import BenchResult, build_organization, percentile
+from gpt_agents_py.extensions.mock_llm_server import (
+    MockLLMServerConfig,
+    start_mock_llm_server,
+)
+from gpt_agents_py.gpt_agents import (
+    LLMCallerBase,
+    organization_executor,
+    set_llm_caller,
+)
+
+
+def _run_one() -> float:
+    start = time.perf_counter()
+    organization_executor(build_organization(n_agents=1, n_tasks=2, disable_summary=True))
+    return time.perf_counter() - start
+
+
+def run(quick: bool = False) -> list[BenchResult]:
+    """
+    End-to-end throughput through the real HTTP caller against the local mock server,
+    with lognormal latency and a small rate of 429s (Retry-After) and 5xx errors.
+    """
+    results: list[BenchResult] = []
+    levels = (1, 8) if quick else (1, 8, 32)
+    orgs_per_level = 8 if quick else 64
+    config = MockLLMServerConfig(latency_ms=20, latency_distribution="lognormal", rate_429=0.02, retry_after_s=0.05, rate_5xx=0.01, seed=7)
+    server = start_mock_llm_server(config)
+    set_llm_caller(LLMCallerBase(base_url=f"http://127.0.0.1:{server.server_address[1]}", api_key_value="mock"))
+    try:
+        with logging_to_devnull(logging.WARNING):
+            for workers in levels:
+                n = max(orgs_per_level, workers)
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    futures = [pool.submit(contextvars.copy_context().run, _run_one) for _ in range(n)]
+                    latencies = [f.result() for f in futures]
+                elapsed = time.perf_counter() - start
+                results.append(BenchResult(f"http.concurrency_{workers}", "orgs_per_second", n / elapsed, "orgs/s", True))
+                results.append(BenchResult(f"http.concurrency_{workers}", "p99_latency_ms", percentile(latencies, 99) * 1e3, "ms", False))
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
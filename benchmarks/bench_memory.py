@@ -0,0 +1,39 @@
+# gpt_agents_py | James Delancey | MIT License
+import gc
+import logging
+import tracemalloc
+
+from benchmarks.bench_overhead import logging_to_devnull
+from benchmarks.common import BenchResult, build_organization
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.gpt_agents import organization_executor, set_llm_caller
+
+
+def run(quick: bool = False) -> list[BenchResult]:
+    """
+    Retained memory growth over many sequential runs (conclusions are dropped after each run, so growth means a leak),
+    plus the peak traced allocation of a single run.
+    """
+    warmup = 2 if quick else 10
+    runs = 10 if quick else 200
+    set_llm_caller(ScriptedLLMCaller())
+    with logging_to_devnull(logging.WARNING):
+        for _ in range(warmup):
+            organization_executor(build_organization())
+        gc.collect()
+        tracemalloc.start()
+        try:
+            baseline, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            organization_executor(build_organization())
+            _, single_peak = tracemalloc.get_traced_memory()
+            for _ in range(runs - 1):
+                organization_executor(build_organization())
+            gc.collect()
+            current, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return [
+        BenchResult("memory.long_run", "retained_kib_per_run", max(current - baseline, 0) / 1024 / runs, "KiB", False),
+        BenchResult("memory.single_run", "peak_kib", (single_peak - baseline) / 1024, "KiB", False),
+    ]
@@ -0,0 +1,79 @@
+# gpt_agents_py | James Delancey | MIT License
+import logging
+import os
+from contextlib import contextmanager
+from typing import Iterator
+
+from benchmarks.common import (
+    LOOKUP_TOOLS,
+    BenchResult,
+    build_organization,
+    median,
+    time_calls,
+)
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.gpt_agents import (
+    AGENT_ACTION_REGEX,
+    AGENT_FINAL_REGEX,
+    AGENT_THOUGHT_ONLY_REGEX,
+    log_json,
+    organization_executor,
+    set_llm_caller,
+    tool_executor,
+)
+
+SAMPLE_ACTION = 'Thought: I should use the lookup tool.\nAction: lookup\nAction Input: {"key": "france"}'
+SAMPLE_PAYLOAD = {"model": "scripted", "messages": [{"role": "user", "content": "x" * 2000}] * 4}
+
+
+@contextmanager
+def logging_to_devnull(level: int) -> Iterator[None]:
+    """
+    Route root logging to os.devnull at `level`, so formatting cost is paid without terminal I/O noise.
+    """
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    with open(os.devnull, "w") as sink:
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(logging.Formatter("[%(levelname).1s%(asctime)s %(filename)s:%(lineno)d] %(message)s"))
+        root.handlers = [handler]
+        root.setLevel(level)
+        try:
+            yield
+        finally:
+            root.handlers = saved_handlers
+            root.setLevel(saved_level)
+
+
+def run(quick: bool = False) -> list[BenchResult]:
+    results: list[BenchResult] = []
+    repeat = 5 if quick else 30
+    micro_repeat = 200 if quick else 2000
+
+    # Framework overhead per LLM step: zero-latency scripted LLM, so all time is prompt building, parsing, tools and logging
+    for label, level in (("logging_off", logging.WARNING), ("logging_info", logging.INFO)):
+        caller = ScriptedLLMCaller()
+        set_llm_caller(caller)
+        with logging_to_devnull(level):
+            durations = time_calls(lambda: organization_executor(build_organization()), repeat)
+        per_step_us = sum(durations) / max(caller.calls, 1) * 1e6
+        results.append(BenchResult(f"overhead.step_{label}", "us_per_llm_call", per_step_us, "us", False))
+        results.append(BenchResult(f"overhead.org_{label}", "median_ms", median(durations) * 1e3, "ms", False))
+
+    # Component micro-benchmarks
+    def parse() -> None:
+        AGENT_FINAL_REGEX.search(SAMPLE_ACTION)
+        AGENT_ACTION_REGEX.search(SAMPLE_ACTION)
+        AGENT_THOUGHT_ONLY_REGEX.search(SAMPLE_ACTION)
+
+    with logging_to_devnull(logging.WARNING):
+        parse_s = sum(time_calls(parse, micro_repeat))
+        log_off_s = sum(time_calls(lambda: log_json(logging.INFO, "LLM Payload:", SAMPLE_PAYLOAD), micro_repeat))
+        tool_s = sum(time_calls(lambda: tool_executor("lookup", '{"key": "france"}', LOOKUP_TOOLS, SAMPLE_ACTION), micro_repeat))
+    with logging_to_devnull(logging.INFO):
+        log_on_s = sum(time_calls(lambda: log_json(logging.INFO, "LLM Payload:", SAMPLE_PAYLOAD), micro_repeat))
+    results.append(BenchResult("overhead.parse_response", "us_per_op", parse_s / micro_repeat * 1e6, "us", False))
+    results.append(BenchResult("overhead.log_json_disabled", "us_per_op", log_off_s / micro_repeat * 1e6, "us", False))
+    results.append(BenchResult("overhead.log_json_enabled", "us_per_op", log_on_s / micro_repeat * 1e6, "us", False))
+    results.append(BenchResult("overhead.tool_executor", "us_per_op", tool_s / micro_repeat * 1e6, "us", False))
+    return results
@@ -0,0 +1,40 @@
+# gpt_agents_py | James Delancey | MIT License
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_overhead import logging_to_devnull
+from benchmarks.common import BenchResult, build_organization, percentile
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.gpt_agents import organization_executor, set_llm_caller
+
+LLM_LATENCY_SECONDS = 0.02
+
+
+def _run_one() -> float:
+    start = time.perf_counter()
+    organization_executor(build_organization())
+    return time.perf_counter() - start
+
+
+def run(quick: bool = False) -> list[BenchResult]:
+    """
+    Organizations per second and per-organization latency at several concurrency levels, with a fixed simulated LLM latency.
+    """
+    results: list[BenchResult] = []
+    levels = (1, 4) if quick else (1, 4, 16, 64)
+    orgs_per_level = 4 if quick else 64
+    set_llm_caller(ScriptedLLMCaller(latency=LLM_LATENCY_SECONDS))
+    with logging_to_devnull(logging.WARNING):
+        for workers in levels:
+            n = max(orgs_per_level, workers)
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(contextvars.copy_context().run, _run_one) for _ in range(n)]
+                latencies = [f.result() for f in futures]
+            elapsed = time.perf_counter() - start
+            results.append(BenchResult(f"throughput.concurrency_{workers}", "orgs_per_second", n / elapsed, "orgs/s", True))
+            results.append(BenchResult(f"throughput.concurrency_{workers}", "p50_latency_ms", percentile(latencies, 50) * 1e3, "ms", False))
+            results.append(BenchResult(f"throughput.concurrency_{workers}", "p99_latency_ms", percentile(latencies, 99) * 1e3, "ms", False))
+    return results
@@ -0,0 +1,82 @@
+# gpt_agents_py | James Delancey | MIT License
+import statistics
+import time
+from typing import Callable, NamedTuple
+
+from gpt_agents_py.gpt_agents import Agent, Organization, Task, Tool
+
+
+class BenchResult(NamedTuple):
+    benchmark: str  # e.g. "throughput.concurrency_4"
+    metric: str  # e.g. "orgs_per_second"
+    value: float
+    unit: str
+    higher_is_better: bool
+
+
+def lookup_tool(args: dict[str, str]) -> str:
+    data = {"france": "67000000", "germany": "83000000"}
+    return data.get(args.get("key", "").lower(), "unknown")
+
+
+LOOKUP_TOOLS = [
+    Tool(
+        name="lookup",
+        description="Returns a known figure for the given key.",
+        args_schema="{key: string}",
+        func=lookup_tool,
+    ),
+]
+
+
+def build_organization(n_agents: int = 2, n_tasks: int = 2, disable_summary: bool = False) -> Organization:
+    """
+    Benchmark organization of n_agents agents with n_tasks tasks each, all using the lookup tool.
+    """
+    agents = [
+        Agent(
+            role=f"Analyst {a}",
+            goal=f"Report figure set {a}.",
+            backstory="Benchmark analyst.",
+            tasks=[
+                Task(
+                    name=f"Task {a}.{t}",
+                    description=f"Get the population of France (step {a}.{t}).",
+                    expected_output="A number.",
+                    llm_messages=[],
+                )
+                for t in range(n_tasks)
+            ],
+            tools=LOOKUP_TOOLS,
+            disable_summary=disable_summary,
+        )
+        for a in range(n_agents)
+    ]
+    return Organization(agents=agents)
+
+
+def time_calls(func: Callable[[], object], repeat: int) -> list[float]:
+    """
+    Run func `repeat` times and return each wall-clock duration in seconds.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Nearest-rank percentile, q in [0, 100].
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[idx]
+
+
+def median(values: list[float]) -> float:
+    return statistics.median(values) if values else 0.0
@@ -0,0 +1,88 @@
+# gpt_agents_py | James Delancey | MIT License
+import argparse
+import json
+import platform
+import sys
+from typing import Any, Callable
+
+import gpt_agents_py
+from benchmarks import bench_http, bench_memory, bench_overhead, bench_throughput
+from benchmarks.common import BenchResult
+from gpt_agents_py.gpt_agents import LLMCallerBase, set_llm_caller
+
+SCHEMA_VERSION = 1
+SUITES: dict[str, Callable[[bool], list[BenchResult]]] = {
+    "overhead": bench_overhead.run,
+    "throughput": bench_throughput.run,
+    "memory": bench_memory.run,
+    "http": bench_http.run,
+}
+
+
+def run_suites(names: list[str], quick: bool) -> dict[str, Any]:
+    """
+    Run the selected suites and return a report whose layout is stable across versions:
+    results are keyed "<benchmark>/<metric>" and sorted, so two reports diff cleanly.
+    """
+    results: list[BenchResult] = []
+    try:
+        for name in names:
+            results.extend(SUITES[name](quick))
+    finally:
+        set_llm_caller(LLMCallerBase())
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "gpt_agents_version": gpt_agents_py.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": quick,
+        "results": {
+            f"{r.benchmark}/{r.metric}": {"value": round(r.value, 3), "unit": r.unit, "higher_is_better": r.higher_is_better}
+            for r in sorted(results, key=lambda r: (r.benchmark, r.metric))
+        },
+    }
+
+
+def compare(report: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """
+    Return one line per result that got worse than the baseline by more than `tolerance` (a fraction, e.g. 0.2 = 20%).
+    """
+    regressions = []
+    for key, current in report["results"].items():
+        previous = baseline.get("results", {}).get(key)
+        if not previous or not previous["value"]:
+            continue
+        change = (current["value"] - previous["value"]) / previous["value"]
+        worse = -change if current["higher_is_better"] else change
+        if worse > tolerance:
+            regressions.append(f"{key}: {previous['value']} -> {current['value']} {current['unit']} ({worse:+.0%} worse)")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run offline gpt_agents benchmarks against a scripted, latency-injecting LLM caller.")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="Suite to run (repeatable). Default: all suites.")
+    parser.add_argument("--quick", action="store_true", help="Small iteration counts, for smoke testing.")
+    parser.add_argument("--output", type=str, default="", help="Write the JSON report to this file instead of stdout.")
+    parser.add_argument("--baseline", type=str, default="", help="Previous JSON report to compare against; exits 1 on regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown before a result counts as a regression. Default: 0.2")
+    args = parser.parse_args()
+
+    report = run_suites(args.suite or list(SUITES), args.quick)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
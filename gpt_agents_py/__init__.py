@@ -3,6 +3,24 @@ __version__ = "0.1.15"
 __author__ = "James Delancey <jamesdelanceyjr@gmail.com>"
 __license__ = "MIT"
 __description__ = "Minimal, modular Python framework for multi-agent LLM workflows."
+from gpt_agents_py.events import (  # noqa: F401
+    RunEvent,
+    organization_events,
+    organization_events_async,
+)
 from gpt_agents_py.gpt_agents import *  # noqa: F401, F403
+from gpt_agents_py.metrics import (  # noqa: F401
+    METRICS,
+    MetricsRegistry,
+    start_metrics_server,
+)
+from gpt_agents_py.tracing import (  # noqa: F401
+    ChromeTraceExporter,
+    SpanEvent,
+    add_hook,
+    current_span,
+    remove_hook,
+    span,
+)
 
 __all__ = [name for name in globals() if not name.startswith("_")]
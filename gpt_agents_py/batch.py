@@ -0,0 +1,342 @@
+# gpt_agents_py | James Delancey | MIT License
+import argparse
+import contextlib
+import contextvars
+import importlib
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import IO, Any, Iterator, NamedTuple, Optional
+
+from gpt_agents_py.deadline import Deadline
+from gpt_agents_py.gpt_agents import (
+    Agent,
+    LLMCallerBase,
+    Organization,
+    OrganizationConclusion,
+    Task,
+    Tool,
+    organization_executor,
+    set_llm_caller,
+    set_validation_judge,
+    worker_slot,
+)
+from gpt_agents_py.rate_limit import RateLimiter, SQLiteRateLimiter
+
+
+class BatchRowResult(NamedTuple):
+    row_index: int
+    params: dict[str, Any]
+    conclusion: Optional[OrganizationConclusion]
+    error: Optional[str]
+    elapsed: float
+
+
+class BatchStats(NamedTuple):
+    rows: int
+    succeeded: int
+    failed: int
+    wall_time: float
+    rows_per_second: float
+    latency_p50: float
+    latency_p90: float
+    latency_p99: float
+    latency_max: float
+
+
+def import_object(ref: str) -> Any:
+    """
+    Resolve "package.module:attribute" (attribute may be dotted) to the referenced object.
+    """
+    module_name, _, attr = ref.partition(":")
+    if not module_name or not attr:
+        raise ValueError(f"Expected 'module:attribute', got {ref!r}")
+    obj: Any = importlib.import_module(module_name)
+    for part in attr.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _load_tools(refs: list[str]) -> list[Tool]:
+    tools: list[Tool] = []
+    for ref in refs:
+        obj = import_object(ref)
+        items = obj if isinstance(obj, list) else [obj]
+        for item in items:
+            if not isinstance(item, Tool):
+                raise TypeError(f"{ref!r} does not reference a Tool or list of Tools")
+            tools.append(item)
+    return tools
+
+
+def organization_from_dict(spec: dict[str, Any]) -> Organization:
+    """
+    Build an Organization from a JSON-style definition. Tools are referenced by "module:attribute" (a Tool or a list of Tools):
+
+        {"agents": [{"role": "...", "goal": "...", "backstory": "...", "tools": ["examples.basic_usage:population_tools"],
+                     "tasks": [{"name": "...", "description": "Population of {country}", "expected_output": "..."}]}]}
+    """
+    agents = []
+    for a in spec["agents"]:
+        tasks = [
+            Task(
+                name=t["name"],
+                description=t["description"],
+                expected_output=t["expected_output"],
+                llm_messages=[],
+                disable_validation=t.get("disable_validation", False),
+                require_human_input=t.get("require_human_input", False),
+            )
+            for t in a["tasks"]
+        ]
+        agents.append(
+            Agent(
+                role=a["role"],
+                goal=a["goal"],
+                backstory=a["backstory"],
+                tasks=tasks,
+                tools=_load_tools(a.get("tools", [])),
+                disable_validation=a.get("disable_validation", False),
+                disable_summary=a.get("disable_summary", False),
+                summary_mode=a.get("summary_mode", "task"),
+                speculative=a.get("speculative", False),
+                max_tools=a.get("max_tools"),
+                context_k=a.get("context_k", Agent._field_defaults["context_k"]),
+                context_tokens=a.get("context_tokens", Agent._field_defaults["context_tokens"]),
+            )
+        )
+    return Organization(agents=agents)
+
+
+def load_organization(ref: str) -> Organization:
+    """
+    Load an organization from a JSON definition file (see organization_from_dict) or a "module:attribute" reference.
+    """
+    if ref.endswith(".json"):
+        with open(ref, "r") as f:
+            return organization_from_dict(json.load(f))
+    org = import_object(ref)
+    if not isinstance(org, Organization):
+        raise TypeError(f"{ref!r} does not reference an Organization")
+    return org
+
+
+def fill_organization(org: Organization, params: dict[str, Any]) -> Organization:
+    """
+    Return a copy of `org` with str.format placeholders in task names, descriptions and expected outputs filled from `params`.
+    Every task gets a fresh llm_messages list, so filled copies can run concurrently. Raises KeyError on a missing parameter.
+    """
+    return org._replace(
+        agents=[
+            a._replace(
+                tasks=[
+                    t._replace(
+                        name=t.name.format_map(params),
+                        description=t.description.format_map(params),
+                        expected_output=t.expected_output.format_map(params),
+                        llm_messages=list(t.llm_messages),
+                    )
+                    for t in a.tasks
+                ]
+            )
+            for a in org.agents
+        ]
+    )
+
+
+def conclusion_to_dict(conclusion: Optional[OrganizationConclusion]) -> Optional[dict[str, Any]]:
+    if conclusion is None:
+        return None
+    return {
+        "final_output": conclusion.final_conclusion.output,
+        "interrupted": conclusion.interrupted,
+        "usage": conclusion.usage._asdict(),
+        "agents": [
+            {
+                "role": ac.agent.role,
+                "output": ac.output,
+                "usage": ac.usage._asdict(),
+                "task_conclusions": [{"input": tc.input, "output": tc.output, "usage": tc.usage._asdict()} for tc in ac.task_conclusions],
+            }
+            for ac in conclusion.agent_conclusions
+        ],
+    }
+
+
+def read_rows(f: IO[str]) -> Iterator[dict[str, Any]]:
+    for line_no, line in enumerate(f, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        row = json.loads(line)
+        if not isinstance(row, dict):
+            raise ValueError(f"Input line {line_no} is not a JSON object")
+        yield row
+
+
+def _run_row(org: Organization, index: int, params: dict[str, Any], row_timeout: Optional[float] = None, slots: Optional[threading.Semaphore] = None) -> BatchRowResult:
+    start = time.perf_counter()
+    try:
+        with worker_slot(slots) if slots is not None else contextlib.nullcontext():
+            conclusion = organization_executor(fill_organization(org, params), deadline=Deadline(row_timeout) if row_timeout is not None else None)
+        return BatchRowResult(index, params, conclusion, None, time.perf_counter() - start)
+    except Exception as e:
+        return BatchRowResult(index, params, None, f"{type(e).__name__}: {e}", time.perf_counter() - start)
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered) + 0.5)) - 1))]
+
+
+def run_batch(org: Organization, rows: Iterator[dict[str, Any]], output: IO[str], workers: int = 8, row_timeout: Optional[float] = None, human_slots: int = 0) -> BatchStats:
+    """
+    Run `org` once per parameter row on a pool of `workers` threads, writing one JSON line per row to `output`
+    as soon as it finishes (completion order; "index" gives the input position). At most 2 * workers + human_slots rows are in flight,
+    so arbitrarily large inputs stream with bounded memory.
+    With `row_timeout`, each row gets that many seconds and a row that runs out reports its partial conclusion.
+    With `human_slots`, up to that many extra rows may be parked waiting for human input (require_human_input tasks);
+    a parked row gives its worker slot to another row, so `workers` rows keep running meanwhile.
+    """
+    write_lock = threading.Lock()
+    latencies: list[float] = []
+    succeeded = failed = 0
+    start = time.perf_counter()
+    in_flight: set[Future[BatchRowResult]] = set()
+    slots = threading.Semaphore(workers) if human_slots else None
+
+    def drain(block: bool) -> None:
+        nonlocal succeeded, failed
+        if not in_flight:
+            return
+        done, _ = wait(in_flight, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for future in done:
+            in_flight.discard(future)
+            result = future.result()
+            latencies.append(result.elapsed)
+            if result.error is None:
+                succeeded += 1
+            else:
+                failed += 1
+            record = {
+                "index": result.row_index,
+                "params": result.params,
+                "status": "ok" if result.error is None else "error",
+                "elapsed_s": round(result.elapsed, 3),
+                "error": result.error,
+                "conclusion": conclusion_to_dict(result.conclusion),
+            }
+            with write_lock:
+                output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                output.flush()
+
+    with ThreadPoolExecutor(max_workers=workers + human_slots, thread_name_prefix="gpt-agents-batch") as pool:
+        for index, params in enumerate(rows):
+            while len(in_flight) >= 2 * workers + human_slots:
+                drain(block=True)
+            in_flight.add(pool.submit(contextvars.copy_context().run, _run_row, org, index, params, row_timeout, slots))
+            drain(block=False)
+        while in_flight:
+            drain(block=True)
+
+    wall = time.perf_counter() - start
+    ordered = sorted(latencies)
+    return BatchStats(
+        rows=len(ordered),
+        succeeded=succeeded,
+        failed=failed,
+        wall_time=wall,
+        rows_per_second=len(ordered) / wall if wall > 0 else 0.0,
+        latency_p50=_percentile(ordered, 50),
+        latency_p90=_percentile(ordered, 90),
+        latency_p99=_percentile(ordered, 99),
+        latency_max=ordered[-1] if ordered else 0.0,
+    )
+
+
+LLM_PROVIDERS = ["openai", "anthropic", "scripted"]
+
+
+def make_llm_caller(provider: str, base_url: Optional[str] = None, model: Optional[str] = None, rate_limiter: Optional[RateLimiter] = None) -> LLMCallerBase:
+    """
+    Build the caller for a provider name from LLM_PROVIDERS. "scripted" is the offline ScriptedLLMCaller, for dry runs.
+    `rate_limiter` replaces the provider's default limiter when given.
+    """
+    caller: LLMCallerBase
+    if provider == "anthropic":
+        from gpt_agents_py.extensions.anthropic_llm_caller import AnthropicLLMCaller
+
+        caller = AnthropicLLMCaller(base_url=base_url, model=model)
+    elif provider == "scripted":
+        from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+
+        caller = ScriptedLLMCaller()
+    else:
+        caller = LLMCallerBase(base_url=base_url, model=model)
+    if rate_limiter is not None:
+        caller.rate_limiter = rate_limiter
+    return caller
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run an Organization once per JSONL parameter row with a worker pool, streaming conclusions to JSONL.")
+    parser.add_argument("organization", help="Organization definition: a .json file or a 'module:attribute' reference.")
+    parser.add_argument("--input", "-i", default="-", help="JSONL file of parameter rows ('-' for stdin). Row keys fill {placeholders} in task text.")
+    parser.add_argument("--output", "-o", default="-", help="JSONL file for results ('-' for stdout).")
+    parser.add_argument("--workers", "-w", type=int, default=8, help="Concurrent organization runs. Default: 8")
+    parser.add_argument("--provider", choices=LLM_PROVIDERS, default="openai")
+    parser.add_argument("--base-url", default=None, help="Override the provider API base URL.")
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--log-level", default="WARNING", help="Logging level during the batch. Default: WARNING")
+    parser.add_argument("--single-flight", action="store_true", help="Share one upstream call between identical concurrent LLM requests.")
+    parser.add_argument("--approx-cache", type=float, default=None, metavar="THRESHOLD", help="Reuse responses of near-duplicate validation and summary calls at this similarity.")
+    parser.add_argument("--approx-cache-db", default=None, help="SQLite file persisting the --approx-cache entries across batches.")
+    parser.add_argument("--batch-validation", action="store_true", help="Merge validations from concurrent rows into batched LLM calls.")
+    parser.add_argument("--rate-limit-db", default=None, help="SQLite file for a rate limit shared with other processes on this host.")
+    parser.add_argument("--rpm", type=int, default=None, help="Requests per minute per API key (with --rate-limit-db).")
+    parser.add_argument("--tpm", type=int, default=None, help="Tokens per minute per API key (with --rate-limit-db).")
+    parser.add_argument("--row-timeout", type=float, default=None, help="Seconds per row; a row that runs out returns its partial conclusion.")
+    parser.add_argument("--human-slots", type=int, default=0, help="Extra rows that may wait for human input without holding a worker. Default: 0")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(args.log_level.upper())
+    org = load_organization(args.organization)
+    limiter = SQLiteRateLimiter(args.rate_limit_db, rpm=args.rpm, tpm=args.tpm) if args.rate_limit_db else None
+    caller = make_llm_caller(args.provider, args.base_url, args.model, rate_limiter=limiter)
+    if args.single_flight:
+        from gpt_agents_py.extensions.single_flight import SingleFlightLLMCaller
+
+        caller = SingleFlightLLMCaller(caller)
+    if args.approx_cache is not None:
+        from gpt_agents_py.extensions.approx_cache import ApproxCacheLLMCaller
+
+        caller = ApproxCacheLLMCaller(caller, threshold=args.approx_cache, path=args.approx_cache_db)
+    set_llm_caller(caller)
+    if args.batch_validation:
+        from gpt_agents_py.extensions.validation_batcher import ValidationBatcher
+
+        set_validation_judge(ValidationBatcher())
+    fin = sys.stdin if args.input == "-" else open(args.input, "r")
+    fout = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        stats = run_batch(org, read_rows(fin), fout, workers=args.workers, row_timeout=args.row_timeout, human_slots=args.human_slots)
+    finally:
+        if fin is not sys.stdin:
+            fin.close()
+        if fout is not sys.stdout:
+            fout.close()
+    print(
+        f"{stats.rows} rows ({stats.succeeded} ok, {stats.failed} failed) in {stats.wall_time:.1f}s: {stats.rows_per_second:.2f} rows/s, "
+        f"latency p50 {stats.latency_p50:.2f}s p90 {stats.latency_p90:.2f}s p99 {stats.latency_p99:.2f}s max {stats.latency_max:.2f}s",
+        file=sys.stderr,
+    )
+    if stats.failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
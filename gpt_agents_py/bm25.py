@@ -0,0 +1,70 @@
+# gpt_agents_py | James Delancey | MIT License
+import collections
+import heapq
+import math
+import re
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+_CAMEL_REGEX = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_WORD_REGEX = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lower-cased words and numbers; snake_case and camelCase identifiers are split into their parts.
+    """
+    return [w.casefold() for w in _WORD_REGEX.findall(_CAMEL_REGEX.sub(" ", text))]
+
+
+class BM25Index(Generic[T]):
+    """
+    Okapi BM25 over short documents, each attached to an item. Postings are kept per term, so a query only touches the
+    documents that share a term with it. Not thread-safe for add(); searching a finished index from many threads is.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._items: list[T] = []
+        self._lengths: list[int] = []
+        self._postings: dict[str, list[tuple[int, int]]] = collections.defaultdict(list)  # term -> [(document, term frequency)]
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, item: T, text: str) -> None:
+        doc = len(self._items)
+        terms = collections.Counter(tokenize(text))
+        self._items.append(item)
+        self._lengths.append(sum(terms.values()))
+        self._total_length += self._lengths[-1]
+        for term, tf in terms.items():
+            self._postings[term].append((doc, tf))
+
+    def scores(self, query: str) -> dict[int, float]:
+        """
+        BM25 score of every document sharing a term with `query`, by document number (insertion order).
+        """
+        n = len(self._items)
+        if not n:
+            return {}
+        avgdl = self._total_length / n or 1.0
+        result: dict[int, float] = collections.defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1.0 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc, tf in postings:
+                result[doc] += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * self._lengths[doc] / avgdl))
+        return result
+
+    def top_k(self, query: str, k: int) -> list[T]:
+        """
+        Up to `k` items matching `query`, best first (earlier insertion wins ties). Items without a shared term are not returned.
+        """
+        scores = self.scores(query)
+        return [self._items[doc] for doc in heapq.nsmallest(k, scores, key=lambda d: (-scores[d], d))]
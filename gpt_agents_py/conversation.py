@@ -0,0 +1,116 @@
+# gpt_agents_py | James Delancey | MIT License
+import threading
+from typing import (
+    Generic,
+    Hashable,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Sequence,
+    TypeVar,
+    overload,
+)
+
+T = TypeVar("T")
+H = TypeVar("H", bound=Hashable)
+
+
+class _Node(NamedTuple, Generic[T]):
+    item: T
+    parent: Optional["_Node[T]"]
+    length: int
+
+
+class Conversation(Sequence[T]):
+    """
+    Immutable list of messages stored as a persistent linked list: append() returns a new Conversation that shares
+    every earlier message with the original. Retries branch from a saved prefix without copying it, and any number
+    of branches share their common prefix.
+    """
+
+    __slots__ = ("_tail",)
+
+    def __init__(self, items: Iterable[T] = ()) -> None:
+        tail: Optional[_Node[T]] = None
+        for item in items:
+            tail = _Node(item, tail, tail.length + 1 if tail is not None else 1)
+        self._tail = tail
+
+    @classmethod
+    def _from_tail(cls, tail: Optional[_Node[T]]) -> "Conversation[T]":
+        conversation: Conversation[T] = cls.__new__(cls)
+        conversation._tail = tail
+        return conversation
+
+    def append(self, item: T) -> "Conversation[T]":
+        return self._from_tail(_Node(item, self._tail, len(self) + 1))
+
+    def extend(self, items: Iterable[T]) -> "Conversation[T]":
+        tail = self._tail
+        for item in items:
+            tail = _Node(item, tail, tail.length + 1 if tail is not None else 1)
+        return self._from_tail(tail)
+
+    def __len__(self) -> int:
+        return self._tail.length if self._tail is not None else 0
+
+    def to_list(self) -> list[T]:
+        items: list[T] = [None] * len(self)  # type: ignore[list-item]
+        node = self._tail
+        while node is not None:
+            items[node.length - 1] = node.item
+            node = node.parent
+        return items
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.to_list())
+
+    @overload
+    def __getitem__(self, index: int) -> T:
+        pass
+
+    @overload
+    def __getitem__(self, index: slice) -> list[T]:
+        pass
+
+    def __getitem__(self, index: int | slice) -> T | list[T]:
+        if isinstance(index, slice):
+            return self.to_list()[index]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Conversation index out of range")
+        node = self._tail
+        while node is not None and node.length - 1 != index:
+            node = node.parent
+        assert node is not None
+        return node.item
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Conversation):
+            return self._tail is other._tail or self.to_list() == other.to_list()
+        if isinstance(other, list):
+            return self.to_list() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Conversation({self.to_list()!r})"
+
+
+class Interner(Generic[H]):
+    """
+    Returns one shared instance per distinct value, so messages repeated across the tasks of a run (such as the
+    system prompt) are stored once. Create one per run so the table is freed with it.
+    """
+
+    def __init__(self) -> None:
+        self._values: dict[H, H] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, value: H) -> H:
+        with self._lock:
+            return self._values.setdefault(value, value)
+
+    def __len__(self) -> int:
+        return len(self._values)
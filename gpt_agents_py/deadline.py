@@ -0,0 +1,181 @@
+# gpt_agents_py | James Delancey | MIT License
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, TypeVar
+
+R = TypeVar("R")
+
+
+class RunInterrupted(BaseException):
+    """
+    Raised inside a run when its Deadline expires or is cancelled, or its budget runs out. Derives from BaseException so the executors'
+    retry loops (which catch Exception) do not swallow it; organization_executor catches it and returns a partial result.
+    """
+
+    reason = "interrupted"
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+        self.partial: Optional[object] = None  # AgentConclusion of the agent that was running, attached by agent_executor
+
+
+class DeadlineExceeded(RunInterrupted):
+    reason = "deadline"
+
+
+class RunCancelled(RunInterrupted):
+    reason = "cancelled"
+
+
+class BudgetExceeded(RunInterrupted):
+    """
+    Raised by call_llm once the run has used up the max_llm_calls or max_tokens of its RunContext.
+    """
+
+    reason = "budget"
+
+
+class Deadline:
+    """
+    Time budget and cancellation flag for one run. `timeout` is in seconds from construction (None for no time limit);
+    cancel() may be called from any thread. Pass it to organization_executor, or install it with deadline_scope().
+    """
+
+    def __init__(self, timeout: Optional[float] = None) -> None:
+        self.expires = time.monotonic() + timeout if timeout is not None else None
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """
+        Seconds left (never negative), or None without a time limit.
+        """
+        return max(self.expires - time.monotonic(), 0.0) if self.expires is not None else None
+
+    def check(self) -> None:
+        if self._cancelled.is_set():
+            raise RunCancelled("Run cancelled")
+        if self.expires is not None and time.monotonic() >= self.expires:
+            raise DeadlineExceeded("Run deadline exceeded")
+
+    def timeout(self, default: float) -> float:
+        """
+        `default` shrunk to the remaining budget, for socket timeouts. Raises if nothing is left.
+        """
+        self.check()
+        remaining = self.remaining()
+        return min(default, remaining) if remaining is not None else default
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Sleep for `seconds`, waking early (and raising) on cancellation or expiry.
+        """
+        remaining = self.remaining()
+        self._cancelled.wait(min(seconds, remaining) if remaining is not None else seconds)
+        self.check()
+
+
+_DEADLINE: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("gpt_agents_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _DEADLINE.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[None]:
+    """
+    Make `deadline` the active one for the enclosed code. Threads started with a copied context inherit it.
+    """
+    token = _DEADLINE.set(deadline)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def check_deadline() -> None:
+    deadline = _DEADLINE.get()
+    if deadline is not None:
+        deadline.check()
+
+
+def deadline_timeout(default: float) -> float:
+    deadline = _DEADLINE.get()
+    return deadline.timeout(default) if deadline is not None else default
+
+
+def deadline_sleep(seconds: float) -> None:
+    deadline = _DEADLINE.get()
+    if deadline is None:
+        time.sleep(seconds)
+    else:
+        deadline.sleep(seconds)
+
+
+def deadline_wait(event: threading.Event, poll: float = 0.05) -> None:
+    """
+    Wait for `event`, checking the active deadline every `poll` seconds; raises once it expires or is cancelled.
+    """
+    deadline = _DEADLINE.get()
+    if deadline is None:
+        event.wait()
+        return
+    while not event.wait(poll):
+        deadline.check()
+
+
+def interrupted_by_deadline(error: BaseException) -> bool:
+    """
+    Whether `error` comes from the active run's own deadline: a RunInterrupted, or any error raised after the deadline
+    passed (e.g. an HTTP timeout shrunk to the remaining budget). Wrappers shared by several runs must not hand such
+    errors to the other runs.
+    """
+    if isinstance(error, RunInterrupted):
+        return True
+    deadline = _DEADLINE.get()
+    if deadline is None:
+        return False
+    try:
+        deadline.check()
+    except RunInterrupted:
+        return True
+    return False
+
+
+def run_within_deadline(func: Callable[[], R], poll: float = 0.05) -> R:
+    """
+    Call `func` and return its result, but stop waiting once the active deadline expires or is cancelled.
+    Without a deadline `func` runs inline; otherwise it runs on a daemon thread that is abandoned on expiry,
+    since a Python function cannot be interrupted safely from outside.
+    """
+    deadline = _DEADLINE.get()
+    if deadline is None:
+        return func()
+    deadline.check()
+    done = threading.Event()
+    outcome: list[R] = []
+    error: list[BaseException] = []
+
+    def run() -> None:
+        try:
+            outcome.append(func())
+        except BaseException as e:
+            error.append(e)
+        finally:
+            done.set()
+
+    threading.Thread(target=contextvars.copy_context().run, args=(run,), name="gpt-agents-deadline-call", daemon=True).start()
+    while not done.wait(poll):
+        deadline.check()
+    if error:
+        raise error[0]
+    return outcome[0]
@@ -0,0 +1,256 @@
+# gpt_agents_py | James Delancey | MIT License
+import asyncio
+import contextvars
+import queue
+import threading
+from typing import AsyncIterator, Callable, Generator, NamedTuple, Optional, Union
+
+from gpt_agents_py.deadline import Deadline, current_deadline
+from gpt_agents_py.gpt_agents import (
+    Organization,
+    OrganizationConclusion,
+    RunContext,
+    organization_executor,
+)
+from gpt_agents_py.tracing import SpanEvent, add_hook, remove_hook, span
+
+
+class AgentStarted(NamedTuple):
+    agent: str
+    span_id: int
+
+
+class AgentFinished(NamedTuple):
+    agent: str
+    output: Optional[str]
+    error: Optional[str]
+    duration: float
+    span_id: int
+
+
+class TaskStarted(NamedTuple):
+    task: str
+    span_id: int
+    parent_id: Optional[int]  # The agent's span
+
+
+class TaskFinished(NamedTuple):
+    task: str
+    output: Optional[str]  # "Final Answer: ..." on success
+    error: Optional[str]  # Set when this attempt raised (e.g. RESET_TASK); the agent may retry the task
+    duration: float
+    span_id: int
+
+
+class LLMCallStarted(NamedTuple):
+    provider: str
+    model: str
+    messages: int
+    span_id: int
+    parent_id: Optional[int]
+
+
+class LLMCallFinished(NamedTuple):
+    provider: str
+    model: str
+    response: Optional[str]
+    tokens: Optional[int]
+    error: Optional[str]
+    duration: float
+    span_id: int
+
+
+class ToolInvoked(NamedTuple):
+    tool: str
+    input: str
+    span_id: int
+    parent_id: Optional[int]
+
+
+class ToolReturned(NamedTuple):
+    tool: str
+    output: Optional[str]
+    error: Optional[str]
+    duration: float
+    span_id: int
+
+
+class ValidationVerdict(NamedTuple):
+    task: str
+    final_answer: str
+    passed: bool
+    speculative: bool  # Passed optimistically; the real verdict arrives in the background (Agent.speculative)
+    error: Optional[str]
+    span_id: int
+
+
+class RunFinished(NamedTuple):
+    conclusion: Optional[OrganizationConclusion]
+    error: Optional[str]
+
+
+RunEvent = Union[AgentStarted, AgentFinished, TaskStarted, TaskFinished, LLMCallStarted, LLMCallFinished, ToolInvoked, ToolReturned, ValidationVerdict, RunFinished]
+
+
+def to_run_event(event: SpanEvent) -> Optional[RunEvent]:
+    """
+    Translate a tracing SpanEvent into a typed RunEvent, or None for spans without one (attempts, summaries, ...).
+    """
+    s, a = event.span, event.span.attributes
+    duration = event.duration or 0.0
+    if s.name == "agent_executor":
+        if event.phase == "start":
+            return AgentStarted(agent=str(a["agent"]), span_id=s.span_id)
+        return AgentFinished(agent=str(a["agent"]), output=_opt_str(a.get("output")), error=event.error, duration=duration, span_id=s.span_id)
+    if s.name == "task_executor":
+        if event.phase == "start":
+            return TaskStarted(task=str(a["task"]), span_id=s.span_id, parent_id=s.parent_id)
+        return TaskFinished(task=str(a["task"]), output=_opt_str(a.get("output")), error=event.error, duration=duration, span_id=s.span_id)
+    if s.name == "call_llm":
+        if event.phase == "start":
+            return LLMCallStarted(provider=str(a["provider"]), model=str(a["model"]), messages=int(str(a["messages"])), span_id=s.span_id, parent_id=s.parent_id)
+        tokens = a.get("tokens")
+        return LLMCallFinished(
+            provider=str(a["provider"]),
+            model=str(a["model"]),
+            response=_opt_str(a.get("response")),
+            tokens=tokens if isinstance(tokens, int) else None,
+            error=event.error,
+            duration=duration,
+            span_id=s.span_id,
+        )
+    if s.name == "tool_executor":
+        if event.phase == "start":
+            return ToolInvoked(tool=str(a["tool"]), input=str(a["input"]), span_id=s.span_id, parent_id=s.parent_id)
+        return ToolReturned(tool=str(a["tool"]), output=_opt_str(a.get("output")), error=event.error, duration=duration, span_id=s.span_id)
+    if s.name == "validation_executor" and event.phase == "end":
+        return ValidationVerdict(
+            task=str(a["task"]),
+            final_answer=str(a["final_answer"]),
+            passed=a.get("verdict") == "yes",
+            speculative=bool(a.get("speculative")),
+            error=event.error,
+            span_id=s.span_id,
+        )
+    return None
+
+
+def _opt_str(value: object) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+class _Done(NamedTuple):
+    pass
+
+
+class _EventStream:
+    """
+    Runs one organization on a worker thread and passes the RunEvents of its spans (and only its spans, even with
+    other runs in the process) to `emit`, followed by RunFinished and a _Done marker.
+    """
+
+    def __init__(self, emit: Callable[[Union[RunEvent, _Done]], None]) -> None:
+        self._emit = emit
+        self._lock = threading.Lock()
+        self._span_ids: set[int] = set()
+        self.error: Optional[BaseException] = None
+
+    def emit(self, item: Union[RunEvent, _Done]) -> None:
+        try:
+            self._emit(item)
+        except RuntimeError:
+            pass  # The consumer's event loop has closed
+
+    def hook(self, event: SpanEvent) -> None:
+        with self._lock:
+            if event.phase == "start":
+                if event.span.parent_id not in self._span_ids:
+                    return
+                self._span_ids.add(event.span.span_id)
+            elif event.span.span_id not in self._span_ids:
+                return
+        run_event = to_run_event(event)
+        if run_event is not None:
+            self.emit(run_event)
+
+    def run(self, org: Organization, deadline: Optional[Deadline], context: Optional[RunContext]) -> None:
+        add_hook(self.hook)
+        try:
+            with span("organization_events") as root:
+                with self._lock:
+                    self._span_ids.add(root.span_id)
+                conclusion = organization_executor(org, deadline=deadline, context=context)
+            self.emit(RunFinished(conclusion=conclusion, error=None))
+        except BaseException as e:
+            self.error = e
+            self.emit(RunFinished(conclusion=None, error=f"{type(e).__name__}: {e}"))
+        finally:
+            remove_hook(self.hook)
+            self.emit(_Done())
+
+    def start(self, org: Organization, deadline: Optional[Deadline], context: Optional[RunContext]) -> None:
+        threading.Thread(target=contextvars.copy_context().run, args=(self.run, org, deadline, context), name="gpt-agents-events", daemon=True).start()
+
+
+def _stream_deadline(deadline: Optional[Deadline], context: Optional[RunContext]) -> tuple[Optional[Deadline], Optional[Deadline]]:
+    """
+    (deadline to run with, deadline owned by the stream). Without any deadline the stream creates one, so it can cancel
+    the run when the consumer stops early; a caller's deadline is never cancelled by the stream.
+    """
+    if deadline is None and (context is None or context.deadline is None) and current_deadline() is None:
+        own = Deadline()
+        return own, own
+    return deadline, None
+
+
+def organization_events(org: Organization, deadline: Optional[Deadline] = None, context: Optional[RunContext] = None) -> Generator[RunEvent, None, None]:
+    """
+    Run `org` in the background and yield its RunEvents as they happen, ending with RunFinished (then re-raising the
+    run's exception, if any). Closing the generator early cancels the run unless it was given its own deadline.
+    Token deltas are not reported: the bundled callers do not stream.
+    """
+    run_deadline, own = _stream_deadline(deadline, context)
+    events: queue.Queue[Union[RunEvent, _Done]] = queue.Queue()
+    stream = _EventStream(events.put)
+    stream.start(org, run_deadline, context)
+    done = False
+    try:
+        while True:
+            item = events.get()
+            if isinstance(item, _Done):
+                done = True
+                break
+            yield item
+    finally:
+        if not done and own is not None:
+            own.cancel()
+    if stream.error is not None:
+        raise stream.error
+
+
+async def organization_events_async(org: Organization, deadline: Optional[Deadline] = None, context: Optional[RunContext] = None) -> AsyncIterator[RunEvent]:
+    """
+    Async-iterator variant of organization_events, for use inside an event loop. The run itself still executes on a worker thread.
+    """
+    run_deadline, own = _stream_deadline(deadline, context)
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue[Union[RunEvent, _Done]] = asyncio.Queue()
+
+    def put(item: Union[RunEvent, _Done]) -> None:
+        loop.call_soon_threadsafe(events.put_nowait, item)
+
+    stream = _EventStream(put)
+    stream.start(org, run_deadline, context)
+    done = False
+    try:
+        while True:
+            item = await events.get()
+            if isinstance(item, _Done):
+                done = True
+                break
+            yield item
+    finally:
+        if not done and own is not None:
+            own.cancel()
+    if stream.error is not None:
+        raise stream.error
@@ -1,12 +1,10 @@
 # gpt_agents_py | James Delancey | MIT License
-import collections
 import json
 import logging
-import threading
-import time
 import traceback
-from typing import List
+from typing import List, Optional
 
+from gpt_agents_py.deadline import deadline_sleep, deadline_timeout
 from gpt_agents_py.gpt_agents import (
     LLMCallerBase,
     LLMResponseText,
@@ -14,54 +12,39 @@ from gpt_agents_py.gpt_agents import (
     MessageType,
     get_trace_llm,
     get_trace_llm_filename,
+    http_retry_delay,
     load_api_keys,
     log_json,
 )
+from gpt_agents_py.metrics import LLM_RETRIES
+from gpt_agents_py.rate_limit import InProcessRateLimiter, RateLimiter
 
 
 class AnthropicLLMCaller(LLMCallerBase):
     """
     LLMCaller for Anthropic models (e.g., Claude Sonnet).
-    Implements a rate limiter: max 20 queries per minute (QPM).
+    Rate limited by `rate_limiter`, 10 requests per minute per process by default.
     """
 
-    _rate_limit_lock = threading.Lock()
-    _rate_limit_window = 60  # seconds
-    _rate_limit_max = 10
-    _rate_limit_times: collections.deque[float] = collections.deque(maxlen=_rate_limit_max)
+    provider = "anthropic"
+    model = "claude-3-7-sonnet-latest"
+    base_url = "https://api.anthropic.com"
 
-    def _acquire_rate_limit(self) -> None:
-        with self._rate_limit_lock:
-            now = time.time()
-            # Remove timestamps older than 60 seconds
-            while self._rate_limit_times and now - self._rate_limit_times[0] > self._rate_limit_window:
-                self._rate_limit_times.popleft()
-            if len(self._rate_limit_times) >= self._rate_limit_max:
-                # Sleep until the earliest timestamp is out of window
-                sleep_time = self._rate_limit_window - (now - self._rate_limit_times[0])
-                if sleep_time > 0:
-                    log_json(logging.INFO, "Anthropic LLM rate limit exceeded, sleeping for:", {"sleep_time": sleep_time})
-                    time.sleep(sleep_time)
-                # After sleep, clean up old timestamps
-                now = time.time()
-                while self._rate_limit_times and now - self._rate_limit_times[0] > self._rate_limit_window:
-                    self._rate_limit_times.popleft()
-            self._rate_limit_times.append(time.time())
+    # Default limit is per process; assign a SQLiteRateLimiter to share it across worker processes
+    rate_limiter: Optional[RateLimiter] = InProcessRateLimiter(rpm=10)
 
     def prepare_llm_response(self, messages: List["Message"], api_key: str = "anthropic") -> None:
-        self._acquire_rate_limit()
         import urllib.error
         import urllib.request
 
         # Load API keys
         try:
-            keys = load_api_keys()
-            key = keys[api_key]
+            key = self.api_key_value or load_api_keys()[api_key]
         except (FileNotFoundError, KeyError):
             raise BaseException(f"Anthropic API key '{api_key}' not found in api_keys.json.")
 
-        url = "https://api.anthropic.com/v1/messages"
-        model = "claude-3-7-sonnet-latest"
+        url = f"{self.base_url}/v1/messages"
+        model = self.model
         # Anthropic expects the first 'system' message as a top-level 'system' field, not in the messages list
         system_prompt = None
         filtered_messages: list[dict[str, str]] = []
@@ -88,8 +71,11 @@ class AnthropicLLMCaller(LLMCallerBase):
         req = urllib.request.Request(url, data=data, headers=headers, method="POST")
         retries = 5
         for attempt in range(retries):
+            if attempt:
+                LLM_RETRIES.inc(provider=self.provider, model=model)
+            self._acquire_rate_limit(api_key)
             try:
-                with urllib.request.urlopen(req, timeout=30) as resp:
+                with urllib.request.urlopen(req, timeout=deadline_timeout(self.timeout)) as resp:
                     resp_data = resp.read().decode("utf-8")
                     resp_json = json.loads(resp_data)
                     log_json(logging.DEBUG, "Anthropic LLM Raw Response:", resp_json)
@@ -102,7 +88,11 @@ class AnthropicLLMCaller(LLMCallerBase):
                     assert isinstance(content, str), "Anthropic response content is not a string"
                     self._response_text = LLMResponseText(content)
                     # Anthropic does not always return token usage, so set to None or extract if present
-                    self._tokens_used = resp_json.get("usage", {}).get("output_tokens")
+                    usage = resp_json.get("usage", {})
+                    self._input_tokens = usage.get("input_tokens")
+                    self._output_tokens = usage.get("output_tokens")
+                    self._tokens_used = (self._input_tokens or 0) + (self._output_tokens or 0) if usage else None
+                    self._record_rate_limit_tokens(api_key)
                     if get_trace_llm():
                         try:
                             with open(get_trace_llm_filename(), "a") as f:
@@ -124,10 +114,12 @@ class AnthropicLLMCaller(LLMCallerBase):
                     log_json(logging.ERROR, "Anthropic LLM HTTPError:", {"status": e.code, "reason": e.reason, "error": error_json})
                 except Exception:
                     log_json(logging.ERROR, "Anthropic LLM HTTPError (unparsable JSON):", {"status": e.code, "reason": e.reason, "error": error_content})
-            except TimeoutError as e:
+                if attempt < retries - 1:
+                    deadline_sleep(http_retry_delay(e, attempt))
+            except (TimeoutError, ConnectionError, urllib.error.URLError) as e:
                 log_json(logging.ERROR, "Anthropic LLM recoverable network error:", {"type": type(e).__name__, "message": str(e)})
                 if attempt < retries - 1:
-                    time.sleep(1)
+                    deadline_sleep(1)
                     continue
                 raise Exception(f"Network error after retries: {e}")
             except Exception as e:
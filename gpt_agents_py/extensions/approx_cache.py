@@ -0,0 +1,282 @@
+# gpt_agents_py | James Delancey | MIT License
+import array
+import bisect
+import collections
+import hashlib
+import random
+import re
+import sqlite3
+import string
+import threading
+import time
+import unicodedata
+from typing import Iterable, List, NamedTuple, Optional
+
+from gpt_agents_py.gpt_agents import (
+    LLMCallerBase,
+    LLMResponseText,
+    Message,
+    MessageType,
+    get_prompts,
+)
+from gpt_agents_py.metrics import APPROX_CACHE, APPROX_CACHE_SIMILARITY
+
+DEFAULT_KINDS = ("validation", "summary")
+UNCACHEABLE_KINDS = frozenset({"batch_validation"})  # Verdicts are keyed by item position, which shingle sets ignore
+DEFAULT_THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.99, 1.0)
+_MERSENNE_61 = (1 << 61) - 1
+_TOKEN_REGEX = re.compile(r"\w+|[^\w\s]")
+
+
+def _prefix(template: str) -> str:
+    return template.split("{", 1)[0].strip()
+
+
+def template_fields(template: str, text: str) -> Optional[dict[str, str]]:
+    """
+    The values template.format(...) filled in to produce `text`, or None if `text` was not built from `template`.
+    """
+    pattern, seen = "", set()
+    for literal, field, _, _ in string.Formatter().parse(template):
+        pattern += re.escape(literal)
+        if field is not None:
+            pattern += f"(?P={field})" if field in seen else f"(?P<{field}>.*?)"
+            seen.add(field)
+    match = re.fullmatch(pattern, text, re.DOTALL)
+    return match.groupdict() if match else None
+
+
+def call_kind(messages: List[Message]) -> str:
+    """
+    Classify a conversation as "validation", "batch_validation" (see ValidationBatcher), "summary" (any summary_mode)
+    or "task" (a ReAct turn), from the prompts the executors build it with.
+    """
+    prompts = get_prompts()
+    system = messages[0].content if messages and messages[0].role is MessageType.SYSTEM else ""
+    if system == prompts.validation_system_prompt:
+        return "validation"
+    if system == prompts.batch_validation_system_prompt:
+        return "batch_validation"
+    if system == prompts.no_tools_template:
+        # The summary task of summary_mode="task" plays the role "Summary"
+        persona = next((m.content for m in messages if m.role is MessageType.USER), "")
+        fields = template_fields(prompts.role_playing_template, persona)
+        if fields is not None and fields["role"] == "Summary":
+            return "summary"
+    user = next((m.content for m in reversed(messages) if m.role is MessageType.USER), "")
+    markers = (prompts.summary_single_shot_prompt, prompts.summary_incremental_prompt, prompts.summary_task_description_prompt)
+    if any(_prefix(m) and _prefix(m) in user for m in markers):
+        return "summary"
+    return "task"
+
+
+def normalize(text: str) -> str:
+    """
+    NFKC, case-folded, with runs of whitespace collapsed to one space.
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def shingles(messages: List[Message], size: int = 3) -> set[str]:
+    """
+    Word `size`-grams of each normalized message, tagged with its role. Being a set, reordering paragraphs (e.g. the
+    upstream conclusions) only changes the shingles that span a boundary.
+    """
+    result: set[str] = set()
+    for m in messages:
+        tokens = _TOKEN_REGEX.findall(normalize(m.content))
+        if len(tokens) <= size:
+            result.add(f"{m.role.value}|{' '.join(tokens)}")
+            continue
+        result.update(f"{m.role.value}|{' '.join(tokens[i:i + size])}" for i in range(len(tokens) - size + 1))
+    return result
+
+
+def variable_parts(messages: List[Message]) -> tuple[str, list[Message]]:
+    """
+    What a response depends on, without the fixed prompt text: the expected output of a validation, which must match
+    exactly, and the messages to compare approximately, reduced to the values filled into the known templates.
+    Left in, the template text would make up most of the shingles and make different calls look alike.
+    """
+    prompts = get_prompts()
+    templates = (prompts.validation_user_prompt, prompts.role_playing_template, prompts.summary_single_shot_prompt, prompts.summary_incremental_prompt)
+    exact, parts = "", []
+    for m in messages:
+        if m.content in (prompts.validation_system_prompt, prompts.no_tools_template):
+            continue
+        fields = next((f for f in (template_fields(t, m.content) for t in templates) if f is not None), None)
+        if fields is None:
+            parts.append(m)
+            continue
+        exact += normalize(fields.pop("expected_output", ""))
+        parts.extend(Message(role=m.role, content=value) for value in fields.values())
+    return exact, parts
+
+
+class MinHasher:
+    """
+    `num_perm` universal hash functions over 64-bit shingle hashes; the fraction of equal signature slots estimates
+    the Jaccard similarity of two shingle sets. The same seed gives the same functions in every process.
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1) -> None:
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = [(rng.randrange(1, _MERSENNE_61), rng.randrange(0, _MERSENNE_61)) for _ in range(num_perm)]
+
+    def signature(self, items: Iterable[str]) -> tuple[int, ...]:
+        hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in items]
+        if not hashes:
+            return (_MERSENNE_61,) * self.num_perm
+        return tuple(min((a * h + b) % _MERSENNE_61 for h in hashes) for a, b in self._params)
+
+
+def similarity(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+class ApproxCacheEntry(NamedTuple):
+    scope: str  # provider, model and call kind; entries only match within a scope
+    signature: tuple[int, ...]
+    response: str
+    created: float
+
+
+class ApproxCacheLLMCaller(LLMCallerBase):
+    """
+    Wraps `inner` and serves a stored response when a new call is near-identical to an earlier one: at least `threshold`
+    estimated Jaccard similarity over normalized word shingles of the values filled into the prompt templates (see
+    variable_parts), for the same provider, model, call kind and, for validations, expected output.
+    Only the call kinds in `kinds` (see call_kind) are cached; ReAct turns and batched validations always go upstream.
+    Candidates are found with LSH over `bands` bands of the MinHash signature, so lookups do not scan the cache.
+    The newest `max_entries` entries are kept, and the similarities of as many recent lookups for hit_rates.
+    With `path`, entries are also written to a SQLite file and loaded back on construction. Hits report zero tokens.
+    """
+
+    _SCHEMA = "CREATE TABLE IF NOT EXISTS approx_cache (scope TEXT NOT NULL, signature BLOB NOT NULL, response TEXT NOT NULL, created REAL NOT NULL)"
+
+    def __init__(
+        self,
+        inner: LLMCallerBase,
+        threshold: float = 0.9,
+        kinds: Iterable[str] = DEFAULT_KINDS,
+        num_perm: int = 128,
+        bands: int = 32,
+        path: Optional[str] = None,
+        busy_timeout: float = 30.0,
+        max_entries: int = 10_000,
+    ) -> None:
+        super().__init__()
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.inner = inner
+        self._inherit_settings(inner)
+        self.threshold = threshold
+        self.kinds = frozenset(kinds) - UNCACHEABLE_KINDS
+        self.bands = bands
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.max_entries = max_entries
+        self._hasher = MinHasher(num_perm)
+        self._rows = num_perm // bands
+        self._lock = threading.Lock()
+        self._entries: collections.OrderedDict[int, ApproxCacheEntry] = collections.OrderedDict()  # By insertion id, oldest first
+        self._next_id = 0
+        self._buckets: dict[tuple[str, int, tuple[int, ...]], list[int]] = collections.defaultdict(list)
+        self._similarities: dict[str, collections.deque[float]] = {}  # Best similarity of recent lookups, by kind
+        self._local = threading.local()
+        if path is not None:
+            conn = self._conn()
+            conn.execute(self._SCHEMA)
+            conn.execute("DELETE FROM approx_cache WHERE rowid NOT IN (SELECT rowid FROM approx_cache ORDER BY rowid DESC LIMIT ?)", (max_entries,))
+            for scope, blob, response, created in conn.execute("SELECT scope, signature, response, created FROM approx_cache ORDER BY rowid"):
+                self._add(ApproxCacheEntry(scope, tuple(array.array("Q", blob)), response, created))
+
+    def _conn(self) -> sqlite3.Connection:
+        assert self.path is not None
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _band_keys(self, scope: str, signature: tuple[int, ...]) -> list[tuple[str, int, tuple[int, ...]]]:
+        return [(scope, band, signature[band * self._rows : (band + 1) * self._rows]) for band in range(self.bands)]
+
+    def _add(self, entry: ApproxCacheEntry) -> None:
+        with self._lock:
+            entry_id, self._next_id = self._next_id, self._next_id + 1
+            self._entries[entry_id] = entry
+            for key in self._band_keys(entry.scope, entry.signature):
+                self._buckets[key].append(entry_id)
+            while len(self._entries) > self.max_entries:
+                old_id, old = self._entries.popitem(last=False)
+                for key in self._band_keys(old.scope, old.signature):
+                    bucket = self._buckets[key]
+                    bucket.remove(old_id)  # The oldest id, so near the front
+                    if not bucket:
+                        del self._buckets[key]
+
+    def lookup(self, scope: str, signature: tuple[int, ...]) -> tuple[float, Optional[ApproxCacheEntry]]:
+        """
+        The most similar cached entry in `scope` among the LSH candidates, with its estimated similarity (0.0 and None if there are none).
+        """
+        with self._lock:
+            candidates = {i for key in self._band_keys(scope, signature) for i in self._buckets.get(key, ())}
+            best, best_entry = 0.0, None
+            for i in candidates:
+                entry = self._entries[i]
+                score = similarity(signature, entry.signature)
+                if score > best or (score == best and best_entry is not None and entry.created > best_entry.created):
+                    best, best_entry = score, entry
+        return best, best_entry
+
+    def prepare_llm_response(self, messages: List[Message], api_key: str = "api_key") -> None:
+        kind = call_kind(messages)
+        if kind not in self.kinds:
+            self._forward(messages)
+            return
+        exact, parts = variable_parts(messages)
+        scope = f"{self.provider}\x00{self.model}\x00{kind}"
+        if exact:
+            scope += "\x00" + hashlib.blake2b(exact.encode("utf-8"), digest_size=8).hexdigest()
+        signature = self._hasher.signature(shingles(parts))
+        best, entry = self.lookup(scope, signature)
+        APPROX_CACHE_SIMILARITY.observe(best, kind=kind)
+        with self._lock:
+            self._similarities.setdefault(kind, collections.deque(maxlen=self.max_entries)).append(best)
+        if entry is not None and best >= self.threshold:
+            APPROX_CACHE.inc(kind=kind, result="hit")
+            self._response_text = LLMResponseText(entry.response)
+            self._tokens_used = self._input_tokens = self._output_tokens = 0
+            return
+        APPROX_CACHE.inc(kind=kind, result="miss")
+        self._forward(messages)
+        if self._response_text is not None:
+            self.put(ApproxCacheEntry(scope, signature, self._response_text, time.time()))
+
+    def _forward(self, messages: List[Message]) -> None:
+        self.inner._reset_response()
+        self.inner.prepare_llm_response(messages)
+        self._response_text = self.inner.get_llm_response()
+        self._tokens_used = self.inner.get_llm_tokens_used()
+        self._input_tokens = self.inner.get_llm_input_tokens()
+        self._output_tokens = self.inner.get_llm_output_tokens()
+
+    def put(self, entry: ApproxCacheEntry) -> None:
+        self._add(entry)
+        if self.path is not None:
+            self._conn().execute(
+                "INSERT INTO approx_cache (scope, signature, response, created) VALUES (?, ?, ?, ?)",
+                (entry.scope, array.array("Q", entry.signature).tobytes(), entry.response, entry.created),
+            )
+
+    def hit_rates(self, thresholds: Iterable[float] = DEFAULT_THRESHOLDS) -> dict[str, dict[float, float]]:
+        """
+        For each cached call kind, the fraction of recent lookups that would have been hits at each threshold,
+        for tuning `threshold` against the responses it would have reused.
+        """
+        with self._lock:
+            recent = {kind: sorted(scores) for kind, scores in self._similarities.items()}
+        return {kind: {t: (len(scores) - bisect.bisect_left(scores, t)) / len(scores) for t in thresholds} for kind, scores in recent.items()}
@@ -0,0 +1,244 @@
+# gpt_agents_py | James Delancey | MIT License
+import collections
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Callable, List, Optional
+
+from gpt_agents_py.gpt_agents import (
+    LLMCallerBase,
+    LLMResponseText,
+    Message,
+    Organization,
+    OrganizationConclusion,
+    RunContext,
+    Tool,
+    current_run_context,
+    get_llm_caller,
+    log_json,
+    organization_executor,
+)
+
+CASSETTE_VERSION = 1
+
+
+class CassetteDivergenceError(BaseException):
+    """
+    Raised in strict replay when the current run asks for an LLM exchange or tool call the cassette does not contain.
+    Derives from BaseException so the executors' retry loops do not swallow it.
+    """
+
+
+def messages_key(messages: List[Message]) -> str:
+    """
+    Stable hash of a conversation (roles and contents), used to match LLM exchanges on replay.
+    """
+    canonical = json.dumps([[m.role.value, m.content] for m in messages], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def tool_key(name: str, args: dict[str, str]) -> str:
+    return f"{name}:{json.dumps(args, sort_keys=True, ensure_ascii=False)}"
+
+
+class Cassette:
+    """
+    Every LLM exchange and tool result of one organization run, in call order. Persisted as a single JSON file.
+    """
+
+    def __init__(self, llm: Optional[list[dict[str, Any]]] = None, tools: Optional[list[dict[str, Any]]] = None, final_output: Optional[str] = None) -> None:
+        self.llm: list[dict[str, Any]] = llm or []
+        self.tools: list[dict[str, Any]] = tools or []
+        self.final_output = final_output
+        self._lock = threading.Lock()
+
+    def add_llm(self, messages: List[Message], response: str, input_tokens: Optional[int], output_tokens: Optional[int]) -> None:
+        entry = {
+            "key": messages_key(messages),
+            "messages": [{"role": m.role.value, "content": m.content} for m in messages],
+            "response": response,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+        }
+        with self._lock:
+            self.llm.append(entry)
+
+    def add_tool(self, name: str, args: dict[str, str], output: Optional[str], error: Optional[str]) -> None:
+        with self._lock:
+            self.tools.append({"key": tool_key(name, args), "tool": name, "input": args, "output": output, "error": error})
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump({"version": CASSETTE_VERSION, "llm": self.llm, "tools": self.tools, "final_output": self.final_output}, f, ensure_ascii=False, indent=1)
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version {data.get('version')!r} in {path}")
+        return cls(llm=data["llm"], tools=data["tools"], final_output=data.get("final_output"))
+
+
+class RecordingLLMCaller(LLMCallerBase):
+    """
+    Delegates to `inner` and appends every exchange to `cassette`.
+    """
+
+    def __init__(self, inner: LLMCallerBase, cassette: Cassette) -> None:
+        super().__init__()
+        self.inner = inner
+        self.cassette = cassette
+        self._inherit_settings(inner)
+
+    def prepare_llm_response(self, messages: List[Message], api_key: str = "api_key") -> None:
+        self.inner._reset_response()
+        self.inner.prepare_llm_response(messages)
+        text = self.inner.get_llm_response()
+        self._response_text = text
+        self._tokens_used = self.inner.get_llm_tokens_used()
+        self._input_tokens = self.inner.get_llm_input_tokens()
+        self._output_tokens = self.inner.get_llm_output_tokens()
+        if text is not None:
+            self.cassette.add_llm(messages, text, self._input_tokens, self._output_tokens)
+
+
+class ReplayLLMCaller(LLMCallerBase):
+    """
+    Serves LLM responses from a cassette, matched by conversation hash; identical conversations replay in recorded order.
+    strict=True raises CassetteDivergenceError on an unknown conversation. strict=False records the divergence in
+    `divergences` and falls back to the recorded response at the same position in the call sequence.
+    """
+
+    provider = "replay"
+
+    def __init__(self, cassette: Cassette, strict: bool = True) -> None:
+        super().__init__()
+        self.cassette = cassette
+        self.strict = strict
+        self.model = "cassette"
+        self.divergences: list[dict[str, Any]] = []
+        self._by_key: dict[str, collections.deque[dict[str, Any]]] = collections.defaultdict(collections.deque)
+        for entry in cassette.llm:
+            self._by_key[entry["key"]].append(entry)
+        self._position = 0
+        self._lock = threading.Lock()
+
+    def prepare_llm_response(self, messages: List[Message], api_key: str = "api_key") -> None:
+        key = messages_key(messages)
+        with self._lock:
+            position = self._position
+            self._position += 1
+            queue = self._by_key.get(key)
+            entry = queue.popleft() if queue else None
+            if entry is None:
+                expected = self.cassette.llm[position] if position < len(self.cassette.llm) else None
+                divergence = {"call": position, "first_differing_message": _first_difference(messages, expected), "messages": len(messages)}
+                self.divergences.append(divergence)
+                log_json(logging.WARNING, "Cassette divergence:", divergence)
+                if self.strict or expected is None:
+                    raise CassetteDivergenceError(f"No recorded LLM exchange for call {position} (first differing message: {divergence['first_differing_message']})")
+                entry = expected
+        self._response_text = LLMResponseText(entry["response"])
+        self._input_tokens = entry.get("input_tokens")
+        self._output_tokens = entry.get("output_tokens")
+        self._tokens_used = (self._input_tokens or 0) + (self._output_tokens or 0)
+
+
+def _first_difference(messages: List[Message], expected: Optional[dict[str, Any]]) -> Optional[int]:
+    if expected is None:
+        return None
+    recorded = expected["messages"]
+    for i, m in enumerate(messages):
+        if i >= len(recorded) or recorded[i]["role"] != m.role.value or recorded[i]["content"] != m.content:
+            return i
+    return len(messages) if len(recorded) != len(messages) else None
+
+
+def recording_tools(tools: List[Tool], cassette: Cassette) -> List[Tool]:
+    """
+    Wrap tool functions so each result (or raised error message) is appended to the cassette.
+    """
+
+    def wrap(tool: Tool) -> Callable[[dict[str, str]], str]:
+        def func(args: dict[str, str]) -> str:
+            try:
+                output = tool.func(args)
+            except Exception as e:
+                cassette.add_tool(tool.name, args, None, str(e))
+                raise
+            cassette.add_tool(tool.name, args, output, None)
+            return output
+
+        return func
+
+    return [t._replace(func=wrap(t)) for t in tools]
+
+
+def replaying_tools(tools: List[Tool], cassette: Cassette, strict: bool = True, divergences: Optional[list[dict[str, Any]]] = None) -> List[Tool]:
+    """
+    Replace tool functions with lookups into the cassette; the real tools are never called.
+    """
+    by_key: dict[str, collections.deque[dict[str, Any]]] = collections.defaultdict(collections.deque)
+    for entry in cassette.tools:
+        by_key[entry["key"]].append(entry)
+    lock = threading.Lock()
+
+    def wrap(tool: Tool) -> Callable[[dict[str, str]], str]:
+        def func(args: dict[str, str]) -> str:
+            key = tool_key(tool.name, args)
+            with lock:
+                queue = by_key.get(key)
+                entry = queue.popleft() if queue else None
+            if entry is None:
+                if divergences is not None:
+                    divergences.append({"tool": tool.name, "input": args})
+                message = f"No recorded result for tool '{tool.name}' with input {json.dumps(args, sort_keys=True)}"
+                if strict:
+                    raise CassetteDivergenceError(message)
+                raise Exception(message)
+            if entry["error"] is not None:
+                raise Exception(entry["error"])
+            return str(entry["output"])
+
+        return func
+
+    return [t._replace(func=wrap(t)) for t in tools]
+
+
+def _wrapped_organization(org: Organization, wrap_tools: Callable[[List[Tool]], List[Tool]]) -> Organization:
+    return org._replace(agents=[a._replace(tools=wrap_tools(a.tools)) for a in org.agents])
+
+
+def _with_caller(caller: LLMCallerBase) -> RunContext:
+    # The active run context (if any) with only the caller replaced, so concurrent recordings and replays stay apart
+    return (current_run_context() or RunContext())._replace(llm_caller=caller)
+
+
+def record_organization(org: Organization, path: str, caller: Optional[LLMCallerBase] = None) -> Optional[OrganizationConclusion]:
+    """
+    Run `org` with the given (or current) LLM caller, capturing every LLM exchange and tool result into a cassette at `path`.
+    The cassette is written even if the run raises. The recording caller is installed for this run only (see RunContext).
+    """
+    cassette = Cassette()
+    recorder = RecordingLLMCaller(caller or get_llm_caller(), cassette)
+    try:
+        conclusion = organization_executor(_wrapped_organization(org, lambda tools: recording_tools(tools, cassette)), context=_with_caller(recorder))
+        cassette.final_output = conclusion.final_conclusion.output if conclusion else None
+        return conclusion
+    finally:
+        cassette.save(path)
+
+
+def replay_organization(org: Organization, path: str, strict: bool = True) -> tuple[Optional[OrganizationConclusion], list[dict[str, Any]]]:
+    """
+    Re-run `org` from the cassette at `path` with no network and no real tool calls.
+    Returns the conclusion and the list of divergences between the cassette and the current prompts/tool calls
+    (always empty in strict mode, which raises CassetteDivergenceError instead).
+    """
+    cassette = Cassette.load(path)
+    replayer = ReplayLLMCaller(cassette, strict=strict)
+    tool_divergences: list[dict[str, Any]] = []
+    conclusion = organization_executor(_wrapped_organization(org, lambda tools: replaying_tools(tools, cassette, strict, tool_divergences)), context=_with_caller(replayer))
+    return conclusion, replayer.divergences + tool_divergences
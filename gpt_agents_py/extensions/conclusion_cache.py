@@ -0,0 +1,160 @@
+# gpt_agents_py | James Delancey | MIT License
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from gpt_agents_py.gpt_agents import (
+    Agent,
+    ConclusionCacheBase,
+    Task,
+    TaskConclusion,
+)
+from gpt_agents_py.metrics import CONCLUSION_CACHE
+
+
+class CacheEntry(NamedTuple):
+    key: str
+    task_name: str
+    tools: list[str]  # Names of the agent's tools, for invalidate_tool
+    input: str
+    output: str
+    created: float
+
+
+def conclusion_key(agent: Agent, task: Task, context: list[TaskConclusion]) -> str:
+    """
+    Hash of everything a task's outcome depends on: the task name and text, the agent persona, the tool set
+    (name, description, schema and version) and the upstream conclusions it receives as context.
+    """
+    canonical = json.dumps(
+        {
+            "task": [task.name, task.description, task.expected_output],
+            "agent": [agent.role, agent.goal, agent.backstory],
+            "tools": sorted([t.name, t.description, t.args_schema, t.version] for t in agent.tools),
+            "context": [[tc.input, tc.output] for tc in context],
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ConclusionStore:
+    """
+    Storage backend for ConclusionCache. The base class keeps entries in memory for the life of the process;
+    subclasses override get, put and delete to persist them elsewhere.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[str, CacheEntry] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[entry.key] = entry
+
+    def delete(self, task_name: Optional[str] = None, tool: Optional[str] = None, older_than: Optional[float] = None) -> int:
+        """
+        Delete entries matching every given filter (all entries if none is given). Returns the number deleted.
+        """
+        with self._lock:
+            doomed = [
+                k
+                for k, e in self._entries.items()
+                if (task_name is None or e.task_name == task_name) and (tool is None or tool in e.tools) and (older_than is None or e.created < older_than)
+            ]
+            for k in doomed:
+                del self._entries[k]
+            return len(doomed)
+
+
+class SQLiteConclusionStore(ConclusionStore):
+    """
+    Persistent store in a SQLite file, so conclusions survive across runs and are shared by processes on the host.
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS conclusions (key TEXT PRIMARY KEY, task_name TEXT NOT NULL, tools TEXT NOT NULL, input TEXT NOT NULL, output TEXT NOT NULL, created REAL NOT NULL);
+    CREATE INDEX IF NOT EXISTS conclusions_task ON conclusions (task_name);
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 30.0) -> None:
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._conn().executescript(self._SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        row = self._conn().execute("SELECT key, task_name, tools, input, output, created FROM conclusions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(row[0], row[1], json.loads(row[2]), row[3], row[4], row[5])
+
+    def put(self, entry: CacheEntry) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO conclusions (key, task_name, tools, input, output, created) VALUES (?, ?, ?, ?, ?, ?)",
+            (entry.key, entry.task_name, json.dumps(entry.tools), entry.input, entry.output, entry.created),
+        )
+
+    def delete(self, task_name: Optional[str] = None, tool: Optional[str] = None, older_than: Optional[float] = None) -> int:
+        clauses: list[str] = []
+        params: list[object] = []
+        if task_name is not None:
+            clauses.append("task_name = ?")
+            params.append(task_name)
+        if tool is not None:
+            clauses.append("EXISTS (SELECT 1 FROM json_each(conclusions.tools) WHERE json_each.value = ?)")
+            params.append(tool)
+        if older_than is not None:
+            clauses.append("created < ?")
+            params.append(older_than)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._conn().execute(f"DELETE FROM conclusions{where}", params).rowcount
+
+
+class ConclusionCache(ConclusionCacheBase):
+    """
+    Task-level memoization: a task whose text, agent persona, tool set and upstream context match a stored entry
+    reuses the stored TaskConclusion instead of running. Entries older than `ttl` seconds are ignored.
+    Changing a Tool's version changes the key; invalidate_task and invalidate_tool drop entries explicitly.
+    """
+
+    def __init__(self, store: Optional[ConclusionStore] = None, ttl: Optional[float] = None) -> None:
+        self.store = store if store is not None else ConclusionStore()
+        self.ttl = ttl
+
+    def get(self, agent: Agent, task: Task, context: list[TaskConclusion]) -> Optional[TaskConclusion]:
+        entry = self.store.get(conclusion_key(agent, task, context))
+        if entry is None or (self.ttl is not None and time.time() - entry.created > self.ttl):
+            CONCLUSION_CACHE.inc(result="miss")
+            return None
+        CONCLUSION_CACHE.inc(result="hit")
+        return TaskConclusion(input=entry.input, output=entry.output)
+
+    def put(self, agent: Agent, task: Task, context: list[TaskConclusion], conclusion: TaskConclusion) -> None:
+        key = conclusion_key(agent, task, context)
+        self.store.put(CacheEntry(key, task.name, [t.name for t in agent.tools], conclusion.input, conclusion.output, time.time()))
+
+    def invalidate_task(self, task_name: str) -> int:
+        return self.store.delete(task_name=task_name)
+
+    def invalidate_tool(self, tool_name: str) -> int:
+        return self.store.delete(tool=tool_name)
+
+    def purge_expired(self) -> int:
+        return self.store.delete(older_than=time.time() - self.ttl) if self.ttl is not None else 0
@@ -0,0 +1,79 @@
+# gpt_agents_py | James Delancey | MIT License
+import asyncio
+import itertools
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, NamedTuple, Optional
+
+from gpt_agents_py.gpt_agents import HumanInputProviderBase, HumanInputRequest
+
+
+class PendingHumanInput(NamedTuple):
+    id: int
+    request: HumanInputRequest
+    future: Future[str]
+
+
+class QueueHumanInput(HumanInputProviderBase):
+    """
+    Hands human input requests to another part of the program, e.g. a web UI. Each request is put on `requests` and
+    passed to `on_request` (if given); answer it with respond(id, guidance) from any thread. Requests that time out
+    or whose run is cancelled drop out of pending().
+    """
+
+    def __init__(self, timeout: Optional[float] = None, default: str = "q", on_request: Optional[Callable[[PendingHumanInput], None]] = None) -> None:
+        super().__init__(timeout=timeout, default=default)
+        self.on_request = on_request
+        self.requests: queue.Queue[PendingHumanInput] = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending: dict[int, PendingHumanInput] = {}
+        self._ids = itertools.count(1)
+
+    def request(self, request: HumanInputRequest) -> Future[str]:
+        future: Future[str] = Future()
+        with self._lock:
+            pending = PendingHumanInput(id=next(self._ids), request=request, future=future)
+            self._pending[pending.id] = pending
+        future.add_done_callback(lambda f: self._forget(pending.id))
+        self.requests.put(pending)
+        if self.on_request is not None:
+            self.on_request(pending)
+        return future
+
+    def _forget(self, request_id: int) -> None:
+        with self._lock:
+            self._pending.pop(request_id, None)
+
+    def pending(self) -> list[PendingHumanInput]:
+        with self._lock:
+            return list(self._pending.values())
+
+    def respond(self, request_id: int, guidance: str) -> bool:
+        """
+        Answer a pending request. Returns False if it is unknown or already answered, timed out or cancelled.
+        """
+        with self._lock:
+            pending = self._pending.get(request_id)
+        if pending is None or not pending.future.set_running_or_notify_cancel():
+            return False
+        pending.future.set_result(guidance)
+        return True
+
+
+class AsyncHumanInput(HumanInputProviderBase):
+    """
+    Asks for human input with a coroutine function running on `loop`, e.g. one that awaits a reply over a websocket.
+    Waiting costs the loop nothing; on timeout or cancellation the coroutine is cancelled.
+    """
+
+    def __init__(self, ask: Callable[[HumanInputRequest], Awaitable[str]], loop: asyncio.AbstractEventLoop, timeout: Optional[float] = None, default: str = "q") -> None:
+        super().__init__(timeout=timeout, default=default)
+        self.ask = ask
+        self.loop = loop
+
+    def request(self, request: HumanInputRequest) -> Future[str]:
+        async def run() -> str:
+            return await self.ask(request)
+
+        return asyncio.run_coroutine_threadsafe(run(), self.loop)
@@ -0,0 +1,124 @@
+# gpt_agents_py | James Delancey | MIT License
+import sqlite3
+import threading
+import time
+from typing import Iterator, Optional, Sequence, overload
+
+from gpt_agents_py.gpt_agents import (
+    HistoryStoreBase,
+    Message,
+    MessageType,
+    TaskHistory,
+)
+
+
+class StoredMessages(Sequence[Message]):
+    """
+    A task's conversation kept in a SQLiteMessageStore. Only the history id and length live in memory; messages are
+    read from disk on each access and iteration streams them, so inspecting a long history does not pin it in RAM.
+    """
+
+    def __init__(self, store: "SQLiteMessageStore", history_id: int, length: int) -> None:
+        self.store = store
+        self.history_id = history_id
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    @overload
+    def __getitem__(self, index: int) -> Message:
+        pass
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Message]:
+        pass
+
+    def __getitem__(self, index: int | slice) -> Message | list[Message]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step != 1:
+                return list(self)[index]
+            return self.store._load(self.history_id, start, stop)
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("StoredMessages index out of range")
+        return self.store._load(self.history_id, index, index + 1)[0]
+
+    def __iter__(self) -> Iterator[Message]:
+        for start in range(0, self._length, self.store.page_size):
+            yield from self.store._load(self.history_id, start, min(start + self.store.page_size, self._length))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"StoredMessages(history_id={self.history_id}, length={self._length})"
+
+
+class SQLiteMessageStore(HistoryStoreBase):
+    """
+    Writes each finished task's conversation to a SQLite file and hands back a TaskHistory whose messages load lazily,
+    so a run's memory does not grow with its retry histories. The file outlives the process; get() reopens a history by id.
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS histories (id INTEGER PRIMARY KEY AUTOINCREMENT, agent TEXT NOT NULL, task TEXT NOT NULL, length INTEGER NOT NULL, created REAL NOT NULL);
+    CREATE TABLE IF NOT EXISTS messages (history_id INTEGER NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, content TEXT NOT NULL, PRIMARY KEY (history_id, seq)) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 30.0, page_size: int = 256) -> None:
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.page_size = page_size  # Messages read per query while iterating
+        self._local = threading.local()
+        self._conn().executescript(self._SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def put(self, history: TaskHistory) -> TaskHistory:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.execute("INSERT INTO histories (agent, task, length, created) VALUES (?, ?, ?, ?)", (history.agent, history.task, len(history.messages), time.time()))
+            history_id = cursor.lastrowid
+            assert history_id is not None
+            conn.executemany(
+                "INSERT INTO messages (history_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                ((history_id, seq, m.role.value, m.content) for seq, m in enumerate(history.messages)),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return history._replace(messages=StoredMessages(self, history_id, len(history.messages)))
+
+    def discard(self, history: TaskHistory) -> None:
+        if isinstance(history.messages, StoredMessages) and history.messages.store is self:
+            self.delete(history.messages.history_id)
+
+    def delete(self, history_id: int) -> None:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM messages WHERE history_id = ?", (history_id,))
+        conn.execute("DELETE FROM histories WHERE id = ?", (history_id,))
+        conn.execute("COMMIT")
+
+    def get(self, history_id: int) -> Optional[TaskHistory]:
+        row = self._conn().execute("SELECT agent, task, length FROM histories WHERE id = ?", (history_id,)).fetchone()
+        if row is None:
+            return None
+        return TaskHistory(agent=row[0], task=row[1], messages=StoredMessages(self, history_id, row[2]))
+
+    def _load(self, history_id: int, start: int, stop: int) -> list[Message]:
+        rows = self._conn().execute("SELECT role, content FROM messages WHERE history_id = ? AND seq >= ? AND seq < ? ORDER BY seq", (history_id, start, stop)).fetchall()
+        return [Message(role=MessageType(role), content=content) for role, content in rows]
@@ -0,0 +1,256 @@
+# gpt_agents_py | James Delancey | MIT License
+import argparse
+import http.server
+import json
+import logging
+import math
+import random
+import threading
+import time
+from typing import Any, Callable, NamedTuple, Optional
+
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.gpt_agents import Message, MessageType, log_json
+
+Responder = Callable[[list[Message]], str]
+
+
+class MockLLMServerConfig(NamedTuple):
+    latency_ms: float = 0.0  # Mean response latency
+    latency_distribution: str = "fixed"  # fixed, uniform (0..2x mean), exponential or lognormal
+    latency_sigma: float = 0.5  # Shape of the lognormal distribution
+    rate_429: float = 0.0  # Probability of answering 429 with a Retry-After header
+    retry_after_s: float = 1.0
+    rpm_limit: int = 0  # If > 0, requests beyond this many per rolling minute also get 429
+    rate_5xx: float = 0.0  # Probability of answering 500/502/503
+    rate_timeout: float = 0.0  # Probability of hanging for timeout_s before answering
+    timeout_s: float = 35.0  # Longer than the callers' default 30s per-attempt timeout
+    stream_chunk_chars: int = 16  # Characters per streamed delta when the request sets "stream": true
+    stream_chunk_delay_ms: float = 0.0
+    seed: Optional[int] = None
+
+
+class MockLLMServer(http.server.ThreadingHTTPServer):
+    """
+    Local stand-in for the OpenAI /v1/chat/completions and Anthropic /v1/messages APIs, with fault injection.
+    Responses come from `responder` (ScriptedLLMCaller.respond by default). GET /stats returns outcome counters as JSON.
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024  # The default of 5 drops connections at realistic concurrency
+
+    def __init__(self, address: tuple[str, int], config: MockLLMServerConfig = MockLLMServerConfig(), responder: Optional[Responder] = None) -> None:
+        super().__init__(address, _MockLLMHandler)
+        self.config = config
+        self.responder: Responder = responder or ScriptedLLMCaller().respond
+        self._random = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self._request_times: list[float] = []
+        self.stats: dict[str, int] = {}
+
+    def count(self, outcome: str) -> None:
+        with self._lock:
+            self.stats[outcome] = self.stats.get(outcome, 0) + 1
+
+    def roll(self) -> float:
+        with self._lock:
+            return self._random.random()
+
+    def sample_latency(self) -> float:
+        c = self.config
+        mean = c.latency_ms / 1000.0
+        if mean <= 0:
+            return 0.0
+        with self._lock:
+            if c.latency_distribution == "uniform":
+                return self._random.uniform(0, 2 * mean)
+            if c.latency_distribution == "exponential":
+                return self._random.expovariate(1 / mean)
+            if c.latency_distribution == "lognormal":
+                # Parameterized so the distribution mean equals latency_ms
+                mu = math.log(mean) - c.latency_sigma**2 / 2
+                return self._random.lognormvariate(mu, c.latency_sigma)
+        return mean
+
+    def over_rpm_limit(self) -> bool:
+        if self.config.rpm_limit <= 0:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            self._request_times = [t for t in self._request_times if now - t < 60]
+            if len(self._request_times) >= self.config.rpm_limit:
+                return True
+            self._request_times.append(now)
+            return False
+
+
+class _MockLLMHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: MockLLMServer
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def _send_json(self, status: int, body: dict[str, Any], headers: Optional[dict[str, str]] = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path == "/stats":
+            with self.server._lock:
+                stats = dict(self.server.stats)
+            self._send_json(200, stats)
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length).decode("utf-8") or "{}")
+        except json.JSONDecodeError:
+            self.server.count("bad_request")
+            self._send_json(400, {"error": {"type": "invalid_request_error", "message": "Body is not valid JSON"}})
+            return
+        if self.path == "/v1/chat/completions":
+            flavor = "openai"
+            messages = [Message(role=MessageType(m["role"]), content=m["content"]) for m in payload.get("messages", [])]
+        elif self.path == "/v1/messages":
+            flavor = "anthropic"
+            messages = [Message(role=MessageType.SYSTEM, content=payload["system"])] if payload.get("system") else []
+            messages += [Message(role=MessageType(m["role"]), content=m["content"]) for m in payload.get("messages", [])]
+        else:
+            self.server.count("not_found")
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        cfg = self.server.config
+        if self.server.over_rpm_limit() or self.server.roll() < cfg.rate_429:
+            self.server.count("429")
+            self._send_json(429, {"error": {"type": "rate_limit_error", "message": "Rate limited (mock)"}}, {"Retry-After": f"{cfg.retry_after_s:g}"})
+            return
+        if self.server.roll() < cfg.rate_5xx:
+            status = (500, 502, 503)[int(self.server.roll() * 3)]
+            self.server.count(str(status))
+            self._send_json(status, {"error": {"type": "api_error", "message": "Injected server error (mock)"}})
+            return
+        if self.server.roll() < cfg.rate_timeout:
+            self.server.count("timeout")
+            time.sleep(cfg.timeout_s)
+        time.sleep(self.server.sample_latency())
+
+        text = self.server.responder(messages)
+        input_tokens = sum(len(m.content) for m in messages) // 4
+        output_tokens = len(text) // 4
+        model = payload.get("model", "mock")
+        if payload.get("stream"):
+            self.server.count("stream")
+            self._stream(flavor, model, text, input_tokens, output_tokens)
+            return
+        self.server.count("200")
+        if flavor == "openai":
+            body: dict[str, Any] = {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": input_tokens, "completion_tokens": output_tokens, "total_tokens": input_tokens + output_tokens},
+            }
+        else:
+            body = {
+                "id": "msg_mock",
+                "type": "message",
+                "role": "assistant",
+                "model": model,
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn",
+                "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+            }
+        self._send_json(200, body)
+
+    def _stream(self, flavor: str, model: str, text: str, input_tokens: int, output_tokens: int) -> None:
+        cfg = self.server.config
+        size = max(cfg.stream_chunk_chars, 1)
+        chunks = [text[i : i + size] for i in range(0, len(text), size)]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(data: dict[str, Any], name: Optional[str] = None) -> None:
+            prefix = f"event: {name}\n" if name else ""
+            self.wfile.write(f"{prefix}data: {json.dumps(data)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        if flavor == "openai":
+            for chunk in chunks:
+                event({"id": "chatcmpl-mock", "object": "chat.completion.chunk", "model": model, "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]})
+                time.sleep(cfg.stream_chunk_delay_ms / 1000.0)
+            event({"id": "chatcmpl-mock", "object": "chat.completion.chunk", "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            self.wfile.write(b"data: [DONE]\n\n")
+        else:
+            event({"type": "message_start", "message": {"id": "msg_mock", "model": model, "usage": {"input_tokens": input_tokens, "output_tokens": 0}}}, "message_start")
+            event({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}, "content_block_start")
+            for chunk in chunks:
+                event({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": chunk}}, "content_block_delta")
+                time.sleep(cfg.stream_chunk_delay_ms / 1000.0)
+            event({"type": "content_block_stop", "index": 0}, "content_block_stop")
+            event({"type": "message_delta", "delta": {"stop_reason": "end_turn"}, "usage": {"output_tokens": output_tokens}}, "message_delta")
+            event({"type": "message_stop"}, "message_stop")
+        self.wfile.flush()
+
+
+def start_mock_llm_server(config: MockLLMServerConfig = MockLLMServerConfig(), host: str = "127.0.0.1", port: int = 0, responder: Optional[Responder] = None) -> MockLLMServer:
+    """
+    Start a MockLLMServer on a daemon thread and return it. Point a caller at it with
+    LLMCallerBase(base_url=f"http://{host}:{server.server_address[1]}", api_key_value="mock"). Stop with server.shutdown().
+    """
+    server = MockLLMServer((host, port), config, responder)
+    threading.Thread(target=server.serve_forever, name="gpt-agents-mock-llm", daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local OpenAI/Anthropic-compatible mock LLM server with latency and fault injection.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-distribution", choices=["fixed", "uniform", "exponential", "lognormal"], default="fixed")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Probability of a 429 with Retry-After.")
+    parser.add_argument("--retry-after-s", type=float, default=1.0)
+    parser.add_argument("--rpm-limit", type=int, default=0, help="Requests per rolling minute before answering 429. 0 disables.")
+    parser.add_argument("--rate-5xx", type=float, default=0.0)
+    parser.add_argument("--rate-timeout", type=float, default=0.0)
+    parser.add_argument("--timeout-s", type=float, default=35.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    config = MockLLMServerConfig(
+        latency_ms=args.latency_ms,
+        latency_distribution=args.latency_distribution,
+        rate_429=args.rate_429,
+        retry_after_s=args.retry_after_s,
+        rpm_limit=args.rpm_limit,
+        rate_5xx=args.rate_5xx,
+        rate_timeout=args.rate_timeout,
+        timeout_s=args.timeout_s,
+        seed=args.seed,
+    )
+    server = MockLLMServer((args.host, args.port), config)
+    log_json(logging.INFO, "Mock LLM server listening:", {"url": f"http://{args.host}:{server.server_address[1]}", "config": config})
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# gpt_agents_py | James Delancey | MIT License
+import contextlib
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from typing import Iterator, List, NamedTuple, Optional
+
+from gpt_agents_py.deadline import deadline_wait
+from gpt_agents_py.gpt_agents import LLMCallerBase, Message
+from gpt_agents_py.metrics import LLM_QUEUE_WAIT
+
+
+class PriorityClass(NamedTuple):
+    priority: int  # Lower is served first
+    max_queue: int  # Calls allowed to wait in this class before new ones are rejected
+
+
+DEFAULT_CLASSES = {"interactive": PriorityClass(priority=0, max_queue=1000), "batch": PriorityClass(priority=1, max_queue=100000)}
+
+
+class SchedulerQueueFullError(Exception):
+    """
+    Raised when a call arrives while its priority class already has max_queue calls waiting.
+    """
+
+
+class _Scheduling(NamedTuple):
+    priority_class: str
+    tenant: str
+
+
+_SCHEDULING: contextvars.ContextVar[Optional[_Scheduling]] = contextvars.ContextVar("gpt_agents_scheduling", default=None)
+
+
+@contextlib.contextmanager
+def scheduling(priority_class: str, tenant: str = "default") -> Iterator[None]:
+    """
+    Run the enclosed organization(s) under a priority class and tenant. Threads started with a copied context
+    (as run_batch does per row) inherit it.
+    """
+    token = _SCHEDULING.set(_Scheduling(priority_class, tenant))
+    try:
+        yield
+    finally:
+        _SCHEDULING.reset(token)
+
+
+class _Waiter:
+    def __init__(self) -> None:
+        self.ready = threading.Event()
+
+
+class SchedulingLLMCaller(LLMCallerBase):
+    """
+    Wraps `inner` so that at most `max_concurrency` calls run at once, and waiting calls are admitted by priority
+    class (strict priority) and, within a class, by weighted fair queuing between tenants.
+    A tenant with weight 2 gets twice the admissions of a weight-1 tenant while both have calls waiting.
+    Calls outside a scheduling() block use `default_class` and the "default" tenant.
+    A queued call whose run expires or is cancelled leaves the queue and raises RunInterrupted.
+    """
+
+    def __init__(
+        self,
+        inner: LLMCallerBase,
+        max_concurrency: int = 8,
+        classes: Optional[dict[str, PriorityClass]] = None,
+        tenant_weights: Optional[dict[str, float]] = None,
+        default_class: str = "interactive",
+    ) -> None:
+        super().__init__()
+        self.inner = inner
+        self._inherit_settings(inner)
+        self.max_concurrency = max_concurrency
+        self.classes = dict(classes if classes is not None else DEFAULT_CLASSES)
+        self.tenant_weights = dict(tenant_weights or {})
+        self.default_class = default_class
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queues: dict[str, list[tuple[float, int, _Waiter]]] = {name: [] for name in self.classes}
+        self._virtual_time: dict[str, float] = {name: 0.0 for name in self.classes}
+        self._last_finish: dict[tuple[str, str], float] = {}
+        self._finish_tags: dict[str, list[tuple[float, str]]] = {name: [] for name in self.classes}  # (finish, tenant) heaps, to evict stale _last_finish keys
+        self._seq = itertools.count()
+
+    def queue_depths(self) -> dict[str, int]:
+        with self._lock:
+            return {name: len(q) for name, q in self._queues.items()}
+
+    def _acquire(self, priority_class: str, tenant: str) -> None:
+        if priority_class not in self.classes:
+            raise ValueError(f"Unknown priority class {priority_class!r}; expected one of {sorted(self.classes)}")
+        with self._lock:
+            if self._active < self.max_concurrency and not any(self._queues.values()):
+                self._active += 1
+                return
+            queue = self._queues[priority_class]
+            if len(queue) >= self.classes[priority_class].max_queue:
+                raise SchedulerQueueFullError(f"LLM queue for priority class {priority_class!r} is full ({len(queue)} waiting)")
+            # Start-time fair queuing: a tenant's next call is tagged one weighted slot after its previous one
+            start = max(self._virtual_time[priority_class], self._last_finish.get((priority_class, tenant), 0.0))
+            finish = start + 1.0 / self.tenant_weights.get(tenant, 1.0)
+            self._last_finish[(priority_class, tenant)] = finish
+            heapq.heappush(self._finish_tags[priority_class], (finish, tenant))
+            waiter = _Waiter()
+            entry = (finish, next(self._seq), waiter)
+            heapq.heappush(queue, entry)
+        try:
+            deadline_wait(waiter.ready)
+        except BaseException:
+            with self._lock:
+                handed_over = waiter.ready.is_set()
+                if not handed_over:
+                    queue.remove(entry)
+                    heapq.heapify(queue)
+            if handed_over:
+                # The slot arrived as we gave up; pass it on
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        with self._lock:
+            for name in sorted(self._queues, key=lambda n: self.classes[n].priority):
+                queue = self._queues[name]
+                if queue:
+                    finish, _, waiter = heapq.heappop(queue)
+                    self._virtual_time[name] = finish
+                    self._evict_tenants(name)
+                    # Hand the slot straight to the waiter; _active is unchanged
+                    waiter.ready.set()
+                    return
+            self._active -= 1
+
+    def _evict_tenants(self, name: str) -> None:
+        # A finish tag at or below the virtual time no longer affects the tenant's next tag, so forget it
+        tags = self._finish_tags[name]
+        while tags and tags[0][0] <= self._virtual_time[name]:
+            finish, tenant = heapq.heappop(tags)
+            if self._last_finish.get((name, tenant)) == finish:
+                del self._last_finish[(name, tenant)]
+
+    def prepare_llm_response(self, messages: List[Message], api_key: str = "api_key") -> None:
+        context = _SCHEDULING.get()
+        priority_class = context.priority_class if context is not None else self.default_class
+        tenant = context.tenant if context is not None else "default"
+        start = time.perf_counter()
+        self._acquire(priority_class, tenant)
+        LLM_QUEUE_WAIT.observe(time.perf_counter() - start, priority_class=priority_class)
+        try:
+            self.inner._reset_response()
+            self.inner.prepare_llm_response(messages)
+            self._response_text = self.inner.get_llm_response()
+            self._tokens_used = self.inner.get_llm_tokens_used()
+            self._input_tokens = self.inner.get_llm_input_tokens()
+            self._output_tokens = self.inner.get_llm_output_tokens()
+        finally:
+            self._release()
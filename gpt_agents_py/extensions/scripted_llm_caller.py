@@ -0,0 +1,93 @@
+# gpt_agents_py | James Delancey | MIT License
+import random
+import threading
+import time
+from typing import Callable, List, Optional, Sequence, Union
+
+from gpt_agents_py.gpt_agents import (
+    LLMCallerBase,
+    LLMResponseText,
+    Message,
+    MessageType,
+    get_prompts,
+)
+
+# One ReAct turn per entry, indexed by how many assistant turns the conversation already has.
+DEFAULT_REACT_SCRIPT = (
+    'Thought: I should use the lookup tool.\nAction: lookup\nAction Input: {"key": "france"}',
+    "Thought: I now know the final answer\nFinal Answer: 67000000",
+)
+DEFAULT_VALIDATION_RESPONSE = "Thought: The output matches the expected description.\nFinal Answer: yes"
+DEFAULT_NO_TOOLS_RESPONSE = "Thought: I now know the final answer\nFinal Answer: Summary of the previous results."
+
+
+class ScriptedLLMError(Exception):
+    """
+    Raised by ScriptedLLMCaller to simulate a failed provider call.
+    """
+
+
+class ScriptedLLMCaller(LLMCallerBase):
+    """
+    Offline LLMCaller that replays canned ReAct responses, for tests and benchmarks.
+    - Validation conversations (validation_system_prompt) get `validation_response`.
+    - Conversations without tools (no_tools_template, e.g. summaries) get `no_tools_response`.
+    - Otherwise the response is script[n], n being the number of assistant turns so far (clamped to the last entry).
+    `latency` is a fixed delay in seconds or a zero-arg callable sampling one; `error_rate` is the probability of raising ScriptedLLMError.
+    The response only depends on the messages, so one instance can serve many concurrent runs.
+    """
+
+    provider = "scripted"
+    model = "scripted"
+
+    def __init__(
+        self,
+        script: Sequence[str] = DEFAULT_REACT_SCRIPT,
+        validation_response: str = DEFAULT_VALIDATION_RESPONSE,
+        no_tools_response: str = DEFAULT_NO_TOOLS_RESPONSE,
+        latency: Union[float, Callable[[], float]] = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        super().__init__()
+        if not script:
+            raise ValueError("script must contain at least one response")
+        self.script = tuple(script)
+        self.validation_response = validation_response
+        self.no_tools_response = no_tools_response
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._calls_lock = threading.Lock()
+        self.calls = 0
+
+    def respond(self, messages: List[Message]) -> str:
+        """
+        Pick the canned response for a conversation, without latency or error injection.
+        """
+        system = messages[0].content if messages and messages[0].role is MessageType.SYSTEM else ""
+        if system == get_prompts().validation_system_prompt:
+            return self.validation_response
+        if system == get_prompts().no_tools_template:
+            return self.no_tools_response
+        turns = sum(1 for m in messages if m.role is MessageType.ASSISTANT)
+        return self.script[min(turns, len(self.script) - 1)]
+
+    def prepare_llm_response(self, messages: List[Message], api_key: str = "scripted") -> None:
+        with self._calls_lock:
+            self.calls += 1
+        delay = self.latency() if callable(self.latency) else self.latency
+        if delay > 0:
+            time.sleep(delay)
+        if self.error_rate > 0:
+            with self._random_lock:
+                failed = self._random.random() < self.error_rate
+            if failed:
+                raise ScriptedLLMError("Scripted LLM failure")
+        text = self.respond(messages)
+        self._response_text = LLMResponseText(text)
+        # Rough 4-characters-per-token estimate keeps token metrics populated
+        self._input_tokens = sum(len(m.content) for m in messages) // 4
+        self._output_tokens = len(text) // 4
+        self._tokens_used = self._input_tokens + self._output_tokens
@@ -0,0 +1,90 @@
+# gpt_agents_py | James Delancey | MIT License
+import hashlib
+import json
+import threading
+from typing import List, NamedTuple, Optional
+
+from gpt_agents_py.deadline import deadline_wait, interrupted_by_deadline
+from gpt_agents_py.gpt_agents import LLMCallerBase, LLMResponseText, Message
+from gpt_agents_py.metrics import LLM_COALESCED
+
+
+class _FlightResult(NamedTuple):
+    response_text: Optional[LLMResponseText]
+    tokens_used: Optional[int]
+    input_tokens: Optional[int]
+    output_tokens: Optional[int]
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Optional[_FlightResult] = None
+        self.error: Optional[BaseException] = None
+        self.interrupted = False  # The leader's own deadline or cancellation ended the flight
+
+
+def request_key(caller: LLMCallerBase, messages: List[Message]) -> str:
+    """
+    Canonical hash of everything that determines the upstream request: endpoint, model and the conversation.
+    """
+    canonical = json.dumps([caller.provider, caller.base_url, caller.model, [[m.role.value, m.content] for m in messages]], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SingleFlightLLMCaller(LLMCallerBase):
+    """
+    Wraps `inner` so that concurrent calls with an identical request share one upstream call.
+    The first caller (the leader) makes the request; callers arriving while it is in flight wait and receive the same
+    response, or the same exception. Followers report zero tokens, since they cost nothing upstream.
+    If the leader's run is interrupted (deadline, cancellation), its followers do not inherit that: they wait under
+    their own deadlines and then lead or join the next flight.
+    Only overlapping calls are merged; once a flight lands, the next identical call goes upstream again.
+    """
+
+    def __init__(self, inner: LLMCallerBase) -> None:
+        super().__init__()
+        self.inner = inner
+        self._inherit_settings(inner)
+        self._flights: dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def prepare_llm_response(self, messages: List[Message], api_key: str = "api_key") -> None:
+        key = request_key(self.inner, messages)
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if flight is None:
+                    flight = self._flights[key] = _Flight()
+            if leader:
+                self._lead(key, flight, messages)
+            else:
+                deadline_wait(flight.done)
+                if flight.interrupted:
+                    continue
+                LLM_COALESCED.inc(provider=self.provider, model=self.model)
+            break
+        if flight.error is not None:
+            raise flight.error
+        assert flight.result is not None
+        self._response_text = flight.result.response_text
+        if leader:
+            self._tokens_used = flight.result.tokens_used
+            self._input_tokens = flight.result.input_tokens
+            self._output_tokens = flight.result.output_tokens
+        else:
+            self._tokens_used = self._input_tokens = self._output_tokens = 0
+
+    def _lead(self, key: str, flight: _Flight, messages: List[Message]) -> None:
+        try:
+            self.inner._reset_response()
+            self.inner.prepare_llm_response(messages)
+            flight.result = _FlightResult(self.inner.get_llm_response(), self.inner.get_llm_tokens_used(), self.inner.get_llm_input_tokens(), self.inner.get_llm_output_tokens())
+        except BaseException as e:
+            flight.error = e
+            flight.interrupted = interrupted_by_deadline(e)
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
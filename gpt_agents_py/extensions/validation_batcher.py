@@ -0,0 +1,162 @@
+# gpt_agents_py | James Delancey | MIT License
+import json
+import logging
+import threading
+from typing import Optional
+
+from gpt_agents_py.deadline import deadline_wait, interrupted_by_deadline
+from gpt_agents_py.gpt_agents import (
+    LLMCallerBase,
+    Message,
+    MessageType,
+    Prompts,
+    RunContext,
+    RunCounters,
+    call_llm,
+    check_budget,
+    current_run_context,
+    extract_final_answer,
+    get_llm_caller,
+    get_prompts,
+    log_json,
+    use_run_context,
+    validation_verdict,
+)
+from gpt_agents_py.metrics import VALIDATION_BATCHES
+from gpt_agents_py.tokens import TokenUsage, UsageMeter, current_meters, isolated_usage
+
+
+class _PendingValidation:
+    def __init__(self, final_answer: str, expected_output: str) -> None:
+        self.final_answer = final_answer
+        self.expected_output = expected_output
+        self.done = threading.Event()
+        self.verdict: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self.meters = current_meters()  # Usage scopes of the waiting task, billed a share of the batched call
+        context = current_run_context()
+        self.counters = context.counters if context is not None else None  # ... and its run's counters
+        self.validate_singly = False  # Not answered by the batch, or the leader's run was interrupted
+
+
+class _Batch:
+    def __init__(self) -> None:
+        self.items: list[_PendingValidation] = []
+        self.full = threading.Event()
+
+
+def parse_batch_verdicts(text: str, n: int) -> dict[int, str]:
+    """
+    Parse the validator's Final Answer JSON into {item number: verdict}. Items that are missing or unparsable are left out.
+    """
+    answer = extract_final_answer(text) or ""
+    start, end = answer.find("{"), answer.rfind("}")
+    try:
+        data = json.loads(answer[start : end + 1]) if start != -1 and end > start else {}
+    except ValueError:
+        return {}
+    verdicts: dict[int, str] = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if str(key).strip().isdigit() and 1 <= int(key) <= n and isinstance(value, str):
+                verdicts[int(key)] = value.lower().strip()
+    return verdicts
+
+
+def _share_usage(usage: TokenUsage, run_tokens: int, items: list[_PendingValidation]) -> None:
+    # Each item gets an equal share of the tokens; a scope or run waiting on several items counts the call once
+    def share(total: int, i: int) -> int:
+        return total // len(items) + (1 if i < total % len(items) else 0)
+
+    shares: dict[UsageMeter, list[int]] = {}
+    runs: dict[RunCounters, int] = {}
+    for i, it in enumerate(items):
+        for meter in it.meters:
+            meter_share = shares.setdefault(meter, [0, 0, 0])
+            for j, total in enumerate((usage.input_tokens, usage.output_tokens, usage.total_tokens)):
+                meter_share[j] += share(total, i)
+        if it.counters is not None:
+            runs[it.counters] = runs.get(it.counters, 0) + share(run_tokens, i)
+    for meter, (input_tokens, output_tokens, total_tokens) in shares.items():
+        meter.add(input_tokens, output_tokens, total_tokens, usage.estimated_calls > 0)
+    for counters, tokens in runs.items():
+        counters.add(tokens)
+
+
+class ValidationBatcher:
+    """
+    Validation judge that merges validations arriving from concurrent tasks into one LLM call.
+    The first validation of a batch waits up to `window` seconds (less if `max_batch` items arrive) and then sends
+    every collected item in one numbered prompt (batch_validation_system_prompt, batch_validation_item_prompt).
+    Validations from any run share a batch if they use the same caller and equal prompts. Each run must be within its
+    budget to join. The batch is billed once to every waiting run's counters, and its tokens are split evenly between
+    the waiting tasks' runs and usage scopes.
+    Each verdict is routed back to its waiting task. Items the response does not answer, and all of them if the
+    leader's run is interrupted, are re-checked one at a time with validation_verdict on their own tasks' threads.
+    Install with set_validation_judge(ValidationBatcher()).
+    """
+
+    def __init__(self, window: float = 0.05, max_batch: int = 16) -> None:
+        self.window = window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._batches: dict[tuple[LLMCallerBase, Prompts], _Batch] = {}  # The keys keep the caller and prompts alive while a batch is open
+
+    def __call__(self, final_answer: str, expected_output: str) -> str:
+        check_budget()
+        item = _PendingValidation(final_answer, expected_output)
+        key = (get_llm_caller(), get_prompts())
+        with self._lock:
+            batch = self._batches.setdefault(key, _Batch())
+            batch.items.append(item)
+            leader = len(batch.items) == 1
+            if len(batch.items) >= self.max_batch:
+                del self._batches[key]
+                batch.full.set()
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._batches.get(key) is batch:
+                    del self._batches[key]
+            self._run(batch.items, *key)
+        else:
+            deadline_wait(item.done)
+        if item.validate_singly:
+            return validation_verdict(final_answer, expected_output)
+        if item.error is not None:
+            raise item.error
+        assert item.verdict is not None
+        return item.verdict
+
+    def _run(self, items: list[_PendingValidation], caller: LLMCallerBase, prompts: Prompts) -> None:
+        try:
+            if len(items) == 1:
+                items[0].validate_singly = True
+                return
+            VALIDATION_BATCHES.observe(len(items))
+            prompt = "".join(
+                prompts.batch_validation_item_prompt.format(number=i, final_answer=it.final_answer, expected_output=it.expected_output) for i, it in enumerate(items, start=1)
+            )
+            # The call is made on behalf of every waiting run: bill it to them below, not to the leader's run
+            counters = RunCounters()
+            batch_context = (current_run_context() or RunContext())._replace(llm_caller=caller, prompts=prompts, counters=counters, max_llm_calls=None, max_tokens=None)
+            with use_run_context(batch_context), isolated_usage() as batch_usage:
+                response = call_llm([Message(role=MessageType.SYSTEM, content=prompts.batch_validation_system_prompt), Message(role=MessageType.USER, content=prompt)])
+            _share_usage(batch_usage.usage(), counters.tokens, items)
+            verdicts = parse_batch_verdicts(str(response), len(items))
+            if len(verdicts) < len(items):
+                log_json(logging.WARNING, "Batched validation response incomplete, validating the rest singly:", {"items": len(items), "parsed": len(verdicts)})
+            for i, it in enumerate(items, start=1):
+                if i in verdicts:
+                    it.verdict = verdicts[i]
+                else:
+                    it.validate_singly = True
+        except BaseException as e:
+            interrupted = interrupted_by_deadline(e)
+            for it in items:
+                if it.verdict is None and not it.validate_singly:
+                    it.error = e
+                    it.validate_singly = interrupted
+        finally:
+            for it in items:
+                it.done.set()
@@ -0,0 +1,386 @@
+# gpt_agents_py | James Delancey | MIT License
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, NamedTuple, Optional, Union
+
+from gpt_agents_py.batch import (
+    LLM_PROVIDERS,
+    conclusion_to_dict,
+    fill_organization,
+    load_organization,
+    make_llm_caller,
+    organization_from_dict,
+)
+from gpt_agents_py.deadline import Deadline, RunInterrupted, deadline_scope
+from gpt_agents_py.gpt_agents import (
+    AgentConclusion,
+    Organization,
+    TaskConclusion,
+    agent_executor,
+    log_json,
+    organization_executor,
+    set_llm_caller,
+    upstream_conclusions,
+)
+from gpt_agents_py.rate_limit import SQLiteRateLimiter
+
+JOB_KINDS = ("organization", "agent", "task")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, lease_expires, id);
+"""
+
+
+class Job(NamedTuple):
+    id: int
+    kind: str
+    payload: dict[str, Any]
+    attempts: int
+    max_attempts: int
+    lease_owner: str
+
+
+class WorkQueue:
+    """
+    Durable job queue in a single SQLite file, shared by every worker process that opens the same path.
+    Jobs are claimed with a time-limited lease that the worker extends by heartbeating; a job whose lease expires
+    (crashed or stuck worker) is handed to the next claimant until max_attempts is exhausted.
+    WAL mode needs all processes on one host; for a database on a network filesystem, open it with wal=False.
+    """
+
+    def __init__(self, path: str, wal: bool = True, busy_timeout: float = 30.0) -> None:
+        self.path = path
+        self.wal = wal
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread: a heartbeat thread must not share the worker thread's connection
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            if self.wal:
+                conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def enqueue(self, kind: str, payload: dict[str, Any], max_attempts: int = 3) -> int:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind {kind!r}; expected one of {JOB_KINDS}")
+        now = time.time()
+        cur = self._conn().execute(
+            "INSERT INTO jobs (kind, payload, max_attempts, created, updated) VALUES (?, ?, ?, ?, ?)",
+            (kind, json.dumps(payload), max_attempts, now, now),
+        )
+        return int(cur.lastrowid or 0)
+
+    def enqueue_organization(self, organization: Union[str, dict[str, Any]], params: Optional[dict[str, Any]] = None, max_attempts: int = 3) -> int:
+        """
+        `organization` is a "module:attribute" reference, a .json definition path, or an inline definition dict.
+        """
+        return self.enqueue("organization", {"organization": organization, "params": params or {}}, max_attempts)
+
+    def claim(self, owner: str, lease_seconds: float = 60.0) -> Optional[Job]:
+        """
+        Atomically claim the oldest queued job, or one whose lease has expired. Returns None if nothing is claimable.
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            while True:
+                row = conn.execute(
+                    "SELECT id, kind, payload, attempts, max_attempts, status FROM jobs "
+                    "WHERE status = 'queued' OR (status = 'running' AND lease_expires < ?) ORDER BY id LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                job_id, kind, payload, attempts, max_attempts, status = row
+                if status == "running" and attempts >= max_attempts:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'failed', error = COALESCE(error, 'lease expired'), lease_owner = NULL, updated = ? WHERE id = ?",
+                        (now, job_id),
+                    )
+                    continue
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_owner = ?, lease_expires = ?, updated = ? WHERE id = ?",
+                    (owner, now + lease_seconds, now, job_id),
+                )
+                conn.execute("COMMIT")
+                return Job(id=job_id, kind=kind, payload=json.loads(payload), attempts=attempts + 1, max_attempts=max_attempts, lease_owner=owner)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def heartbeat(self, job: Job, lease_seconds: float = 60.0) -> bool:
+        """
+        Extend the lease. Returns False if the job is no longer owned by this worker (lease expired and was reclaimed).
+        """
+        now = time.time()
+        cur = self._conn().execute(
+            "UPDATE jobs SET lease_expires = ?, updated = ? WHERE id = ? AND lease_owner = ? AND status = 'running'",
+            (now + lease_seconds, now, job.id, job.lease_owner),
+        )
+        return cur.rowcount == 1
+
+    def complete(self, job: Job, result: Any) -> bool:
+        now = time.time()
+        cur = self._conn().execute(
+            "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_owner = NULL, lease_expires = NULL, updated = ? WHERE id = ? AND lease_owner = ?",
+            (json.dumps(result, default=str), now, job.id, job.lease_owner),
+        )
+        return cur.rowcount == 1
+
+    def fail(self, job: Job, error: str) -> bool:
+        """
+        Record a failed attempt: the job is re-queued until it has used max_attempts, then marked failed.
+        """
+        now = time.time()
+        status = "queued" if job.attempts < job.max_attempts else "failed"
+        cur = self._conn().execute(
+            "UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, lease_expires = NULL, updated = ? WHERE id = ? AND lease_owner = ?",
+            (status, error, now, job.id, job.lease_owner),
+        )
+        return cur.rowcount == 1
+
+    def get(self, job_id: int) -> Optional[dict[str, Any]]:
+        row = self._conn().execute("SELECT id, kind, status, attempts, result, error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "kind": row[1], "status": row[2], "attempts": row[3], "result": json.loads(row[4]) if row[4] else None, "error": row[5]}
+
+    def counts(self) -> dict[str, int]:
+        return {status: n for status, n in self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")}
+
+    def pending(self) -> int:
+        now = time.time()
+        row = self._conn().execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued' OR (status = 'running' AND lease_expires < ?)", (now,)).fetchone()
+        return int(row[0])
+
+
+def _resolve_organization(spec: Union[str, dict[str, Any]], params: dict[str, Any]) -> Organization:
+    org = organization_from_dict(spec) if isinstance(spec, dict) else load_organization(spec)
+    return fill_organization(org, params)
+
+
+def _context_conclusions(payload: dict[str, Any], org: Organization) -> list[AgentConclusion]:
+    # Upstream task conclusions are shipped as plain dicts; wrap them the way agent_executor expects
+    task_conclusions = [TaskConclusion(input=tc["input"], output=tc["output"]) for tc in payload.get("context", [])]
+    if not task_conclusions:
+        return []
+    return [AgentConclusion(agent=org.agents[0], input="", output="", task_conclusions=task_conclusions)]
+
+
+def execute_job(job: Job) -> Any:
+    """
+    Run one job and return its JSON-serializable result.
+    - organization: {"organization", "params"} -> conclusion_to_dict(OrganizationConclusion)
+    - agent: {"organization", "params", "agent_index", "context": [{"input", "output"}, ...]} -> AgentConclusion as a dict
+    - task: same as agent plus "task_index" -> the TaskConclusion as a dict (no agent summary)
+    """
+    payload = job.payload
+    org = _resolve_organization(payload["organization"], payload.get("params", {}))
+    if job.kind == "organization":
+        return conclusion_to_dict(organization_executor(org))
+    agent = org.agents[payload["agent_index"]]
+    if job.kind == "task":
+        agent = agent._replace(tasks=[agent.tasks[payload["task_index"]]], disable_summary=True)
+    context = _context_conclusions(payload, org)
+    conclusion = agent_executor(agent=agent, agent_conclusions=context)
+    # agent_executor drops duplicate context entries, so the agent's own conclusions start after the distinct ones
+    tcs = [{"input": tc.input, "output": tc.output} for tc in conclusion.task_conclusions[len(upstream_conclusions(context)) :]]
+    if job.kind == "task":
+        return tcs[-1]
+    return {"role": agent.role, "output": conclusion.output, "task_conclusions": tcs}
+
+
+class Worker:
+    """
+    Claims and executes jobs until stopped. A background thread heartbeats the lease of the running job every lease_seconds / 3;
+    if the lease is lost, it cancels the job through its Deadline so it does not keep running next to the new owner's.
+    """
+
+    def __init__(self, queue: WorkQueue, worker_id: Optional[str] = None, lease_seconds: float = 60.0, poll_interval: float = 1.0) -> None:
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _heartbeat_loop(self, job: Job, done: threading.Event, deadline: Deadline) -> None:
+        try:
+            while not done.wait(self.lease_seconds / 3):
+                if not self.queue.heartbeat(job, self.lease_seconds):
+                    log_json(logging.WARNING, "Work queue lease lost, stopping the job:", {"job": job.id, "worker": self.worker_id})
+                    deadline.cancel()
+                    return
+        finally:
+            self.queue.close()
+
+    def run_one(self) -> Optional[bool]:
+        """
+        Claim and execute a single job. Returns None if the queue had nothing claimable, else whether the job succeeded.
+        """
+        job = self.queue.claim(self.worker_id, self.lease_seconds)
+        if job is None:
+            return None
+        done = threading.Event()
+        deadline = Deadline()
+        heartbeat = threading.Thread(target=self._heartbeat_loop, args=(job, done, deadline), name=f"heartbeat-{job.id}", daemon=True)
+        heartbeat.start()
+        try:
+            with deadline_scope(deadline):
+                result = execute_job(job)
+        except Exception as e:
+            log_json(logging.WARNING, "Work queue job failed:", {"job": job.id, "attempt": job.attempts, "error": str(e)})
+            self.queue.fail(job, f"{type(e).__name__}: {e}")
+            return False
+        except RunInterrupted:
+            if not deadline.cancelled:
+                raise
+            log_json(logging.WARNING, "Work queue job stopped, lease was lost:", {"job": job.id, "worker": self.worker_id})
+            return False
+        finally:
+            done.set()
+        if not self.queue.complete(job, result):
+            log_json(logging.WARNING, "Work queue result discarded, lease was lost:", {"job": job.id, "worker": self.worker_id})
+            return False
+        return True
+
+    def run(self, max_jobs: Optional[int] = None, stop_when_empty: bool = False) -> int:
+        """
+        Process jobs until stop(), max_jobs is reached, or (with stop_when_empty) nothing is claimable. Returns jobs processed.
+        """
+        processed = 0
+        while not self._stop.is_set() and (max_jobs is None or processed < max_jobs):
+            outcome = self.run_one()
+            if outcome is None:
+                if stop_when_empty:
+                    break
+                self._stop.wait(self.poll_interval)
+                continue
+            processed += 1
+        return processed
+
+
+class WorkerConfig(NamedTuple):
+    provider: str = "openai"
+    base_url: Optional[str] = None
+    model: Optional[str] = None
+    lease_seconds: float = 60.0
+    stop_when_empty: bool = True
+    log_level: str = "WARNING"
+    wal: bool = True
+    rate_limit_db: Optional[str] = None  # SQLite file of a SQLiteRateLimiter shared by every worker on the host
+    rpm: Optional[int] = None
+    tpm: Optional[int] = None
+
+
+def _worker_process(path: str, config: WorkerConfig) -> None:
+    logging.getLogger().setLevel(config.log_level)
+    limiter = SQLiteRateLimiter(config.rate_limit_db, rpm=config.rpm, tpm=config.tpm) if config.rate_limit_db else None
+    set_llm_caller(make_llm_caller(config.provider, config.base_url, config.model, rate_limiter=limiter))
+    Worker(WorkQueue(path, wal=config.wal), lease_seconds=config.lease_seconds).run(stop_when_empty=config.stop_when_empty)
+
+
+def launch_workers(path: str, processes: int, config: WorkerConfig = WorkerConfig()) -> list[multiprocessing.process.BaseProcess]:
+    """
+    Start `processes` worker processes (spawn start method) on the queue at `path` and return them; join() to wait.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    procs: list[multiprocessing.process.BaseProcess] = []
+    for i in range(processes):
+        p = ctx.Process(target=_worker_process, args=(path, config), name=f"gpt-agents-worker-{i}")
+        p.start()
+        procs.append(p)
+    return procs
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="SQLite-backed work queue for organization, agent and task jobs.")
+    parser.add_argument("--db", required=True, help="Path of the SQLite queue file.")
+    parser.add_argument("--no-wal", action="store_true", help="Use a rollback journal, for a queue file on a network filesystem.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    enq = sub.add_parser("enqueue", help="Enqueue one organization job per JSONL parameter row.")
+    enq.add_argument("organization", help="A .json definition or 'module:attribute' reference.")
+    enq.add_argument("--input", "-i", default="-", help="JSONL parameter rows ('-' for stdin).")
+    enq.add_argument("--max-attempts", type=int, default=3)
+    for name in ("work", "launch"):
+        p = sub.add_parser(name, help="Run a worker in this process." if name == "work" else "Start several local worker processes.")
+        p.add_argument("--provider", choices=LLM_PROVIDERS, default="openai")
+        p.add_argument("--base-url", default=None)
+        p.add_argument("--model", default=None)
+        p.add_argument("--lease-seconds", type=float, default=60.0)
+        p.add_argument("--stop-when-empty", action="store_true")
+        p.add_argument("--log-level", default="WARNING")
+        p.add_argument("--rate-limit-db", default=None, help="SQLite file for a rate limit shared by all workers on this host.")
+        p.add_argument("--rpm", type=int, default=None, help="Requests per minute per API key (with --rate-limit-db).")
+        p.add_argument("--tpm", type=int, default=None, help="Tokens per minute per API key (with --rate-limit-db).")
+        if name == "launch":
+            p.add_argument("--workers", "-w", type=int, default=os.cpu_count() or 2)
+    sub.add_parser("status", help="Print job counts by status.")
+    args = parser.parse_args(argv)
+
+    queue = WorkQueue(args.db, wal=not args.no_wal)
+    if args.command == "enqueue":
+        fin = sys.stdin if args.input == "-" else open(args.input, "r")
+        n = 0
+        try:
+            for line in fin:
+                if line.strip():
+                    queue.enqueue_organization(args.organization, json.loads(line), args.max_attempts)
+                    n += 1
+        finally:
+            if fin is not sys.stdin:
+                fin.close()
+        print(f"Enqueued {n} jobs", file=sys.stderr)
+    elif args.command in ("work", "launch"):
+        config = WorkerConfig(
+            args.provider, args.base_url, args.model, args.lease_seconds, args.stop_when_empty, args.log_level.upper(), not args.no_wal, args.rate_limit_db, args.rpm, args.tpm
+        )
+        if args.command == "work":
+            _worker_process(args.db, config)
+        else:
+            for proc in launch_workers(args.db, args.workers, config):
+                proc.join()
+    print(json.dumps(queue.counts()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,76 @@
 # gpt_agents_py | James Delancey | MIT License
+import collections
+import contextlib
+import contextvars
+import copy
+import itertools
 import json
 import logging
 import os
 import re
+import threading
 import time
 import traceback
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from enum import Enum
-from typing import Callable, List, NamedTuple, NewType, Optional, Set
+from typing import (
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    NewType,
+    Optional,
+    Sequence,
+    Set,
+    overload,
+)
+
+from gpt_agents_py.bm25 import BM25Index
+from gpt_agents_py.conversation import Conversation, Interner
+from gpt_agents_py.deadline import (
+    BudgetExceeded,
+    Deadline,
+    RunInterrupted,
+    check_deadline,
+    current_deadline,
+    deadline_scope,
+    deadline_sleep,
+    deadline_timeout,
+    run_within_deadline,
+)
+from gpt_agents_py.metrics import (
+    ACTION_REPEATS,
+    EXECUTOR_RETRIES,
+    HUMAN_INPUT_WAIT,
+    HUMAN_INPUTS,
+    LLM_CALLS,
+    LLM_LATENCY,
+    LLM_RETRIES,
+    LLM_TOKENS,
+    LOOP_FORCED_ANSWERS,
+    PROMPT_OVERFLOWS,
+    RUN_INTERRUPTIONS,
+    SPECULATIONS,
+    SPECULATIVE_WASTED_CALLS,
+    TOOL_CACHE_HITS,
+    TOOL_CALLS,
+    TOOL_LATENCY,
+    TOOL_SELECTION_FALLBACKS,
+    VALIDATIONS,
+)
+from gpt_agents_py.rate_limit import RateLimiter
+from gpt_agents_py.tokens import (
+    MESSAGE_OVERHEAD,
+    PROMPT_OVERHEAD,
+    TokenUsage,
+    UsageMeter,
+    estimate_prompt_tokens,
+    estimate_tokens,
+    record_usage,
+    usage_scope,
+)
+from gpt_agents_py.tracing import span, traced
 
 
 class Prompts(NamedTuple):
@@ -20,6 +84,8 @@ class Prompts(NamedTuple):
     tool_no_output_prompt: str
     validation_system_prompt: str
     validation_user_prompt: str
+    batch_validation_system_prompt: str
+    batch_validation_item_prompt: str
     validation_retry_prompt: str
     instruction_prompt: str
     current_task_prompt: str
@@ -33,6 +99,11 @@ class Prompts(NamedTuple):
     force_final_answer_prompt: str
     retry_failed_validation_prompt_2: str
     summary_task_description_prompt: str
+    summary_single_shot_prompt: str
+    summary_incremental_prompt: str
+    repeated_action_prompt: str
+    oscillating_actions_prompt: str
+    context_trimmed_prompt: str
 
 
 logging.basicConfig(level=logging.INFO, format="[%(levelname).1s%(asctime)s %(filename)s:%(lineno)d] %(message)s", datefmt="%m%d %H:%M:%S")
@@ -42,7 +113,10 @@ def log_json(level: int, msg: str, obj: object) -> None:
     """
     Log a JSON object at the given level with pretty printing and newlines rendered.
     If the object is a NamedTuple, convert it to a dict. If not JSON serializable, use type name as placeholder.
+    Serialization is skipped entirely when the level is disabled.
     """
+    if not logging.getLogger().isEnabledFor(level):
+        return
 
     def convert(o: object) -> object:
         # Recursively convert NamedTuples to dicts
@@ -85,23 +159,26 @@ def set_debug_mode(enabled: bool) -> None:
 
 def get_debug_mode() -> bool:
     """
-    Get the current value of the global DEBUG_MODE flag.
+    Get the current value of the DEBUG_MODE flag, overridden by the active RunContext if it sets one.
     """
-    return DEBUG_MODE
+    context = _RUN_CONTEXT.get()
+    return context.debug_mode if context is not None and context.debug_mode is not None else DEBUG_MODE
 
 
 def get_trace_llm() -> bool:
     """
-    Get the current value of the global TRACE_LLM flag.
+    Get the current value of the TRACE_LLM flag, overridden by the active RunContext if it sets one.
     """
-    return TRACE_LLM
+    context = _RUN_CONTEXT.get()
+    return context.trace_llm if context is not None and context.trace_llm is not None else TRACE_LLM
 
 
 def get_trace_llm_filename() -> str:
     """
-    Get the current value of the global TRACE_LLM_FILENAME.
+    Get the current value of TRACE_LLM_FILENAME, overridden by the active RunContext if it sets one.
     """
-    return TRACE_LLM_FILENAME
+    context = _RUN_CONTEXT.get()
+    return context.trace_llm_filename if context is not None and context.trace_llm_filename is not None else TRACE_LLM_FILENAME
 
 
 def set_trace_mode(enabled: bool, filename: str = "file.txt") -> None:
@@ -119,7 +196,7 @@ def debug_step(msg: str | None = None) -> None:
     """
     If DEBUG_MODE is enabled, print a debug message and wait for user input to continue.
     """
-    if DEBUG_MODE:
+    if get_debug_mode():
         if msg:
             print(f"[DEBUG STEP] {msg}")
         else:
@@ -145,9 +222,18 @@ def extract_final_answer(text: str) -> Optional[str]:
     return text
 
 
-TOTAL_TOKENS = 0  # Global variable to track total tokens from OpenAI response
+TOTAL_TOKENS = 0  # Global variable to track total tokens reported by the LLM provider across all calls
+_TOTAL_TOKENS_LOCK = threading.Lock()
 MODEL = "gpt-3.5-turbo"  # OpenAI model to use
 
+
+def get_total_tokens() -> int:
+    """
+    Get the total number of tokens reported by LLM callers since process start.
+    """
+    return TOTAL_TOKENS
+
+
 # String templates for agent prompts
 PROMPTS = Prompts(
     role_playing_template="""
@@ -254,6 +340,25 @@ Expected description:
 {expected_output}
 
 Does the output fulfill the expected description, with no missing or extra information? Think step by step, but reply ONLY with a Final Answer of 'yes' or 'no' as instructed above.
+""",
+    batch_validation_system_prompt="""
+You are a careful, critical validator. You will receive several numbered items, each an output with its expected description.
+For each item, check whether the output fulfills the expected description exactly and directly—no assumptions, no extra reasoning.
+
+Respond ONLY with:
+---
+Thought: <short reasoning>
+Final Answer: {"1": "yes", "2": "no"}
+---
+The Final Answer is a single-line JSON object with one "yes" or "no" for every item number.
+""",
+    batch_validation_item_prompt="""
+Item {number}
+Output to check:
+{final_answer}
+
+Expected description:
+{expected_output}
 """,
     validation_retry_prompt="""
 ---
@@ -313,23 +418,67 @@ Read the feedback below and try again, giving a Final Answer that directly fulfi
 {exception}
 """,
     summary_task_description_prompt="Use the following information to achieve the agent's goal ({goal})",
+    summary_single_shot_prompt="""
+Combine the results below into one final answer that achieves this goal: {goal}
+
+Results:
+{results}
+""",
+    summary_incremental_prompt="""
+Update the running summary with the result of the task that just finished. Keep everything needed to achieve this goal: {goal}
+
+Running summary:
+{summary}
+
+New result:
+{result}
+
+Give the updated summary as your Final Answer.
+""",
+    repeated_action_prompt="""
+IMPORTANT: You already used {action} with exactly this Action Input, and the Observation above is what it returned. Repeating it will not give you anything new.
+Use a different tool or input, or give your Final Answer based on what you already know.
+""",
+    oscillating_actions_prompt="""
+IMPORTANT: You are going in circles, repeating the same sequence of actions ({actions}) and getting the same Observations.
+Stop repeating them. Use what you have already learned to give your Final Answer, or try something genuinely different.
+""",
+    context_trimmed_prompt="[{count} earlier messages of this conversation were left out to fit the context window.]",
 )
 
 
-def set_prompt_value(key: str, new_value: str) -> None:
-    global PROMPTS
+def replace_prompt(prompts: Prompts, key: str, new_value: str) -> Prompts:
+    """
+    Return a copy of `prompts` with one template replaced, after checking that the placeholders are unchanged.
+    """
 
     def _extract_placeholders(template: str) -> Set[str]:
         return set(re.findall(r"\{(\w+)\}", template or ""))
 
-    if not hasattr(PROMPTS, key):
+    if not hasattr(prompts, key):
         raise KeyError(f"PROMPTS has no key '{key}'")
-    old_value = getattr(PROMPTS, key)
+    old_value = getattr(prompts, key)
     old_placeholders = _extract_placeholders(old_value)
     new_placeholders = _extract_placeholders(new_value)
     if old_placeholders != new_placeholders:
         raise ValueError(f"Placeholder mismatch for '{key}'. Existing placeholders: {sorted(old_placeholders)}, new placeholders: {sorted(new_placeholders)}")
-    PROMPTS = PROMPTS._replace(**{key: new_value})
+    return prompts._replace(**{key: new_value})
+
+
+def set_prompt_value(key: str, new_value: str) -> None:
+    """
+    Replace a template in the process-wide default PROMPTS. A RunContext with its own prompts is not affected.
+    """
+    global PROMPTS
+    PROMPTS = replace_prompt(PROMPTS, key, new_value)
+
+
+def get_prompts() -> Prompts:
+    """
+    The prompts for the current run: the active RunContext's, or the process-wide PROMPTS.
+    """
+    context = _RUN_CONTEXT.get()
+    return context.prompts if context is not None and context.prompts is not None else PROMPTS
 
 
 class MessageType(Enum):
@@ -362,6 +511,93 @@ class Tool(NamedTuple):
     description: str
     args_schema: str
     func: Callable[[dict[str, str]], str]
+    version: str = ""  # Bump when the tool's behaviour changes, so memoized conclusions that used it no longer match
+    idempotent: bool = True  # If False, a repeated identical call runs the tool again instead of reusing its earlier observation
+
+
+class ToolRegistry(Sequence[Tool]):
+    """
+    An agent's tools, indexed by name for O(1) lookup and by BM25 over names and descriptions (built on first search).
+    As a sequence it holds the tools offered in the current prompt: all of them, or after select() the `max_tools`
+    most relevant to a task. get() still finds every tool in `catalog`, so a model naming an unlisted tool is served.
+    """
+
+    def __init__(self, tools: Sequence[Tool], max_tools: Optional[int] = None) -> None:
+        self.catalog = list(tools)
+        self.max_tools = max_tools
+        self._by_name = {t.name: t for t in self.catalog}
+        self._index: Optional[BM25Index[Tool]] = None
+        self._offered = self.catalog
+        self._offered_names = frozenset(self._by_name)
+
+    def __len__(self) -> int:
+        return len(self._offered)
+
+    @overload
+    def __getitem__(self, index: int) -> Tool:
+        pass
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Tool]:
+        pass
+
+    def __getitem__(self, index: int | slice) -> Tool | list[Tool]:
+        return self._offered[index]
+
+    def __iter__(self) -> Iterator[Tool]:
+        return iter(self._offered)
+
+    def get(self, name: str) -> Optional[Tool]:
+        return self._by_name.get(name)
+
+    def offers(self, name: str) -> bool:
+        return name in self._offered_names
+
+    def search(self, query: str, k: int) -> list[Tool]:
+        """
+        Up to `k` tools of the catalog ranked by BM25 relevance to `query`.
+        """
+        if self._index is None:
+            index: BM25Index[Tool] = BM25Index()
+            for t in self.catalog:
+                index.add(t, f"{t.name} {t.description}")
+            self._index = index
+        return self._index.top_k(query, k)
+
+    def select(self, query: str) -> "ToolRegistry":
+        """
+        A view offering the `max_tools` tools most relevant to `query`, padded in catalog order if fewer match.
+        Returns self when there is no limit or the catalog already fits.
+        """
+        if self.max_tools is None or len(self.catalog) <= self.max_tools:
+            return self
+        offered = self.search(query, self.max_tools)
+        names = {t.name for t in offered}
+        offered.extend(t for t in self.catalog if t.name not in names)
+        view = copy.copy(self)
+        view._offered = offered[: self.max_tools]
+        view._offered_names = frozenset(t.name for t in view._offered)
+        return view
+
+    def suggest(self, action: str) -> list[Tool]:
+        """
+        The tools to list when the model names one that does not exist: the offered ones plus, for a limited
+        registry, the catalog's best matches for the requested name (up to `max_tools` more).
+        """
+        if self.max_tools is None or len(self.catalog) <= len(self._offered):
+            return list(self._offered)
+        return list(self._offered) + [t for t in self.search(action, self.max_tools + len(self._offered)) if t.name not in self._offered_names][: self.max_tools]
+
+
+def tools_system_prompt(prompts: Prompts, tools: Sequence[Tool]) -> str:
+    """
+    The system prompt for a task offered `tools`: tools_template listing them, or no_tools_template without any.
+    """
+    if not tools:
+        return prompts.no_tools_template
+    tool_descriptions = "\n".join(f"- {t.name}: {t.description} (args: {t.args_schema})" for t in tools)
+    tool_names = ", ".join(t.name for t in tools)
+    return prompts.tools_template.format(tools=tool_descriptions, tool_names=tool_names)
 
 
 class Agent(NamedTuple):
@@ -372,6 +608,11 @@ class Agent(NamedTuple):
     tools: List[Tool]
     disable_validation: bool = False  # If True, disables validation step for this agent
     disable_summary: bool = False  # If True, disables summary step for this agent
+    summary_mode: str = "task"  # One of SUMMARY_MODES; ignored when disable_summary is set
+    speculative: bool = False  # If True, start each next task while the previous answer is still being validated
+    max_tools: Optional[int] = None  # If set, each task's prompt lists only this many tools, the most relevant to the task (see ToolRegistry)
+    context_k: Optional[int] = 8  # Earlier conclusions retrieved into each task's prompt and the "task" summary (see ConclusionIndex); None pastes all of them
+    context_tokens: int = 4000  # Estimated token budget for the retrieved conclusions
 
 
 class Organization(NamedTuple):
@@ -386,6 +627,7 @@ class ToolConclusion(NamedTuple):
 class TaskConclusion(NamedTuple):
     input: str
     output: str
+    usage: TokenUsage = TokenUsage()  # LLM calls made for this task, including retries and validations; empty for cached conclusions
 
 
 class ValidationConclusion(NamedTuple):
@@ -409,43 +651,147 @@ class AgentConclusion(NamedTuple):
     input: str
     output: str
     task_conclusions: list[TaskConclusion]
+    usage: TokenUsage = TokenUsage()  # Every LLM call made for this agent, summaries included
+
+
+class TaskHistory(NamedTuple):
+    agent: str  # Agent role
+    task: str  # Task name
+    messages: Sequence[Message]  # The conversation the task's final attempt ended with
 
 
 class OrganizationConclusion(NamedTuple):
     final_conclusion: TaskConclusion
     agent_conclusions: list[AgentConclusion]
     context: list[Message]
+    interrupted: Optional[str] = None  # "deadline" or "cancelled" when the run stopped early with a partial result
+    histories: tuple[TaskHistory, ...] = ()  # Conversation of every task that ran, in completion order
+    usage: TokenUsage = TokenUsage()  # Every LLM call made by the run
 
 
 LLMResponseText = NewType("LLMResponseText", str)
 
 
+class _LLMCallerState(threading.local):
+    # Per-thread response slots so one caller instance can serve concurrent runs
+    response_text: Optional[LLMResponseText] = None
+    tokens_used: Optional[int] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+
+
 class LLMCallerBase:
     """
     Base class for LLM API callers. Prepares, executes, and tracks LLM responses and token usage.
     Includes retry and error handling logic.
+    Response and token slots are thread-local, so a single caller can be shared by concurrent runs.
     """
 
-    def __init__(self) -> None:
-        self._response_text: Optional[LLMResponseText] = None
-        self._tokens_used: Optional[int] = None
+    provider = "openai"  # Label used for metrics
+    model = MODEL
+    base_url = "https://api.openai.com"  # Scheme and host; the caller appends the API path (e.g. /v1/chat/completions)
+    timeout = 30.0  # Seconds per HTTP attempt
+    api_key_value: Optional[str] = None  # Literal key that bypasses api_key.json, e.g. for a local mock server
+    rate_limiter: Optional[RateLimiter] = None  # Shared request/token limiter, keyed by the api_key name
+    max_prompt_tokens: Optional[int] = None  # Prompts estimated above this are trimmed or rejected before sending (see fit_prompt)
+    prompt_overflow = "trim"  # Or "reject"
+
+    def __init__(self, base_url: Optional[str] = None, model: Optional[str] = None, api_key_value: Optional[str] = None) -> None:
+        self._state = _LLMCallerState()
+        if base_url is not None:
+            self.base_url = base_url.rstrip("/")
+        if model is not None:
+            self.model = model
+        if api_key_value is not None:
+            self.api_key_value = api_key_value
+
+    def _inherit_settings(self, inner: "LLMCallerBase") -> None:
+        """
+        For callers that wrap `inner`: take over its metric labels, endpoint and prompt limits, as set at wrapping time.
+        """
+        self.provider = inner.provider
+        self.model = inner.model
+        self.base_url = inner.base_url
+        self.max_prompt_tokens = inner.max_prompt_tokens
+        self.prompt_overflow = inner.prompt_overflow
+
+    def _caller_state(self) -> _LLMCallerState:
+        # Subclasses may skip super().__init__(), so create the state lazily
+        if "_state" not in self.__dict__:
+            self.__dict__.setdefault("_state", _LLMCallerState())
+        state: _LLMCallerState = self.__dict__["_state"]
+        return state
+
+    @property
+    def _response_text(self) -> Optional[LLMResponseText]:
+        return self._caller_state().response_text
+
+    @_response_text.setter
+    def _response_text(self, value: Optional[LLMResponseText]) -> None:
+        self._caller_state().response_text = value
+
+    @property
+    def _tokens_used(self) -> Optional[int]:
+        return self._caller_state().tokens_used
+
+    @_tokens_used.setter
+    def _tokens_used(self, value: Optional[int]) -> None:
+        self._caller_state().tokens_used = value
+
+    @property
+    def _input_tokens(self) -> Optional[int]:
+        return self._caller_state().input_tokens
+
+    @_input_tokens.setter
+    def _input_tokens(self, value: Optional[int]) -> None:
+        self._caller_state().input_tokens = value
+
+    @property
+    def _output_tokens(self) -> Optional[int]:
+        return self._caller_state().output_tokens
+
+    @_output_tokens.setter
+    def _output_tokens(self, value: Optional[int]) -> None:
+        self._caller_state().output_tokens = value
+
+    def _acquire_rate_limit(self, api_key: str) -> None:
+        if self.rate_limiter is None:
+            return
+        waited = self.rate_limiter.acquire(api_key)
+        if waited:
+            log_json(logging.INFO, "LLM rate limit reached, waited:", {"key": api_key, "seconds": round(waited, 3)})
+            check_deadline()
+
+    def _record_rate_limit_tokens(self, api_key: str) -> None:
+        if self.rate_limiter is not None and self._tokens_used:
+            self.rate_limiter.record_tokens(api_key, self._tokens_used)
+
+    def _reset_response(self) -> None:
+        state = self._caller_state()
+        state.response_text = None
+        state.tokens_used = None
+        state.input_tokens = None
+        state.output_tokens = None
 
     def prepare_llm_response(self, messages: list["Message"], api_key: str = "api_key") -> None:
         import urllib.error
         import urllib.request
 
-        url = "https://api.openai.com/v1/chat/completions"
-        model = "gpt-3.5-turbo"
+        url = f"{self.base_url}/v1/chat/completions"
+        model = self.model
         payload = {"model": model, "messages": [{"role": m.role.value, "content": m.content} for m in messages]}
-        key = load_api_keys()[api_key]
+        key = self.api_key_value or load_api_keys()[api_key]
         headers = {"Content-Type": "application/json", "Authorization": f"Bearer {key}"}
         log_json(logging.INFO, "LLM Payload:", payload)
         data = json.dumps(payload).encode("utf-8")
         req = urllib.request.Request(url, data=data, headers=headers, method="POST")
         retries = 5
         for attempt in range(retries):
+            if attempt:
+                LLM_RETRIES.inc(provider=self.provider, model=model)
+            self._acquire_rate_limit(api_key)
             try:
-                with urllib.request.urlopen(req, timeout=30) as resp:
+                with urllib.request.urlopen(req, timeout=deadline_timeout(self.timeout)) as resp:
                     resp_data = resp.read().decode("utf-8")
                     resp_json = json.loads(resp_data)
                     log_json(logging.DEBUG, "LLM Raw Response:", resp_json)
@@ -456,6 +802,9 @@ class LLMCallerBase:
                     assert isinstance(total_tokens, int), "OpenAI response total_tokens is not an int"
                     self._response_text = LLMResponseText(content)
                     self._tokens_used = total_tokens
+                    self._input_tokens = resp_json["usage"].get("prompt_tokens")
+                    self._output_tokens = resp_json["usage"].get("completion_tokens")
+                    self._record_rate_limit_tokens(api_key)
                     if get_trace_llm():
                         try:
                             with open(get_trace_llm_filename(), "a") as f:
@@ -477,10 +826,12 @@ class LLMCallerBase:
                     log_json(logging.ERROR, "LLM HTTPError:", {"status": e.code, "reason": e.reason, "error": error_json})
                 except Exception:
                     log_json(logging.ERROR, "LLM HTTPError (unparsable JSON):", {"status": e.code, "reason": e.reason, "error": error_content})
-            except TimeoutError as e:
+                if attempt < retries - 1:
+                    deadline_sleep(http_retry_delay(e, attempt))
+            except (TimeoutError, ConnectionError, urllib.error.URLError) as e:
                 log_json(logging.ERROR, "LLM recoverable network error:", {"type": type(e).__name__, "message": str(e)})
                 if attempt < retries - 1:
-                    time.sleep(1)
+                    deadline_sleep(1)
                     continue
                 raise Exception(f"Network error after retries: {e}")
             except Exception as e:
@@ -494,6 +845,27 @@ class LLMCallerBase:
     def get_llm_tokens_used(self) -> Optional[int]:
         return self._tokens_used
 
+    def get_llm_input_tokens(self) -> Optional[int]:
+        return self._input_tokens
+
+    def get_llm_output_tokens(self) -> Optional[int]:
+        return self._output_tokens
+
+
+def http_retry_delay(error: Exception, attempt: int, max_delay: float = 30.0) -> float:
+    """
+    Seconds to wait before retrying a failed HTTP attempt: the server's Retry-After header if present (429/503),
+    otherwise exponential backoff starting at 0.5s, capped at max_delay.
+    """
+    headers = getattr(error, "headers", None)
+    retry_after = headers.get("Retry-After") if headers is not None else None
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), max_delay)
+        except ValueError:
+            pass  # HTTP-date form; fall back to backoff
+    return float(min(0.5 * (2**attempt), max_delay))
+
 
 _DEFAULT_LLM_CALLER: LLMCallerBase = LLMCallerBase()
 
@@ -503,15 +875,123 @@ def set_llm_caller(llm_caller: LLMCallerBase) -> None:
     _DEFAULT_LLM_CALLER = llm_caller
 
 
+def get_llm_caller() -> LLMCallerBase:
+    """
+    The caller for the current run: the active RunContext's, or the process-wide default.
+    """
+    context = _RUN_CONTEXT.get()
+    return context.llm_caller if context is not None and context.llm_caller is not None else _DEFAULT_LLM_CALLER
+
+
+PROMPT_OVERFLOW_MODES = ("trim", "reject")
+
+
+class PromptTooLongError(Exception):
+    """
+    Raised by call_llm, without contacting the provider, for a prompt estimated above the caller's max_prompt_tokens.
+    """
+
+    def __init__(self, tokens: int, limit: int) -> None:
+        super().__init__(f"Prompt of about {tokens} tokens exceeds the limit of {limit}")
+        self.tokens = tokens
+        self.limit = limit
+
+
+def fit_prompt(messages: list[Message], limit: Optional[int], overflow: str = "trim") -> list[Message]:
+    """
+    Check `messages` against `limit` estimated tokens (see gpt_agents_py.tokens.estimate_prompt_tokens) before sending.
+    Over the limit, overflow="trim" drops the oldest turns after the task prompt (everything before the first assistant
+    message is kept, and so is the last message) and puts a note in their place. With overflow="reject", or when
+    trimming cannot make the prompt fit, raises PromptTooLongError.
+    """
+    if overflow not in PROMPT_OVERFLOW_MODES:
+        raise ValueError(f"Unknown prompt_overflow {overflow!r}; expected one of {PROMPT_OVERFLOW_MODES}")
+    if limit is None:
+        return messages
+    costs = [estimate_tokens(m.content) + MESSAGE_OVERHEAD for m in messages]
+    total = sum(costs) + PROMPT_OVERHEAD
+    if total <= limit:
+        return messages
+    if overflow == "trim":
+        head = min(next((i for i, m in enumerate(messages) if m.role is MessageType.ASSISTANT), len(messages)), len(messages) - 1)
+        removed = 0
+        for end in range(head + 1, len(messages)):
+            removed += costs[end - 1]
+            # Resume at an assistant turn so the note is followed by a reply, unless only the last message is left
+            if end < len(messages) - 1 and messages[end].role is not MessageType.ASSISTANT:
+                continue
+            note = Message(role=MessageType.USER, content=get_prompts().context_trimmed_prompt.format(count=end - head))
+            if total - removed + estimate_tokens(note.content) + MESSAGE_OVERHEAD <= limit:
+                PROMPT_OVERFLOWS.inc(action="trimmed")
+                log_json(logging.INFO, "fit_prompt.trimmed", {"tokens": total, "limit": limit, "dropped_messages": end - head})
+                return messages[:head] + [note] + messages[end:]
+    PROMPT_OVERFLOWS.inc(action="rejected")
+    raise PromptTooLongError(total, limit)
+
+
+def check_budget() -> None:
+    """
+    Raise BudgetExceeded if the active run has used up the max_llm_calls or max_tokens of its RunContext.
+    """
+    context = _RUN_CONTEXT.get()
+    if context is not None and context.counters is not None:
+        if context.max_llm_calls is not None and context.counters.llm_calls >= context.max_llm_calls:
+            raise BudgetExceeded(f"Run used its budget of {context.max_llm_calls} LLM calls")
+        if context.max_tokens is not None and context.counters.tokens >= context.max_tokens:
+            raise BudgetExceeded(f"Run used its budget of {context.max_tokens} tokens")
+
+
 def call_llm(messages: list["Message"]) -> LLMResponseText:
     """
     Sends a list of Message objects to a language model (LLM) API and returns the assistant's response content as LLMResponseText (NewType).
-    The transport can be swapped by replacing the global _DEFAULT_LLM_CALLER.
+    The transport is the active RunContext's caller, or the process-wide one from set_llm_caller.
+    Records call count, latency and token usage in gpt_agents_py.metrics, the run's RunCounters and every active
+    usage_scope (local estimates stand in for counts the provider did not report).
+    Prompts over the caller's max_prompt_tokens are trimmed or rejected locally first (see fit_prompt).
+    Raises RunInterrupted if the active Deadline has expired or been cancelled, before or after the call,
+    and BudgetExceeded once the run has used up its max_llm_calls or max_tokens.
     """
-    _DEFAULT_LLM_CALLER.prepare_llm_response(messages)
-    resp = _DEFAULT_LLM_CALLER.get_llm_response()
-    if resp is None:
-        raise Exception("No response from LLM API")
+    global TOTAL_TOKENS
+    check_deadline()
+    check_budget()
+    context = _RUN_CONTEXT.get()
+    caller = get_llm_caller()
+    messages = fit_prompt(messages, caller.max_prompt_tokens, caller.prompt_overflow)
+    labels = {"provider": caller.provider, "model": caller.model}
+    caller._reset_response()
+    start = time.perf_counter()
+    try:
+        with span("call_llm", messages=len(messages), **labels) as call_span:
+            caller.prepare_llm_response(messages)
+            resp = caller.get_llm_response()
+            if resp is None:
+                raise Exception("No response from LLM API")
+            call_span.attributes.update(response=resp, tokens=caller.get_llm_tokens_used())
+    except BaseException:
+        LLM_CALLS.inc(status="error", **labels)
+        raise
+    finally:
+        LLM_LATENCY.observe(time.perf_counter() - start, **labels)
+    LLM_CALLS.inc(status="ok", **labels)
+    check_deadline()
+    input_tokens = caller.get_llm_input_tokens()
+    output_tokens = caller.get_llm_output_tokens()
+    if input_tokens is not None:
+        LLM_TOKENS.inc(input_tokens, direction="input", **labels)
+    if output_tokens is not None:
+        LLM_TOKENS.inc(output_tokens, direction="output", **labels)
+    tokens_used = caller.get_llm_tokens_used()
+    if tokens_used is not None:
+        with _TOTAL_TOKENS_LOCK:
+            TOTAL_TOKENS += tokens_used
+    if context is not None and context.counters is not None:
+        context.counters.add(tokens_used)
+    estimated = input_tokens is None or output_tokens is None
+    if input_tokens is None:
+        input_tokens = estimate_prompt_tokens(m.content for m in messages)
+    if output_tokens is None:
+        output_tokens = estimate_tokens(resp)
+    record_usage(input_tokens, output_tokens, tokens_used if tokens_used is not None else input_tokens + output_tokens, estimated)
     return LLMResponseText(resp)
 
 
@@ -530,50 +1010,65 @@ def load_api_keys() -> dict[str, str]:
     return api_keys
 
 
-def tool_executor(action: str, action_input_str: str, tools: list[Tool], s: str) -> ToolConclusion:
+@traced("tool_executor", lambda action, action_input_str, *args, **kwargs: {"tool": action, "input": action_input_str}, lambda result: {"output": result.output})
+def tool_executor(action: str, action_input_str: str, tools: Sequence[Tool], s: str) -> ToolConclusion:
     """
     Executes a tool action parsed from an LLM output, given a regex match for action/thought/action_input,
     the list of available tools, and the in-progress LLM output string.
     Returns a ToolConclusion with the original input JSON string and the output string.
     Handles tool lookup, input parsing, function execution, and error reporting.
     All exceptions are phrased as prompts to be given back to the LLM.
+    Under an active Deadline the tool runs on a helper thread that is abandoned if the deadline expires.
+    With a ToolRegistry, lookup is by name and also finds catalog tools the task's prompt did not list.
     """
-    tool = next((t for t in tools if t.name == action), None)
+    registry = tools if isinstance(tools, ToolRegistry) else ToolRegistry(tools)
+    tool = registry.get(action)
     if not tool:
-        tool_list = json.dumps([t.name for t in tools])
-        prompt = PROMPTS.tool_not_found_prompt.format(action=action, tool_list=tool_list)
+        TOOL_CALLS.inc(tool=action, status="not_found")
+        tool_list = json.dumps([t.name for t in registry.suggest(action)])
+        prompt = get_prompts().tool_not_found_prompt.format(action=action, tool_list=tool_list)
         logging.error(prompt)
         raise Exception(prompt)
+    if not registry.offers(action):
+        TOOL_SELECTION_FALLBACKS.inc(tool=action)
+        log_json(logging.INFO, "tool_executor.unlisted_tool", {"tool": action})
 
     try:
         action_input = json.loads(action_input_str)
         logging.debug(f"Parsed action_input: {action_input}")
         if not isinstance(action_input, dict):
-            prompt = PROMPTS.action_input_not_dict_prompt.format(tool_name=tool.name, action_input_str=action_input_str)
+            prompt = get_prompts().action_input_not_dict_prompt.format(tool_name=tool.name, action_input_str=action_input_str)
             logging.error(prompt)
             raise Exception(prompt)
     except Exception as e:
-        prompt = PROMPTS.action_input_parse_failed_prompt.format(tool_name=tool.name if tool else action, action_input_str=action_input_str, exception=e)
+        TOOL_CALLS.inc(tool=tool.name, status="bad_input")
+        prompt = get_prompts().action_input_parse_failed_prompt.format(tool_name=tool.name if tool else action, action_input_str=action_input_str, exception=e)
         logging.error(prompt)
         raise Exception(prompt)
 
+    start = time.perf_counter()
     try:
         logging.info(f"Executing tool '{tool.name}' with input {action_input}")
-        result = tool.func(action_input)
+        result = run_within_deadline(lambda: tool.func(action_input))
         logging.debug(f"Tool '{tool.name}' execution result: {result}")
     except Exception as e:
+        TOOL_LATENCY.observe(time.perf_counter() - start, tool=tool.name)
+        TOOL_CALLS.inc(tool=tool.name, status="error")
         tool_inputs = tool.args_schema
-        prompt = PROMPTS.tool_call_failed_prompt.format(
+        prompt = get_prompts().tool_call_failed_prompt.format(
             tool_name=tool.name, action_input=action_input, action_input_json=json.dumps(action_input), exception=e, tool_inputs=tool_inputs
         )
         logging.error(prompt)
         raise Exception(prompt)
 
+    TOOL_LATENCY.observe(time.perf_counter() - start, tool=tool.name)
     if not result:
-        prompt = PROMPTS.tool_no_output_prompt.format(tool_name=tool.name, action_input_json=json.dumps(action_input))
+        TOOL_CALLS.inc(tool=tool.name, status="no_output")
+        prompt = get_prompts().tool_no_output_prompt.format(tool_name=tool.name, action_input_json=json.dumps(action_input))
         logging.error(prompt)
         raise Exception(prompt)
 
+    TOOL_CALLS.inc(tool=tool.name, status="ok")
     log_json(logging.INFO, "Tool executed successfully:", {"action": action, "input": action_input, "result": result})
     result = s.rstrip() + f"\nObservation: {result}\n"
     info = f"Tool '{tool.name}' succeeded with input {action_input}."
@@ -581,34 +1076,216 @@ def tool_executor(action: str, action_input_str: str, tools: list[Tool], s: str)
     return ToolConclusion(input=info, output=result)
 
 
+def _is_idempotent(tools: Sequence[Tool], action: str) -> bool:
+    tool = tools.get(action) if isinstance(tools, ToolRegistry) else next((t for t in tools if t.name == action), None)
+    return tool is not None and tool.idempotent
+
+
+ValidationJudge = Callable[[str, str], str]
+
+
+def validation_verdict(final_answer: str, expected_output: str) -> str:
+    """
+    Ask the LLM whether final_answer fulfills expected_output, in its own call.
+    Returns the validator's Final Answer lower-cased and stripped; "yes" means pass.
+    """
+    val_llm_messages = [
+        Message(role=MessageType.SYSTEM, content=get_prompts().validation_system_prompt),
+        Message(role=MessageType.USER, content=get_prompts().validation_user_prompt.format(final_answer=final_answer, expected_output=expected_output)),
+    ]
+    llm_response = call_llm(val_llm_messages)
+    extracted_answer = extract_final_answer(str(llm_response))
+    return extracted_answer.lower().strip() if extracted_answer is not None else ""
+
+
+_VALIDATION_JUDGE: ValidationJudge = validation_verdict
+
+
+def set_validation_judge(judge: ValidationJudge) -> None:
+    """
+    Replace the function validation_executor uses to get a verdict, e.g. with a batching judge.
+    """
+    global _VALIDATION_JUDGE
+    _VALIDATION_JUDGE = judge
+
+
+def get_validation_judge() -> ValidationJudge:
+    """
+    The judge for the current run: the active RunContext's, or the process-wide default.
+    """
+    context = _RUN_CONTEXT.get()
+    return context.validation_judge if context is not None and context.validation_judge is not None else _VALIDATION_JUDGE
+
+
+SPECULATIVE_VALIDATION_WORKERS = 16  # Background validations running at once across all speculative agents; the rest queue
+_SPECULATION_POOL = ThreadPoolExecutor(max_workers=SPECULATIVE_VALIDATION_WORKERS, thread_name_prefix="gpt-agents-speculative-validation")
+
+
+class _Speculation:
+    """
+    The background validation of one task's answer, started by validation_executor while agent_executor moves on.
+    """
+
+    def __init__(self) -> None:
+        self.verdict: Optional[Future[str]] = None
+
+    def start(self, final_answer: str, expected_output: str) -> None:
+        judge = get_validation_judge()
+
+        def run() -> str:
+            result = judge(final_answer, expected_output)
+            VALIDATIONS.inc(result="pass" if result == "yes" else "fail")
+            return result
+
+        # Copy the context so the validation call is traced under the task that produced the answer
+        self.verdict = _SPECULATION_POOL.submit(contextvars.copy_context().run, run)
+
+
+class _PendingSpeculation(NamedTuple):
+    task_idx: int
+    speculation: _Speculation
+    rolling_summary: Optional[str]  # Rolling summary before this task's result was folded in, restored on a miss
+    context: list[TaskConclusion]
+    result: TaskConclusion
+    usage: UsageMeter  # The task's meter, which the background validation keeps adding to
+
+    def confirmed(self) -> TaskConclusion:
+        """
+        The result with its usage updated to include the finished validation.
+        """
+        return self.result._replace(usage=self.usage.usage())
+
+    def passed(self) -> bool:
+        """
+        Wait for the background verdict. A validation call that raised counts as a failure.
+        """
+        assert self.speculation.verdict is not None
+        try:
+            return self.speculation.verdict.result() == "yes"
+        except Exception as e:
+            log_json(logging.WARNING, "Speculative validation failed:", {"error": str(e)})
+            return False
+
+    def passed_already(self) -> bool:
+        """
+        Whether the background verdict is in and passed, without waiting for it (for an interrupted run).
+        """
+        verdict = self.speculation.verdict
+        return verdict is not None and verdict.done() and verdict.exception() is None and verdict.result() == "yes"
+
+
+_SPECULATION: contextvars.ContextVar[Optional[_Speculation]] = contextvars.ContextVar("gpt_agents_speculation", default=None)
+
+
+@contextlib.contextmanager
+def _speculating(speculation: Optional[_Speculation]) -> Iterator[None]:
+    token = _SPECULATION.set(speculation)
+    try:
+        yield
+    finally:
+        _SPECULATION.reset(token)
+
+
+@traced(
+    "validation_executor",
+    lambda final_answer, task, *args, **kwargs: {"task": task.name, "final_answer": final_answer},
+    lambda result: {"verdict": result.output, "speculative": _SPECULATION.get() is not None},
+)
 def validation_executor(final_answer: str, task: Task) -> ValidationConclusion:
     """
     Validates a final answer string against the Task's expected_output.
     Returns ValidationConclusion on success.
     Raises Exception with validation prompt and result if validation fails.
     """
-    system_prompt = PROMPTS.validation_system_prompt
-    validation_prompt = PROMPTS.validation_user_prompt.format(final_answer=final_answer, expected_output=task.expected_output)
-    val_llm_messages = [
-        Message(role=MessageType.SYSTEM, content=system_prompt),
-        Message(role=MessageType.USER, content=validation_prompt),
-    ]
-    llm_response = call_llm(val_llm_messages)
-    llm_response_text = str(llm_response)
-    extracted_answer = extract_final_answer(llm_response_text)
-    result_final_answer = extracted_answer.lower().strip() if extracted_answer is not None else ""
+    validation_prompt = get_prompts().validation_user_prompt.format(final_answer=final_answer, expected_output=task.expected_output)
+    speculation = _SPECULATION.get()
+    if speculation is not None:
+        # Speculative mode: pass optimistically and let agent_executor check the real verdict later
+        speculation.start(final_answer, task.expected_output)
+        return ValidationConclusion(input=validation_prompt, output="yes")
+    result_final_answer = get_validation_judge()(final_answer, task.expected_output)
 
     passed = result_final_answer == "yes"
+    VALIDATIONS.inc(result="pass" if passed else "fail")
     log_json(logging.DEBUG, "Validation finished", {"validation_prompt": validation_prompt, "result_final_answer": result_final_answer, "passed": passed})
     debug_step(f"Validation result for task: {task.name} - {passed} (yes vs {result_final_answer!r})")
     if not passed:
-        retry_prompt = PROMPTS.validation_retry_prompt.format(expected_output=task.expected_output, final_answer=final_answer, result_final_answer=result_final_answer)
+        retry_prompt = get_prompts().validation_retry_prompt.format(expected_output=task.expected_output, final_answer=final_answer, result_final_answer=result_final_answer)
         log_json(logging.WARNING, "Validation failed:", {"task": task.name, "expected": task.expected_output, "actual": final_answer})
         raise Exception(retry_prompt)
     return ValidationConclusion(input=validation_prompt, output=result_final_answer)
 
 
-def task_executor(task: Task, tools: List[Tool]) -> TaskConclusion:
+class ActionRepeat(NamedTuple):
+    pattern: str  # "repeat" (the same call as before) or "oscillation" (a cycle of two or more calls, repeated)
+    cycle: tuple[str, ...]  # Tool names of the repeated sequence, oldest first
+    observation: Optional[str]  # The earlier observation suffix ("\nObservation: ...\n"), if that call succeeded
+
+
+class ActionHistory:
+    """
+    The tool calls of one task, across its attempts and RESET_TASK retries, with the observations they returned.
+    check() spots a call that was made before; once `max_repeats` of them have been seen, the task should stop
+    exploring and give a final answer.
+    """
+
+    def __init__(self, max_repeats: int = 2) -> None:
+        self.max_repeats = max_repeats
+        self.repeats = 0
+        self._calls: list[tuple[str, str]] = []
+        self._observations: dict[tuple[str, str], str] = {}
+
+    @staticmethod
+    def _key(action: str, action_input: str) -> tuple[str, str]:
+        try:
+            return action, json.dumps(json.loads(action_input), sort_keys=True)
+        except ValueError:
+            return action, action_input.strip()
+
+    def check(self, action: str, action_input: str) -> Optional[ActionRepeat]:
+        """
+        Record a call about to be made and return an ActionRepeat if the same call was made before.
+        """
+        key = self._key(action, action_input)
+        seen = key in self._calls
+        self._calls.append(key)
+        if not seen:
+            return None
+        self.repeats += 1
+        calls = self._calls
+        for period in range(2, len(calls) // 2 + 1):
+            if calls[-period:] == calls[-2 * period : -period] and len(set(calls[-period:])) > 1:
+                return ActionRepeat(pattern="oscillation", cycle=tuple(a for a, _ in calls[-period:]), observation=self._observations.get(key))
+        return ActionRepeat(pattern="repeat", cycle=(action,), observation=self._observations.get(key))
+
+    def record(self, action: str, action_input: str, observation: str) -> None:
+        self._observations[self._key(action, action_input)] = observation
+
+    @property
+    def exhausted(self) -> bool:
+        return self.repeats >= self.max_repeats
+
+
+class TaskRun:
+    """
+    Mutable run state of one task: the conversation so far and its tool calls. The Task itself is never modified, so
+    an Agent can be reused across runs; retries reset `conversation` to a saved prefix, which shares its messages
+    instead of copying them, and keep `actions`, so a retry that repeats the same calls is cut short.
+    """
+
+    def __init__(self, conversation: Conversation[Message]) -> None:
+        self.conversation = conversation
+        self.actions = ActionHistory()
+
+    def append(self, message: Message) -> None:
+        self.conversation = self.conversation.append(message)
+
+    def messages(self) -> list[Message]:
+        return self.conversation.to_list()
+
+
+@traced("task_executor", lambda task, *args, **kwargs: {"task": task.name}, lambda result: {"output": result.output})
+def task_executor(task: Task, tools: Sequence[Tool], run: Optional[TaskRun] = None) -> TaskConclusion:
     """
     Executes a single task for the agent, orchestrating LLM interaction, tool usage, and answer validation.
     The core control flow is:
@@ -617,311 +1294,871 @@ def task_executor(task: Task, tools: List[Tool]) -> TaskConclusion:
          - If LLM provides a final answer, validate it and return success if valid.
          - If LLM attempts a tool call, execute tool and supply result as context to LLM.
          - If LLM only provides a thought, coach it to take action or answer.
+         - If LLM repeats an earlier tool call, reuse its observation and warn it; after repeated loops, skip to step 3.
       3. Retry as needed, including forced attempts to nudge the LLM to answer.
       4. Raise if no valid answer is obtained after all attempts.
     This layered loop ensures robust handling of tool errors, ambiguous outputs, and stubborn LLM behavior, maximizing the chance of a valid answer.
+    The conversation is kept in `run` (started from task.llm_messages if not given); the Task is not modified.
     """
+    if run is None:
+        run = TaskRun(Conversation(task.llm_messages))
 
     max_attempts = 5  # Allow several attempts for normal LLM/task interaction
     extra_attempts = 2  # Allow a couple forced attempts if LLM gets stuck
+    prompts = get_prompts()
     for attempt in range(max_attempts):
-        try:
-            # Query LLM
-            llm_response = call_llm(task.llm_messages)
-            llm_response_text = str(llm_response)
-            task.llm_messages.append(Message(role=MessageType.ASSISTANT, content=llm_response_text.strip()))
-
-            # --- Parse LLM output ---
-            final_match = AGENT_FINAL_REGEX.search(llm_response_text)
-            action_match = AGENT_ACTION_REGEX.search(llm_response_text)
-            thought_only_match = AGENT_THOUGHT_ONLY_REGEX.search(llm_response_text)
-            if not thought_only_match:
-                task.llm_messages.append(Message(role=MessageType.USER, content=PROMPTS.missing_thought_prompt))
-                continue
-            debug_step(f"LLM response parsing: {llm_response_text}\nFinal Match: {final_match}\nAction Match: {action_match}\nThought Only Match: {thought_only_match}")
+        if attempt:
+            EXECUTOR_RETRIES.inc(level="task_attempt")
+        with span("attempt", attempt=attempt):
+            try:
+                # Query LLM
+                llm_response = call_llm(run.messages())
+                llm_response_text = str(llm_response)
+                run.append(Message(role=MessageType.ASSISTANT, content=llm_response_text.strip()))
+
+                # --- Parse LLM output ---
+                final_match = AGENT_FINAL_REGEX.search(llm_response_text)
+                action_match = AGENT_ACTION_REGEX.search(llm_response_text)
+                thought_only_match = AGENT_THOUGHT_ONLY_REGEX.search(llm_response_text)
+                if not thought_only_match:
+                    run.append(Message(role=MessageType.USER, content=prompts.missing_thought_prompt))
+                    continue
+                debug_step(f"LLM response parsing: {llm_response_text}\nFinal Match: {final_match}\nAction Match: {action_match}\nThought Only Match: {thought_only_match}")
 
-            if action_match:
-                # LLM wants to use a tool. Try to execute and supply result as new context.
-                log_json(
-                    logging.DEBUG,
-                    "LLM response parsing:",
-                    {
-                        "attempt": attempt,
-                        "Thought": action_match.group("thought").strip(),
-                        "Action": action_match.group("action").strip(),
-                        "Action Input": action_match.group("action_input").strip(),
-                    },
-                )
-                try:
-                    tool_conclusion = tool_executor(
-                        action_match.group("action").strip(),
-                        action_match.group("action_input").strip(),
-                        tools,
-                        llm_response_text,
+                if action_match:
+                    # LLM wants to use a tool. Try to execute and supply result as new context.
+                    log_json(
+                        logging.DEBUG,
+                        "LLM response parsing:",
+                        {
+                            "attempt": attempt,
+                            "Thought": action_match.group("thought").strip(),
+                            "Action": action_match.group("action").strip(),
+                            "Action Input": action_match.group("action_input").strip(),
+                        },
                     )
-                    # Inform LLM of tool outcome as new message
-                    task.llm_messages.append(Message(role=MessageType.USER, content=f"{tool_conclusion.input}\n{tool_conclusion.output}"))
-                except Exception as e:
-                    # Tool failed: prompt LLM to try again
-                    task.llm_messages.append(
-                        Message(
-                            role=MessageType.USER,
-                            content=PROMPTS.tool_retry_prompt.format(exception=str(e)),
+                    action = action_match.group("action").strip()
+                    action_input = action_match.group("action_input").strip()
+                    repeat = run.actions.check(action, action_input)
+                    try:
+                        if repeat is not None and repeat.observation is not None and _is_idempotent(tools, action):
+                            # Same call as before: reuse its observation instead of calling the tool again
+                            TOOL_CACHE_HITS.inc(tool=action)
+                            content = f"Tool '{action}' was not called again; this is its earlier result for the same input.\n{llm_response_text.rstrip()}{repeat.observation}"
+                        else:
+                            tool_conclusion = tool_executor(action, action_input, tools, llm_response_text)
+                            run.actions.record(action, action_input, tool_conclusion.output[len(llm_response_text.rstrip()) :])
+                            content = f"{tool_conclusion.input}\n{tool_conclusion.output}"
+                    except Exception as e:
+                        # Tool failed: prompt LLM to try again
+                        content = prompts.tool_retry_prompt.format(exception=str(e))
+                    if repeat is not None:
+                        ACTION_REPEATS.inc(pattern=repeat.pattern)
+                        log_json(
+                            logging.INFO, "task_executor.repeated_action", {"task": task.name, "pattern": repeat.pattern, "cycle": repeat.cycle, "repeats": run.actions.repeats}
                         )
+                        if repeat.pattern == "oscillation":
+                            content += prompts.oscillating_actions_prompt.format(actions=" -> ".join(repeat.cycle))
+                        else:
+                            content += prompts.repeated_action_prompt.format(action=action)
+                    # Inform LLM of tool outcome as new message
+                    run.append(Message(role=MessageType.USER, content=content))
+                    if run.actions.exhausted:
+                        # Stuck in a loop: skip the remaining attempts and ask for a final answer now
+                        LOOP_FORCED_ANSWERS.inc()
+                        break
+                    continue  # Continue to next LLM round
+                elif final_match:
+                    # LLM gave a Final Answer. Validate it.
+                    log_json(
+                        logging.INFO,
+                        "LLM response parsing:",
+                        {
+                            "attempt": attempt,
+                            "Thought": final_match.group("thought").strip(),
+                            "Final Answer": final_match.group("final_answer").strip(),
+                        },
+                    )
+                    for _ in range(3):  # Allow several retries if validation fails
+                        try:
+                            debug_step(f"Validating final answer for task: {task.name}")
+                            validation_executor(final_match.group("final_answer").strip(), task)
+                            return TaskConclusion(
+                                input=f"Task Name: {task.name}\nTask Description: {task.description}\nTask Expected Output: {task.expected_output}",
+                                output=f"Final Answer: {final_match.group('final_answer').strip()}",
+                            )
+                        except Exception as e:
+                            EXECUTOR_RETRIES.inc(level="validation")
+                            # Give feedback to LLM and request a better answer
+                            retry_prompt = prompts.retry_failed_validation_prompt.format(exception=str(e))
+                            run.append(Message(role=MessageType.USER, content=retry_prompt))
+                            llm_response = call_llm(run.messages())
+                            llm_response_text = str(llm_response)
+                            run.append(Message(role=MessageType.ASSISTANT, content=llm_response_text.strip()))
+                            final_match = AGENT_FINAL_REGEX.search(llm_response_text)
+                            if not final_match:
+                                raise Exception("Validation failed: No valid final answer. RESET_TASK")
+                    else:
+                        # Too many invalid answers
+                        raise Exception("Validation failed after retries. RESET_TASK")
+
+                elif thought_only_match:
+                    # LLM is indecisive, nudge it to take action or answer
+                    log_json(
+                        logging.DEBUG,
+                        "LLM response parsing:",
+                        {
+                            "attempt": attempt,
+                            "Thought": thought_only_match.group("thought").strip(),
+                        },
+                    )
+                    run.append(Message(role=MessageType.USER, content=prompts.coaching_prompt))
+                    continue
+
+            except Exception as e:
+                # Catch all unexpected errors, log and continue attempt loop
+                log_json(logging.WARNING, "LLM/Tool error during attempt:", {"attempt": attempt, "error": str(e)})
+                continue
+
+    # --- Fallback: force LLM to answer if all else fails ---
+    for force_attempt in range(extra_attempts):
+        EXECUTOR_RETRIES.inc(level="forced_answer")
+        with span("forced_attempt", attempt=max_attempts + force_attempt):
+            try:
+                run.append(
+                    Message(
+                        role=MessageType.USER,
+                        content=prompts.force_final_answer_prompt,
                     )
-                continue  # Continue to next LLM round
-            elif final_match:
-                # LLM gave a Final Answer. Validate it.
-                log_json(
-                    logging.INFO,
-                    "LLM response parsing:",
-                    {
-                        "attempt": attempt,
-                        "Thought": final_match.group("thought").strip(),
-                        "Final Answer": final_match.group("final_answer").strip(),
-                    },
                 )
-                for _ in range(3):  # Allow several retries if validation fails
-                    try:
-                        debug_step(f"Validating final answer for task: {task.name}")
-                        validation_executor(final_match.group("final_answer").strip(), task)
-                        return TaskConclusion(
-                            input=f"Task Name: {task.name}\nTask Description: {task.description}\nTask Expected Output: {task.expected_output}",
-                            output=f"Final Answer: {final_match.group('final_answer').strip()}",
-                        )
-                    except Exception as e:
-                        # Give feedback to LLM and request a better answer
-                        retry_prompt = PROMPTS.retry_failed_validation_prompt.format(exception=str(e))
-                        task.llm_messages.append(Message(role=MessageType.USER, content=retry_prompt))
-                        llm_response = call_llm(task.llm_messages)
-                        llm_response_text = str(llm_response)
-                        task.llm_messages.append(Message(role=MessageType.ASSISTANT, content=llm_response_text.strip()))
-                        final_match = AGENT_FINAL_REGEX.search(llm_response_text)
-                        if not final_match:
-                            raise Exception("Validation failed: No valid final answer. RESET_TASK")
+                llm_response = call_llm(run.messages())
+                llm_response_text = str(llm_response)
+                final_match = AGENT_FINAL_REGEX.search(llm_response_text)
+                if final_match:
+                    log_json(
+                        logging.INFO,
+                        "LLM response parsing:",
+                        {
+                            "attempt": max_attempts + force_attempt,
+                            "Thought": final_match.group("thought").strip(),
+                            "Final Answer": final_match.group("final_answer").strip(),
+                        },
+                    )
+                    for _ in range(3):
+                        try:
+                            debug_step(f"Validating final answer for task: {task.name}")
+                            validation_executor(final_match.group("final_answer").strip(), task)
+                            return TaskConclusion(
+                                input=f"Task Name: {task.name}\nTask Description: {task.description}\nTask Expected Output: {task.expected_output}",
+                                output=final_match.group("final_answer").strip(),
+                            )
+                        except Exception as e:
+                            EXECUTOR_RETRIES.inc(level="validation")
+                            retry_prompt = prompts.retry_failed_validation_prompt_2.format(exception=str(e))
+                            run.append(Message(role=MessageType.USER, content=retry_prompt))
+                            llm_response = call_llm(run.messages())
+                            llm_response_text = str(llm_response)
+                            run.append(Message(role=MessageType.ASSISTANT, content=llm_response_text.strip()))
+                            final_match = AGENT_FINAL_REGEX.search(llm_response_text)
+                            if not final_match:
+                                raise Exception("Validation failed: No valid final answer. RESET_TASK")
+            except Exception as e:
+                log_json(logging.WARNING, "Forced attempt error:", {"force_attempt": force_attempt, "error": str(e)})
+                continue
+
+    # After all attempts, fail: no valid answer could be obtained
+    raise Exception("Validation failed: No valid final answer. RESET_TASK")
+
+
+SUMMARY_MODES = ("task", "single_shot", "incremental", "extractive")
+
+
+def _summary_input(agent: Agent) -> str:
+    return f"Task Name: Summary\nTask Description: {get_prompts().summary_task_description_prompt.format(goal=agent.goal)}\nTask Expected Output: {agent.goal}"
+
+
+def _answer_text(output: str) -> str:
+    answer = extract_final_answer(output)
+    return (answer if answer is not None else output).strip()
+
+
+def update_rolling_summary(agent: Agent, summary: Optional[str], result: TaskConclusion) -> str:
+    """
+    Fold one task result into the running summary of summary_mode="incremental". The first result becomes the summary as is.
+    """
+    if summary is None:
+        return _answer_text(result.output)
+    prompt = get_prompts().summary_incremental_prompt.format(goal=agent.goal, summary=summary, result=_answer_text(result.output))
+    return _answer_text(call_llm([Message(role=MessageType.SYSTEM, content=get_prompts().no_tools_template), Message(role=MessageType.USER, content=prompt)]))
+
+
+@traced("summary_executor", lambda agent, *args, **kwargs: {"agent": agent.role, "mode": agent.summary_mode}, lambda result: {"output": result.output})
+def summary_executor(agent: Agent, task_conclusions: list[TaskConclusion], rolling_summary: Optional[str] = None) -> TaskConclusion:
+    """
+    Summarize the agent's own task conclusions without the task_executor loop ("task" mode stays in agent_executor):
+    - single_shot: one LLM call over all results, no validation or retries.
+    - incremental: returns the rolling summary agent_executor kept up to date after each task.
+    - extractive: no LLM call; the tasks' final answers joined in order.
+    """
+    if agent.summary_mode == "single_shot":
+        results = "\n\n".join(_answer_text(tc.output) for tc in task_conclusions)
+        prompt = get_prompts().summary_single_shot_prompt.format(goal=agent.goal, results=results)
+        output = _answer_text(call_llm([Message(role=MessageType.SYSTEM, content=get_prompts().no_tools_template), Message(role=MessageType.USER, content=prompt)]))
+    elif agent.summary_mode == "incremental":
+        output = rolling_summary if rolling_summary is not None else ""
+    elif agent.summary_mode == "extractive":
+        output = "\n\n".join(_answer_text(tc.output) for tc in task_conclusions)
+    else:
+        raise ValueError(f"Unknown summary_mode {agent.summary_mode!r}; expected one of {SUMMARY_MODES}")
+    return TaskConclusion(input=_summary_input(agent), output=f"Final Answer: {output}")
+
+
+class ConclusionCacheBase:
+    """
+    Memoizes TaskConclusions across runs. agent_executor asks get() before running a task and skips the whole
+    task_executor loop on a hit; put() receives each validated conclusion. Install with set_conclusion_cache().
+    """
+
+    def get(self, agent: Agent, task: Task, context: list[TaskConclusion]) -> Optional[TaskConclusion]:
+        return None
+
+    def put(self, agent: Agent, task: Task, context: list[TaskConclusion], conclusion: TaskConclusion) -> None:
+        pass
+
+
+_CONCLUSION_CACHE: Optional[ConclusionCacheBase] = None
+
+
+class HistoryStoreBase:
+    """
+    Takes each finished task's conversation off the heap. agent_executor passes every TaskHistory to put() as soon
+    as the task completes and keeps the returned one, whose messages should load lazily (see extensions/message_store.py).
+    discard() is called for histories of speculative work that was thrown away. Install with set_history_store().
+    """
+
+    def put(self, history: TaskHistory) -> TaskHistory:
+        return history
+
+    def discard(self, history: TaskHistory) -> None:
+        pass
+
+
+_HISTORY_STORE: Optional[HistoryStoreBase] = None
+
+
+class HumanInputRequest(NamedTuple):
+    agent: str
+    task: str
+    answer: str  # The task's latest "Final Answer: ..." output
+    round: int  # 1 for the first request on this task
+
+
+class HumanInputProviderBase:
+    """
+    Supplies guidance for tasks with require_human_input. request() must return at once with a Future for the
+    guidance ("q" finishes the task); the task waits on it, up to `timeout` seconds, after which `default` is used.
+    While it waits, a task holds no LLM or tool resources and gives up its worker slot (see worker_slot()).
+    The base implementation prompts on the console with `readline` (input() by default). One reader thread serves the
+    requests oldest first, and each line goes to the oldest request still waiting, so a line typed just after a request
+    timed out answers the next one instead of being lost. Install with set_human_input_provider().
+    """
+
+    def __init__(self, timeout: Optional[float] = None, default: str = "q", readline: Callable[[str], str] = input) -> None:
+        self.timeout = timeout
+        self.default = default
+        self.readline = readline
+        self._console: collections.deque[tuple[HumanInputRequest, Future[str]]] = collections.deque()
+        self._console_ready = threading.Condition()
+        self._reader: Optional[threading.Thread] = None
+
+    def request(self, request: HumanInputRequest) -> Future[str]:
+        future: Future[str] = Future()
+        with self._console_ready:
+            self._console.append((request, future))
+            if self._reader is None:
+                self._reader = threading.Thread(target=self._read_console, name="gpt-agents-human-input", daemon=True)
+                self._reader.start()
+            self._console_ready.notify()
+        return future
+
+    def _read_console(self) -> None:
+        while True:
+            with self._console_ready:
+                # Timed-out and cancelled requests are done; skip them
+                while not self._console or self._console[0][1].done():
+                    if self._console:
+                        self._console.popleft()
+                    else:
+                        self._console_ready.wait()
+                request = self._console[0][0]
+            line: Optional[str] = None
+            error: Optional[BaseException] = None
+            try:
+                line = self.readline(f"\n[Human Input Required for task '{request.task}']\nEnter additional guidance (or 'q' to finish): ")
+            except BaseException as e:
+                error = e
+            with self._console_ready:
+                while self._console:
+                    _, future = self._console.popleft()
+                    if future.set_running_or_notify_cancel():
+                        break
                 else:
-                    # Too many invalid answers
-                    raise Exception("Validation failed after retries. RESET_TASK")
+                    continue  # Nobody is waiting any more; the line is dropped
+            if error is not None:
+                future.set_exception(error)
+            else:
+                assert line is not None
+                future.set_result(line)
 
-            elif thought_only_match:
-                # LLM is indecisive, nudge it to take action or answer
-                log_json(
-                    logging.DEBUG,
-                    "LLM response parsing:",
-                    {
-                        "attempt": attempt,
-                        "Thought": thought_only_match.group("thought").strip(),
-                    },
-                )
-                task.llm_messages.append(Message(role=MessageType.USER, content=PROMPTS.coaching_prompt))
+
+_HUMAN_INPUT_PROVIDER = HumanInputProviderBase()
+
+
+def set_human_input_provider(provider: HumanInputProviderBase) -> None:
+    global _HUMAN_INPUT_PROVIDER
+    _HUMAN_INPUT_PROVIDER = provider
+
+
+def get_human_input_provider() -> HumanInputProviderBase:
+    """
+    The human input provider for the current run: the active RunContext's, or the process-wide default.
+    """
+    context = _RUN_CONTEXT.get()
+    return context.human_input if context is not None and context.human_input is not None else _HUMAN_INPUT_PROVIDER
+
+
+_WORKER_SLOT: contextvars.ContextVar[Optional[threading.Semaphore]] = contextvars.ContextVar("gpt_agents_worker_slot", default=None)
+
+
+@contextlib.contextmanager
+def worker_slot(slots: threading.Semaphore) -> Iterator[None]:
+    """
+    Hold one of `slots` for the enclosed run. A task waiting for human input releases it until the answer arrives,
+    so a pool sized for active runs is not exhausted by runs parked on people (see run_batch's `human_slots`).
+    """
+    slots.acquire()
+    token = _WORKER_SLOT.set(slots)
+    try:
+        yield
+    finally:
+        _WORKER_SLOT.reset(token)
+        slots.release()
+
+
+def await_human_input(request: HumanInputRequest, poll: float = 0.05) -> str:
+    """
+    Ask the current provider for guidance and wait for it, giving up the worker slot meanwhile. Returns the
+    provider's default on timeout; raises if the run's deadline expires or it is cancelled first.
+    """
+    provider = get_human_input_provider()
+    future = provider.request(request)
+    deadline = current_deadline()
+    slots = _WORKER_SLOT.get()
+    start = time.monotonic()
+    expires = start + provider.timeout if provider.timeout is not None else None
+    if slots is not None:
+        slots.release()
+    try:
+        while not wait([future], timeout=poll).done:
+            if deadline is not None:
+                try:
+                    deadline.check()
+                except RunInterrupted:
+                    future.cancel()
+                    raise
+            if expires is not None and time.monotonic() >= expires:
+                future.cancel()
+                HUMAN_INPUTS.inc(outcome="timeout")
+                log_json(logging.INFO, "agent_executor.human_input_timeout", {"agent": request.agent, "task": request.task, "round": request.round})
+                return provider.default
+    finally:
+        if slots is not None:
+            slots.acquire()
+        HUMAN_INPUT_WAIT.observe(time.monotonic() - start)
+    HUMAN_INPUTS.inc(outcome="answered")
+    return future.result()
+
+
+def set_history_store(store: Optional[HistoryStoreBase]) -> None:
+    global _HISTORY_STORE
+    _HISTORY_STORE = store
+
+
+def get_history_store() -> Optional[HistoryStoreBase]:
+    """
+    The history store for the current run: the active RunContext's, or the process-wide default.
+    """
+    context = _RUN_CONTEXT.get()
+    return context.history_store if context is not None and context.history_store is not None else _HISTORY_STORE
+
+
+def set_conclusion_cache(cache: Optional[ConclusionCacheBase]) -> None:
+    global _CONCLUSION_CACHE
+    _CONCLUSION_CACHE = cache
+
+
+def get_conclusion_cache() -> Optional[ConclusionCacheBase]:
+    """
+    The cache for the current run: the active RunContext's, or the process-wide default.
+    """
+    context = _RUN_CONTEXT.get()
+    return context.conclusion_cache if context is not None and context.conclusion_cache is not None else _CONCLUSION_CACHE
+
+
+class RunCounters:
+    """
+    Per-run LLM usage, updated by call_llm from every thread of the run. TOTAL_TOKENS stays the process-wide sum.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.llm_calls = 0
+        self.tokens = 0
+
+    def add(self, tokens: Optional[int]) -> None:
+        with self._lock:
+            self.llm_calls += 1
+            self.tokens += tokens or 0
+
+
+class RunContext(NamedTuple):
+    """
+    Per-run configuration. Fields left as None fall back to the process-wide defaults (PROMPTS, set_llm_caller,
+    set_validation_judge, set_conclusion_cache, set_history_store, set_human_input_provider, set_debug_mode, set_trace_mode), so concurrent runs in one process can
+    each use their own prompts, caller and limits. Installed by organization_executor(context=...) or use_run_context().
+    """
+
+    prompts: Optional[Prompts] = None  # Build with replace_prompt(PROMPTS, key, value)
+    llm_caller: Optional[LLMCallerBase] = None  # Also selects the model
+    validation_judge: Optional[ValidationJudge] = None
+    conclusion_cache: Optional[ConclusionCacheBase] = None
+    history_store: Optional[HistoryStoreBase] = None
+    human_input: Optional[HumanInputProviderBase] = None
+    debug_mode: Optional[bool] = None
+    trace_llm: Optional[bool] = None
+    trace_llm_filename: Optional[str] = None
+    deadline: Optional[Deadline] = None
+    max_llm_calls: Optional[int] = None  # The run stops with a partial result once it has made this many calls
+    max_tokens: Optional[int] = None  # ... or once it has used this many tokens
+    counters: Optional[RunCounters] = None  # Created per run if None; pass your own to read it afterwards
+
+
+_RUN_CONTEXT: contextvars.ContextVar[Optional[RunContext]] = contextvars.ContextVar("gpt_agents_run_context", default=None)
+
+
+def current_run_context() -> Optional[RunContext]:
+    return _RUN_CONTEXT.get()
+
+
+@contextlib.contextmanager
+def use_run_context(context: Optional[RunContext]) -> Iterator[Optional[RunContext]]:
+    """
+    Make `context` the active RunContext for the enclosed code (and threads started with a copied context),
+    giving it fresh counters if it has none. With None, the active context (if any) is left in place.
+    """
+    if context is None:
+        yield _RUN_CONTEXT.get()
+        return
+    if context.counters is None:
+        context = context._replace(counters=RunCounters())
+    token = _RUN_CONTEXT.set(context)
+    try:
+        yield context
+    finally:
+        _RUN_CONTEXT.reset(token)
+
+
+def _context_text(tc: TaskConclusion) -> str:
+    return f"{tc.input}\n{tc.output}\n"
+
+
+class ConclusionIndex:
+    """
+    BM25 index over the TaskConclusions of one organization run, updated as they arrive. select() picks the
+    conclusions a task's prompt should include instead of pasting every earlier one.
+    """
+
+    def __init__(self) -> None:
+        self._index: BM25Index[TaskConclusion] = BM25Index()
+        self._seen: set[TaskConclusion] = set()
+
+    def add(self, conclusions: Iterable[TaskConclusion]) -> None:
+        for tc in conclusions:
+            if tc not in self._seen:
+                self._seen.add(tc)
+                self._index.add(tc, _context_text(tc))
+
+    def select(self, query: str, conclusions: Sequence[TaskConclusion], k: int, budget: int) -> list[TaskConclusion]:
+        """
+        Up to `k` distinct conclusions from `conclusions` within `budget` estimated tokens, in their original order:
+        the latest one (the task's direct predecessor), then the most relevant to `query`, then the most recent others.
+        """
+        distinct = list(dict.fromkeys(conclusions))
+        if not distinct or k <= 0:
+            return []
+        self.add(distinct)
+        candidates = set(distinct)
+        ranked = [tc for tc in self._index.top_k(query, len(self._index)) if tc in candidates]
+        chosen: set[TaskConclusion] = set()
+        used = 0
+        for tc in [conclusions[-1]] + ranked + distinct[::-1]:
+            if len(chosen) >= k:
+                break
+            cost = estimate_tokens(_context_text(tc))
+            if tc in chosen or (chosen and used + cost > budget):
                 continue
+            chosen.add(tc)
+            used += cost
+        return [tc for tc in distinct if tc in chosen]
 
-        except Exception as e:
-            # Catch all unexpected errors, log and continue attempt loop
-            log_json(logging.WARNING, "LLM/Tool error during attempt:", {"attempt": attempt, "error": str(e)})
-            continue
 
-    # --- Fallback: force LLM to answer if all else fails ---
-    for force_attempt in range(extra_attempts):
+def upstream_conclusions(agent_conclusions: list[AgentConclusion]) -> list[TaskConclusion]:
+    """
+    The distinct TaskConclusions of earlier agents, in order. Each AgentConclusion also carries the context it was
+    given, so concatenating them would repeat every conclusion once per later agent.
+    """
+    return list(dict.fromkeys(tc for ac in agent_conclusions for tc in ac.task_conclusions))
+
+
+class _RunState:
+    """
+    Bookkeeping for one organization run, kept apart from the Organization definition: the message interner
+    shared by its tasks, the histories of the tasks that ran and the retrieval index over their conclusions.
+    """
+
+    def __init__(self) -> None:
+        self.intern: Interner[Message] = Interner()
+        self.histories: list[TaskHistory] = []
+        self.conclusions = ConclusionIndex()
+
+
+_RUN_STATE: contextvars.ContextVar[Optional[_RunState]] = contextvars.ContextVar("gpt_agents_run_state", default=None)
+
+
+def _run_agent_task(
+    agent: Agent,
+    task: Task,
+    tools: Sequence[Tool],
+    system_content: str,
+    task_conclusions: list[TaskConclusion],
+    speculation: Optional[_Speculation],
+    run: TaskRun,
+    intern: Interner[Message],
+) -> TaskConclusion:
+    """
+    Run one of the agent's tasks with the given upstream context: build its prompts, retry on RESET_TASK and run the human input loop.
+    The conversation is built in `run`, starting from task.llm_messages.
+    """
+    max_retries = 3
+    prompts = get_prompts()
+    result = None
+
+    anchor = Conversation(task.llm_messages)
+    if not task.llm_messages:
+        anchor = anchor.append(intern(Message(role=MessageType.SYSTEM, content=system_content)))
+
+    # --- Build user prompt with agent persona, task, and prior context ---
+    user_content = prompts.role_playing_template.format(role=agent.role, goal=agent.goal, backstory=agent.backstory)
+    prompt_parts = [user_content]
+    prompt_parts.append(prompts.instruction_prompt)
+    if task_conclusions:
+        # Explain how context should be used, encourage synthesis rather than repetition
+        prompt_parts.append(prompts.context_explanation_prompt)
+        # Show the context messages as input
+        for tc in task_conclusions:
+            prompt_parts.append(f"{tc.input}\n{tc.output}\n")
+    user_content = "\n\n".join(prompt_parts)
+    anchor = anchor.append(Message(role=MessageType.USER, content=user_content))
+    prompt_parts.append(prompts.current_task_prompt.format(task_description=task.description))
+    full_user_prompt = "\n\n".join(prompt_parts)
+
+    # Retries restart from this prefix; it is shared, not copied
+    anchor = anchor.append(Message(role=MessageType.USER, content=full_user_prompt))
+    # Inline retry logic for initial execution
+    result = None
+    for attempt in range(max_retries):
+        if attempt:
+            EXECUTOR_RETRIES.inc(level="agent_reset")
         try:
-            task.llm_messages.append(
-                Message(
-                    role=MessageType.USER,
-                    content=PROMPTS.force_final_answer_prompt,
+            log_json(logging.DEBUG, "agent_executor.task_attempt", {"agent": agent.role, "task": task.name, "attempt": attempt + 1})
+            run.conversation = anchor
+            with _speculating(speculation):
+                result = task_executor(task=task, tools=tools, run=run)
+            log_json(logging.DEBUG, "agent_executor.task_result", {"agent": agent.role, "task": task.name, "attempt": attempt + 1, "result": result})
+            break
+        except Exception as e:
+            msg = str(e)
+            if "RESET_TASK" in msg:
+                log_json(
+                    logging.INFO,
+                    "agent_executor.reset_task",
+                    {"agent": agent.role, "task": task.name, "attempt": attempt + 1, "error": msg},
                 )
-            )
-            llm_response = call_llm(task.llm_messages)
-            llm_response_text = str(llm_response)
-            final_match = AGENT_FINAL_REGEX.search(llm_response_text)
-            if final_match:
+                continue
+            else:
                 log_json(
                     logging.INFO,
-                    "LLM response parsing:",
-                    {
-                        "attempt": max_attempts + force_attempt,
-                        "Thought": final_match.group("thought").strip(),
-                        "Final Answer": final_match.group("final_answer").strip(),
-                    },
+                    "agent_executor.task_exception",
+                    {"agent": agent.role, "task": task.name, "attempt": attempt + 1, "error": msg},
                 )
-                for _ in range(3):
-                    try:
-                        debug_step(f"Validating final answer for task: {task.name}")
-                        validation_executor(final_match.group("final_answer").strip(), task)
-                        return TaskConclusion(
-                            input=f"Task Name: {task.name}\nTask Description: {task.description}\nTask Expected Output: {task.expected_output}",
-                            output=final_match.group("final_answer").strip(),
+                raise
+    # Human input loop if required
+    if task.require_human_input:
+        for human_round in itertools.count(1):
+            user_input = await_human_input(HumanInputRequest(agent=agent.role, task=task.name, answer=result.output if result else "", round=human_round))
+            if user_input.strip().lower() == "q":
+                break
+            # Add user message and re-run task with retries reset
+            run.append(Message(role=MessageType.USER, content=user_input))
+            anchor = run.conversation
+            # Retry logic for each human input
+            EXECUTOR_RETRIES.inc(level="human_input")
+            for attempt in range(max_retries):
+                if attempt:
+                    EXECUTOR_RETRIES.inc(level="agent_reset")
+                try:
+                    log_json(logging.DEBUG, "agent_executor.task_attempt", {"agent": agent.role, "task": task.name, "attempt": attempt + 1, "human_input": True})
+                    run.conversation = anchor
+                    result = task_executor(task=task, tools=tools, run=run)
+                    log_json(logging.DEBUG, "agent_executor.task_result", {"agent": agent.role, "task": task.name, "attempt": attempt + 1, "result": result, "human_input": True})
+                    break
+                except Exception as e:
+                    msg = str(e)
+                    if "RESET_TASK" in msg:
+                        log_json(
+                            logging.INFO,
+                            "agent_executor.reset_task",
+                            {"agent": agent.role, "task": task.name, "attempt": attempt + 1, "error": msg, "human_input": True},
                         )
-                    except Exception as e:
-                        retry_prompt = PROMPTS.retry_failed_validation_prompt_2.format(exception=str(e))
-                        task.llm_messages.append(Message(role=MessageType.USER, content=retry_prompt))
-                        llm_response = call_llm(task.llm_messages)
-                        llm_response_text = str(llm_response)
-                        task.llm_messages.append(Message(role=MessageType.ASSISTANT, content=llm_response_text.strip()))
-                        final_match = AGENT_FINAL_REGEX.search(llm_response_text)
-                        if not final_match:
-                            raise Exception("Validation failed: No valid final answer. RESET_TASK")
-        except Exception as e:
-            log_json(logging.WARNING, "Forced attempt error:", {"force_attempt": force_attempt, "error": str(e)})
-            continue
-
-    # After all attempts, fail: no valid answer could be obtained
-    raise Exception("Validation failed: No valid final answer. RESET_TASK")
+                        continue
+                    else:
+                        log_json(
+                            logging.INFO,
+                            "agent_executor.task_exception",
+                            {"agent": agent.role, "task": task.name, "attempt": attempt + 1, "error": msg, "human_input": True},
+                        )
+                        raise
+    if not result:
+        raise RuntimeError("Task failed after retries")
+    return result
 
 
+@traced("agent_executor", lambda agent, *args, **kwargs: {"agent": agent.role}, lambda result: {"output": result.output})
 def agent_executor(agent: Agent, agent_conclusions: list[AgentConclusion]) -> AgentConclusion:
     """
     Executes all tasks for the agent sequentially.
     - Builds context from previous AgentConclusion.task_conclusions if provided.
+    - Each task's prompt gets the earlier conclusions most relevant to it (agent.context_k, agent.context_tokens), or all of them with context_k=None;
+      so does the summary task of summary_mode="task", which always gets the agent's own results and retrieves upstream ones for its goal.
     - Handles retry logic for task failures and validation.
+    - With agent.speculative, starts each next task while the previous answer is validated in the background;
+      a failed validation discards the speculative work and redoes the previous task with inline validation.
     Inserts each TaskConclusion at the beginning of the task_conclusions list.
-    Returns an AgentConclusion containing all results.
+    Returns an AgentConclusion containing all results, with the agent's token usage and each new task's own.
+    If the run is interrupted (see gpt_agents_py.deadline), the conclusions finished so far are attached to the
+    RunInterrupted as an AgentConclusion whose output is the last finished task's.
     """
+    own_conclusions: list[TaskConclusion] = []  # This agent's results so far, once validated
+    unconfirmed: list[_PendingSpeculation] = []  # The speculative result whose validation is still running, if any
+    own_histories: list[TaskHistory] = []
+    state = _RUN_STATE.get() or _RunState()
+    usage = UsageMeter()
+    try:
+        with usage_scope(usage):
+            conclusion = _agent_executor(agent, agent_conclusions, own_conclusions, unconfirmed, own_histories, state)
+        return conclusion._replace(usage=usage.usage())
+    except RunInterrupted as e:
+        # A speculative answer only counts if its validation passed before the interruption
+        own_conclusions.extend(p.confirmed() for p in unconfirmed if p.passed_already())
+        if e.partial is None and own_conclusions:
+            last = own_conclusions[-1]
+            context = upstream_conclusions(agent_conclusions)
+            e.partial = AgentConclusion(agent=agent, input=last.input, output=last.output, task_conclusions=context + own_conclusions, usage=usage.usage())
+        raise
+    finally:
+        state.histories.extend(own_histories)
+
+
+def _agent_executor(
+    agent: Agent,
+    agent_conclusions: list[AgentConclusion],
+    own_conclusions: list[TaskConclusion],
+    unconfirmed: list[_PendingSpeculation],
+    own_histories: list[TaskHistory],
+    state: _RunState,
+) -> AgentConclusion:
+    if agent.summary_mode not in SUMMARY_MODES:
+        raise ValueError(f"Unknown summary_mode {agent.summary_mode!r}; expected one of {SUMMARY_MODES}")
     # Build context from previous agent_conclusions' task_conclusions
     task_conclusions: list[TaskConclusion] = []
-
-    tools = agent.tools
-    # --- Build system prompt with tool information if available ---
-    if tools:
-        tool_descriptions = "\n".join(f"- {t.name}: {t.description} (args: {t.args_schema})" for t in tools)
-        tool_names = ", ".join(t.name for t in tools)
-        system_content = PROMPTS.tools_template.format(tools=tool_descriptions, tool_names=tool_names)
-    else:
-        system_content = PROMPTS.no_tools_template
-
-    for ac in agent_conclusions:
-        task_conclusions.extend(ac.task_conclusions)
-
-    for task in agent.tasks:
-        max_retries = 3
-        result = None
-
-        if not task.llm_messages:
-            task.llm_messages.append(Message(role=MessageType.SYSTEM, content=system_content))
-
-        # --- Build user prompt with agent persona, task, and prior context ---
-        user_content = PROMPTS.role_playing_template.format(role=agent.role, goal=agent.goal, backstory=agent.backstory)
-        prompt_parts = [user_content]
-        prompt_parts.append(PROMPTS.instruction_prompt)
-        if task_conclusions:
-            # Explain how context should be used, encourage synthesis rather than repetition
-            prompt_parts.append(PROMPTS.context_explanation_prompt)
-            # Show the context messages as input
-            for tc in task_conclusions:
-                prompt_parts.append(f"{tc.input}\n{tc.output}\n")
-        user_content = "\n\n".join(prompt_parts)
-        task.llm_messages.append(Message(role=MessageType.USER, content=user_content))
-        prompt_parts.append(PROMPTS.current_task_prompt.format(task_description=task.description))
-        full_user_prompt = "\n\n".join(prompt_parts)
-
-        task.llm_messages.append(Message(role=MessageType.USER, content=full_user_prompt))
-        task_llm_messages_anchor = task.llm_messages.copy()
-        # Inline retry logic for initial execution
-        result = None
-        for attempt in range(max_retries):
-            try:
-                log_json(logging.DEBUG, "agent_executor.task_attempt", {"agent": agent.role, "task": task.name, "attempt": attempt + 1})
-                task.llm_messages.clear()
-                task.llm_messages.extend(task_llm_messages_anchor)
-                result = task_executor(task=task, tools=tools)
-                log_json(logging.DEBUG, "agent_executor.task_result", {"agent": agent.role, "task": task.name, "attempt": attempt + 1, "result": result})
-                break
-            except Exception as e:
-                msg = str(e)
-                if "RESET_TASK" in msg:
-                    log_json(
-                        logging.INFO,
-                        "agent_executor.reset_task",
-                        {"agent": agent.role, "task": task.name, "attempt": attempt + 1, "error": msg},
-                    )
-                    continue
+    rolling_summary: Optional[str] = None
+    incremental = agent.summary_mode == "incremental" and not agent.disable_summary
+
+    tools = ToolRegistry(agent.tools, agent.max_tools)
+    prompts = get_prompts()
+    conclusion_cache = get_conclusion_cache()
+    history_store = get_history_store()
+
+    def record_history(task_name: str, conversation: Conversation[Message]) -> None:
+        history = TaskHistory(agent=agent.role, task=task_name, messages=conversation)
+        own_histories.append(history_store.put(history) if history_store is not None else history)
+
+    # --- Build system prompt with tool information if available (per task when tools are selected by relevance) ---
+    system_content = tools_system_prompt(prompts, tools)
+
+    task_conclusions.extend(upstream_conclusions(agent_conclusions))
+
+    speculative = agent.speculative and len(agent.tasks) > 1
+    pending: Optional[_PendingSpeculation] = None  # Previous task, committed while its validation runs in the background
+    no_speculation: set[int] = set()  # Tasks being redone after their speculative validation failed
+    task_idx = 0
+    while task_idx < len(agent.tasks):
+        check_deadline()
+        task = agent.tasks[task_idx]
+        speculation = None
+        if speculative and task_idx < len(agent.tasks) - 1 and not task.require_human_input and task_idx not in no_speculation:
+            speculation = _Speculation()
+        cache = conclusion_cache if not task.require_human_input else None
+        context = list(task_conclusions)
+        run = TaskRun(Conversation(task.llm_messages))
+        task_usage = UsageMeter()
+        cached = False
+        try:
+            result = cache.get(agent, task, context) if cache is not None else None
+            cached = result is not None
+            if cached:
+                speculation = None
+            else:
+                task_tools = tools.select(f"{task.name}\n{task.description}\n{task.expected_output}")
+                task_system_content = system_content if task_tools is tools else tools_system_prompt(prompts, task_tools)
+                if agent.context_k is None:
+                    task_context = task_conclusions
                 else:
-                    log_json(
-                        logging.INFO,
-                        "agent_executor.task_exception",
-                        {"agent": agent.role, "task": task.name, "attempt": attempt + 1, "error": msg},
-                    )
-                    raise
-        # Human input loop if required
-        if task.require_human_input:
-            while True:
-                user_input = input(f"\n[Human Input Required for task '{task.name}']\nEnter additional guidance (or 'q' to finish): ")
-                if user_input.strip().lower() == "q":
-                    break
-                # Add user message and re-run task with retries reset
-                task.llm_messages.append(Message(role=MessageType.USER, content=user_input))
-                task_llm_messages_anchor = task.llm_messages.copy()
-                # Retry logic for each human input
-                for attempt in range(max_retries):
-                    try:
-                        log_json(logging.DEBUG, "agent_executor.task_attempt", {"agent": agent.role, "task": task.name, "attempt": attempt + 1, "human_input": True})
-                        task.llm_messages.clear()
-                        task.llm_messages.extend(task_llm_messages_anchor)
-                        result = task_executor(task=task, tools=tools)
-                        log_json(
-                            logging.DEBUG, "agent_executor.task_result", {"agent": agent.role, "task": task.name, "attempt": attempt + 1, "result": result, "human_input": True}
-                        )
-                        break
-                    except Exception as e:
-                        msg = str(e)
-                        if "RESET_TASK" in msg:
-                            log_json(
-                                logging.INFO,
-                                "agent_executor.reset_task",
-                                {"agent": agent.role, "task": task.name, "attempt": attempt + 1, "error": msg, "human_input": True},
-                            )
-                            continue
-                        else:
-                            log_json(
-                                logging.INFO,
-                                "agent_executor.task_exception",
-                                {"agent": agent.role, "task": task.name, "attempt": attempt + 1, "error": msg, "human_input": True},
-                            )
-                            raise
-        if not result:
-            raise RuntimeError("Task failed after retries")
+                    task_context = state.conclusions.select(f"{task.name}\n{task.description}\n{task.expected_output}", task_conclusions, agent.context_k, agent.context_tokens)
+                with usage_scope(task_usage):
+                    result = _run_agent_task(agent, task, task_tools, task_system_content, task_context, speculation, run, state.intern)
+                result = result._replace(usage=task_usage.usage())
+        except Exception:
+            # A failure may come from building on a bad speculative answer; only re-raise if that answer was valid
+            if pending is None or pending.passed():
+                raise
+            result = None
+        if pending is not None:
+            if not pending.passed():
+                # Throw away this task's work and redo the previous task with inline validation
+                SPECULATIONS.inc(outcome="miss")
+                SPECULATIVE_WASTED_CALLS.inc(sum(1 for m in run.conversation[len(task.llm_messages) :] if m.role is MessageType.ASSISTANT))
+                log_json(logging.INFO, "agent_executor.speculation_miss", {"agent": agent.role, "task": agent.tasks[pending.task_idx].name})
+                del task_conclusions[-1], unconfirmed[:]
+                discarded = own_histories.pop()
+                if history_store is not None:
+                    history_store.discard(discarded)
+                rolling_summary = pending.rolling_summary
+                no_speculation.add(pending.task_idx)
+                task_idx, pending = pending.task_idx, None
+                continue
+            SPECULATIONS.inc(outcome="hit")
+            confirmed = task_conclusions[-1] = pending.confirmed()
+            if conclusion_cache is not None:
+                conclusion_cache.put(agent, agent.tasks[pending.task_idx], pending.context, confirmed)
+            own_conclusions.append(confirmed)
+            del unconfirmed[:]
+            pending = None
+        assert result is not None
         task_conclusions.append(result)
+        if speculation is not None and speculation.verdict is not None:
+            # Only memoize or report a speculative answer once its validation has passed
+            pending = _PendingSpeculation(task_idx, speculation, rolling_summary, context, result, task_usage)
+            unconfirmed.append(pending)
+        else:
+            if cache is not None and not cached:
+                cache.put(agent, task, context, result)
+            own_conclusions.append(result)
+        if not cached:
+            record_history(task.name, run.conversation)
+        if incremental:
+            rolling_summary = update_rolling_summary(agent, rolling_summary, result)
+        task_idx += 1
 
     # If disable_summary is set, return only the last task's output
     disable_summary = agent.disable_summary
     if disable_summary and task_conclusions:
         last_task = task_conclusions[-1]
         return AgentConclusion(agent=agent, input=last_task.input, output=last_task.output, task_conclusions=task_conclusions)
-    # Otherwise, run summary task as before
     if not task_conclusions:
         raise RuntimeError("No task conclusions available to summarize.")
+    if agent.summary_mode != "task" and own_conclusions:
+        summary = summary_executor(agent, own_conclusions, rolling_summary)
+        return AgentConclusion(agent=agent, input=summary.input, output=summary.output, task_conclusions=task_conclusions)
+    # Legacy "task" mode: run the summary as a full task, with retries and validation, over all of the agent's own
+    # results and the upstream conclusions most relevant to the goal that fit in the rest of the context budget
+    if agent.context_k is None:
+        summary_sources = task_conclusions
+    else:
+        own = set(own_conclusions)
+        left = agent.context_tokens - sum(estimate_tokens(_context_text(tc)) for tc in own_conclusions)
+        upstream = [tc for tc in task_conclusions if tc not in own]
+        summary_sources = (state.conclusions.select(agent.goal, upstream, agent.context_k, left) if left > 0 else []) + own_conclusions
     summary_task = Task(
         name="Summary",
-        description=PROMPTS.summary_task_description_prompt.format(goal=agent.goal),
+        description=prompts.summary_task_description_prompt.format(goal=agent.goal),
         expected_output=agent.goal,
         llm_messages=[
-            Message(role=MessageType.SYSTEM, content=PROMPTS.no_tools_template),
+            Message(role=MessageType.SYSTEM, content=prompts.no_tools_template),
             Message(
                 role=MessageType.USER,
-                content=PROMPTS.role_playing_template.format(
-                    role="Summary", goal="Summarize the results of the previous tasks and provide a final answer.", backstory="\n\n".join(tc.output for tc in task_conclusions)
+                content=prompts.role_playing_template.format(
+                    role="Summary", goal="Summarize the results of the previous tasks and provide a final answer.", backstory="\n\n".join(tc.output for tc in summary_sources)
                 ),
             ),
         ],
     )
-    summary = task_executor(task=summary_task, tools=[])
+    summary_run = TaskRun(Conversation(summary_task.llm_messages))
+    summary = task_executor(task=summary_task, tools=[], run=summary_run)
+    record_history(summary_task.name, summary_run.conversation)
     return AgentConclusion(agent=agent, input=summary.input, output=summary.output, task_conclusions=task_conclusions)
 
 
-def organization_executor(org: Organization) -> Optional[OrganizationConclusion]:
+@traced("organization_executor", lambda org, *args, **kwargs: {"agents": len(org.agents)})
+def organization_executor(org: Organization, deadline: Optional[Deadline] = None, context: Optional[RunContext] = None) -> Optional[OrganizationConclusion]:
     """
     Executes each agent in the organization in order, passing all previous agents' conclusions as context to the next.
-    Returns an OrganizationConclusion with the final output from the last agent and all agent conclusions.
+    Returns an OrganizationConclusion with the final output from the last agent, all agent conclusions and the run's token usage.
     Optionally supports a callback after each agent.
+    With a `deadline` (or one already active via deadline_scope), expiry or cancellation stops the run at the next
+    LLM call, tool call or task boundary and returns the conclusions finished so far, with `interrupted` set to the reason.
+    Returns None if nothing had finished.
+    A `context` installs a RunContext (prompts, caller, limits, ...) for this run only; its deadline is used if none is given.
     """
     agent_conclusions: list[AgentConclusion] = []
-    for agent in org.agents:
-        agent_conclusion = agent_executor(agent=agent, agent_conclusions=agent_conclusions)
-        agent_conclusions.append(agent_conclusion)
+    interrupted = None
+    state = _RunState()
+    usage = UsageMeter()
+    token = _RUN_STATE.set(state)
+    try:
+        with use_run_context(context) as run_context, usage_scope(usage):
+            if deadline is None:
+                deadline = run_context.deadline if run_context is not None and run_context.deadline is not None else current_deadline()
+            with deadline_scope(deadline):
+                for agent in org.agents:
+                    agent_conclusion = agent_executor(agent=agent, agent_conclusions=agent_conclusions)
+                    agent_conclusions.append(agent_conclusion)
+    except RunInterrupted as e:
+        interrupted = e.reason
+        RUN_INTERRUPTIONS.inc(reason=e.reason)
+        if isinstance(e.partial, AgentConclusion):
+            agent_conclusions.append(e.partial)
+        log_json(logging.WARNING, "organization_executor.interrupted", {"reason": e.reason, "agents_finished": len(agent_conclusions)})
+    finally:
+        _RUN_STATE.reset(token)
     for agent_conclusion in agent_conclusions[::-1]:
         return OrganizationConclusion(
             final_conclusion=agent_conclusion.task_conclusions[-1],
             agent_conclusions=agent_conclusions,
             context=[],
+            interrupted=interrupted,
+            histories=tuple(state.histories),
+            usage=usage.usage(),
         )
     return None
 
@@ -0,0 +1,296 @@
+# gpt_agents_py | James Delancey | MIT License
+import bisect
+import http.server
+import threading
+from typing import Callable, Iterable, Optional, Union
+
+LabelValues = tuple[str, ...]
+MetricsListener = Callable[[str, dict[str, str], float], None]
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: tuple[str, ...], values: LabelValues, extra: Optional[tuple[str, str]] = None) -> str:
+    pairs = [f'{k}="{_escape_label_value(v)}"' for k, v in zip(labelnames, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, labelnames: Iterable[str]) -> None:
+        self._registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric '{self.name}' expects labels {list(self.labelnames)}, got {sorted(labels)}")
+        return tuple(str(labels[k]) for k in self.labelnames)
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing counter, partitioned by label values.
+    """
+
+    kind = "counter"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(registry, name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, /, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError(f"Counter '{self.name}' can only be incremented by non-negative amounts")
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+        self._registry._notify(self.name, labels, amount)
+
+    def get(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._label_values(labels), 0.0)
+
+    def samples(self) -> dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in sorted(self.samples().items())]
+
+
+class _HistogramState:
+    def __init__(self, n_buckets: int) -> None:
+        self.bucket_counts = [0] * n_buckets
+        self.count = 0
+        self.total = 0.0
+
+
+class Histogram(_Metric):
+    """
+    Cumulative-bucket histogram (Prometheus semantics), partitioned by label values.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._states: dict[LabelValues, _HistogramState] = {}
+
+    def observe(self, value: float, /, **labels: str) -> None:
+        key = self._label_values(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                state = self._states[key] = _HistogramState(len(self.buckets))
+            if idx < len(self.buckets):
+                state.bucket_counts[idx] += 1
+            state.count += 1
+            state.total += value
+        self._registry._notify(self.name, labels, value)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            state = self._states.get(self._label_values(labels))
+            return state.count if state else 0
+
+    def quantile(self, q: float, /, **labels: str) -> float:
+        """
+        Estimate the q-quantile (0..1) from bucket counts by linear interpolation, as Prometheus' histogram_quantile does.
+        """
+        with self._lock:
+            state = self._states.get(self._label_values(labels))
+            if state is None or state.count == 0:
+                return 0.0
+            counts = list(state.bucket_counts)
+            total = state.count
+        rank = q * total
+        cumulative = 0
+        lower = 0.0
+        for upper, n in zip(self.buckets, counts):
+            if cumulative + n >= rank and n > 0:
+                return lower + (upper - lower) * ((rank - cumulative) / n)
+            cumulative += n
+            lower = upper
+        return self.buckets[-1] if self.buckets else 0.0
+
+    def render(self) -> list[str]:
+        lines: list[str] = []
+        with self._lock:
+            states = {k: (list(s.bucket_counts), s.count, s.total) for k, s in self._states.items()}
+        for key, (counts, count, total) in sorted(states.items()):
+            cumulative = 0
+            for upper, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', _format_value(upper)))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Thread-safe collection of counters and histograms.
+    Exposes a Prometheus text rendering and a listener callback for push-style consumers.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: dict[str, Union[Counter, Histogram]] = {}
+        self._listeners: list[MetricsListener] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        with self._lock:
+            existing = self._metrics.get(name)
+            if existing is not None:
+                if not isinstance(existing, Counter):
+                    raise ValueError(f"Metric '{name}' is already registered as a {existing.kind}")
+                return existing
+            metric = Counter(self, name, documentation, labelnames)
+            self._metrics[name] = metric
+            return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        with self._lock:
+            existing = self._metrics.get(name)
+            if existing is not None:
+                if not isinstance(existing, Histogram):
+                    raise ValueError(f"Metric '{name}' is already registered as a {existing.kind}")
+                return existing
+            metric = Histogram(self, name, documentation, labelnames, buckets)
+            self._metrics[name] = metric
+            return metric
+
+    def add_listener(self, listener: MetricsListener) -> None:
+        """
+        Register a callback invoked as listener(metric_name, labels, value) for every increment or observation.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: MetricsListener) -> None:
+        with self._lock:
+            self._listeners.remove(listener)
+
+    def _notify(self, name: str, labels: dict[str, str], value: float) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(name, labels, value)
+            except Exception:
+                # A broken listener must never break an agent run
+                pass
+
+    def reset(self) -> None:
+        """
+        Clear all recorded values, keeping metric definitions and listeners.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for m in metrics:
+            with m._lock:
+                if isinstance(m, Counter):
+                    m._values.clear()
+                elif isinstance(m, Histogram):
+                    m._states.clear()
+
+    def render_prometheus(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format (version 0.0.4).
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines: list[str] = []
+        for m in metrics:
+            lines.append(f"# HELP {m.name} {m.documentation}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+LLM_CALLS = METRICS.counter("gpt_agents_llm_calls_total", "LLM calls by provider, model and status.", ("provider", "model", "status"))
+LLM_TOKENS = METRICS.counter("gpt_agents_llm_tokens_total", "LLM tokens by provider, model and direction (input/output).", ("provider", "model", "direction"))
+LLM_LATENCY = METRICS.histogram("gpt_agents_llm_latency_seconds", "LLM call latency in seconds, including transport retries.", ("provider", "model"))
+LLM_COALESCED = METRICS.counter("gpt_agents_llm_coalesced_total", "LLM calls served by an identical in-flight call instead of a new request.", ("provider", "model"))
+APPROX_CACHE = METRICS.counter("gpt_agents_llm_approx_cache_total", "Near-duplicate LLM cache lookups by call kind and result (hit/miss).", ("kind", "result"))
+APPROX_CACHE_SIMILARITY = METRICS.histogram(
+    "gpt_agents_llm_approx_cache_similarity",
+    "Best cached similarity per near-duplicate cache lookup, by call kind.",
+    ("kind",),
+    buckets=(0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.99, 1.0),
+)
+LLM_QUEUE_WAIT = METRICS.histogram("gpt_agents_llm_queue_wait_seconds", "Time LLM calls waited in the scheduler queue, by priority class.", ("priority_class",))
+PROMPT_OVERFLOWS = METRICS.counter(
+    "gpt_agents_prompt_overflows_total", "Prompts over the caller's max_prompt_tokens, by action taken before sending (trimmed/rejected).", ("action",)
+)
+LLM_RETRIES = METRICS.counter("gpt_agents_llm_retries_total", "Transport-level LLM retries by provider and model.", ("provider", "model"))
+TOOL_CALLS = METRICS.counter("gpt_agents_tool_calls_total", "Tool invocations by tool and status.", ("tool", "status"))
+TOOL_LATENCY = METRICS.histogram("gpt_agents_tool_latency_seconds", "Tool function latency in seconds.", ("tool",))
+ACTION_REPEATS = METRICS.counter("gpt_agents_action_repeats_total", "Tool calls repeating an earlier call of the same task, by pattern (repeat/oscillation).", ("pattern",))
+TOOL_CACHE_HITS = METRICS.counter("gpt_agents_tool_cache_hits_total", "Repeated tool calls answered with the earlier observation instead of calling the tool.", ("tool",))
+LOOP_FORCED_ANSWERS = METRICS.counter("gpt_agents_loop_forced_answers_total", "Task loops switched to forced-final-answer mode early because of repeated actions.")
+TOOL_SELECTION_FALLBACKS = METRICS.counter("gpt_agents_tool_selection_fallbacks_total", "Calls to catalog tools that relevance selection left out of the task's prompt.", ("tool",))
+RATE_LIMIT_WAIT = METRICS.histogram("gpt_agents_rate_limit_wait_seconds", "Time LLM requests spent blocked by a rate limiter, by API key name.", ("key",))
+CONCLUSION_CACHE = METRICS.counter("gpt_agents_conclusion_cache_total", "Task conclusion cache lookups by result (hit/miss).", ("result",))
+VALIDATIONS = METRICS.counter("gpt_agents_validations_total", "Validation verdicts by result (pass/fail).", ("result",))
+VALIDATION_BATCHES = METRICS.histogram("gpt_agents_validation_batch_size", "Validations merged into each batched validation call.", buckets=(2, 4, 8, 16, 32, 64))
+SPECULATIONS = METRICS.counter("gpt_agents_speculations_total", "Speculatively started tasks by outcome (hit: previous answer validated, miss: work discarded).", ("outcome",))
+SPECULATIVE_WASTED_CALLS = METRICS.counter("gpt_agents_speculative_wasted_calls_total", "LLM turns of speculative task runs that were discarded.")
+HUMAN_INPUTS = METRICS.counter("gpt_agents_human_inputs_total", "Human input requests by outcome (answered/timeout).", ("outcome",))
+HUMAN_INPUT_WAIT = METRICS.histogram("gpt_agents_human_input_wait_seconds", "Time tasks waited for human input.", buckets=(1, 10, 60, 300, 1800, 3600, 14400))
+RUN_INTERRUPTIONS = METRICS.counter(
+    "gpt_agents_run_interruptions_total", "Organization runs stopped early with a partial result, by reason (deadline/cancelled/budget).", ("reason",)
+)
+EXECUTOR_RETRIES = METRICS.counter(
+    "gpt_agents_executor_retries_total", "Retries by executor level (task_attempt, validation, forced_answer, agent_reset, human_input).", ("level",)
+)
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    registry: MetricsRegistry = METRICS
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        # Scrapes are frequent; keep them out of the agent logs
+        pass
+
+
+def start_metrics_server(port: int = 9464, host: str = "127.0.0.1", registry: MetricsRegistry = METRICS) -> http.server.ThreadingHTTPServer:
+    """
+    Serve registry.render_prometheus() at http://host:port/metrics from a daemon thread.
+    Returns the server; call server.shutdown() to stop it. Pass port=0 to pick a free port (see server.server_address).
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = http.server.ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, name="gpt-agents-metrics", daemon=True)
+    thread.start()
+    return server
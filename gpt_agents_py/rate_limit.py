@@ -0,0 +1,177 @@
+# gpt_agents_py | James Delancey | MIT License
+import collections
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from gpt_agents_py.deadline import deadline_sleep
+from gpt_agents_py.metrics import RATE_LIMIT_WAIT
+
+
+class QuotaUsage(NamedTuple):
+    key: str
+    requests: int  # Requests started within the window
+    tokens: int  # Tokens reported within the window
+    window: float
+
+
+class RateLimiter:
+    """
+    Gate in front of every LLM request, bucketed by API key name (as in api_key.json). acquire() blocks until a
+    request may start and counts it; record_tokens() reports the tokens it used once known.
+    The base class admits every request and tracks nothing; InProcessRateLimiter and SQLiteRateLimiter enforce limits.
+    """
+
+    window = 60.0
+
+    def _try_acquire(self, key: str, now: float) -> float:
+        """
+        Count a request and return 0.0 if the limits allow it, else return the seconds to wait before trying again.
+        """
+        return 0.0
+
+    def record_tokens(self, key: str, tokens: int) -> None:
+        pass
+
+    def usage(self, key: str) -> QuotaUsage:
+        return QuotaUsage(key, 0, 0, self.window)
+
+    def acquire(self, key: str) -> float:
+        """
+        Block until a request for `key` is allowed. Returns the seconds spent waiting.
+        Raises RunInterrupted if the active deadline expires or is cancelled while waiting.
+        """
+        waited = 0.0
+        while True:
+            delay = self._try_acquire(key, time.time())
+            if delay <= 0:
+                if waited:
+                    RATE_LIMIT_WAIT.observe(waited, key=key)
+                return waited
+            deadline_sleep(delay)
+            waited += delay
+
+
+class _SlidingWindowRateLimiter(RateLimiter):
+    """
+    Requests-per-minute and tokens-per-minute limits over a sliding window.
+    The token limit gates on usage already reported: one in-flight request may overshoot it.
+    A limit of None disables that dimension.
+    """
+
+    def __init__(self, rpm: Optional[int] = None, tpm: Optional[int] = None, window: float = 60.0) -> None:
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window = window
+
+    def _wait_time(self, now: float, request_times: list[float], token_events: list[tuple[float, int]]) -> float:
+        # request_times and token_events hold in-window entries, oldest first
+        waits = [0.0]
+        if self.rpm is not None and len(request_times) >= self.rpm:
+            waits.append(request_times[len(request_times) - self.rpm] + self.window - now)
+        if self.tpm is not None:
+            excess = sum(n for _, n in token_events) - self.tpm
+            for ts, n in token_events:
+                if excess < 0:
+                    break
+                excess -= n
+                waits.append(ts + self.window - now)
+        # Small floor so a boundary timestamp has left the window when we retry
+        return max(waits) + 0.001 if max(waits) > 0 else 0.0
+
+
+class InProcessRateLimiter(_SlidingWindowRateLimiter):
+    """
+    Sliding-window limiter shared by the threads of one process.
+    """
+
+    def __init__(self, rpm: Optional[int] = None, tpm: Optional[int] = None, window: float = 60.0) -> None:
+        super().__init__(rpm, tpm, window)
+        self._lock = threading.Lock()
+        self._requests: dict[str, collections.deque[float]] = collections.defaultdict(collections.deque)
+        self._tokens: dict[str, collections.deque[tuple[float, int]]] = collections.defaultdict(collections.deque)
+
+    def _expire(self, key: str, now: float) -> None:
+        requests, tokens = self._requests[key], self._tokens[key]
+        while requests and now - requests[0] >= self.window:
+            requests.popleft()
+        while tokens and now - tokens[0][0] >= self.window:
+            tokens.popleft()
+
+    def _try_acquire(self, key: str, now: float) -> float:
+        with self._lock:
+            self._expire(key, now)
+            delay = self._wait_time(now, list(self._requests[key]), list(self._tokens[key]))
+            if delay <= 0:
+                self._requests[key].append(now)
+            return delay
+
+    def record_tokens(self, key: str, tokens: int) -> None:
+        if tokens > 0:
+            with self._lock:
+                self._tokens[key].append((time.time(), tokens))
+
+    def usage(self, key: str) -> QuotaUsage:
+        with self._lock:
+            self._expire(key, time.time())
+            return QuotaUsage(key, len(self._requests[key]), sum(n for _, n in self._tokens[key]), self.window)
+
+
+class SQLiteRateLimiter(_SlidingWindowRateLimiter):
+    """
+    Sliding-window limiter shared by every process on the host that opens the same database file.
+    Each request and token report is a row; BEGIN IMMEDIATE serializes the check-and-count across processes.
+    usage() and usage_all() read the same table, so every process sees the combined quota use per key.
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS rate_events (key TEXT NOT NULL, ts REAL NOT NULL, requests INTEGER NOT NULL, tokens INTEGER NOT NULL);
+    CREATE INDEX IF NOT EXISTS rate_events_key_ts ON rate_events (key, ts);
+    """
+
+    def __init__(self, path: str, rpm: Optional[int] = None, tpm: Optional[int] = None, window: float = 60.0, busy_timeout: float = 30.0) -> None:
+        super().__init__(rpm, tpm, window)
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._conn().executescript(self._SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _try_acquire(self, key: str, now: float) -> float:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM rate_events WHERE ts <= ?", (now - self.window,))
+            rows = conn.execute("SELECT ts, requests, tokens FROM rate_events WHERE key = ? ORDER BY ts", (key,)).fetchall()
+            delay = self._wait_time(now, [ts for ts, r, _ in rows if r], [(ts, n) for ts, _, n in rows if n])
+            if delay <= 0:
+                conn.execute("INSERT INTO rate_events (key, ts, requests, tokens) VALUES (?, ?, 1, 0)", (key, now))
+            conn.execute("COMMIT")
+            return delay
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def record_tokens(self, key: str, tokens: int) -> None:
+        if tokens > 0:
+            self._conn().execute("INSERT INTO rate_events (key, ts, requests, tokens) VALUES (?, ?, 0, ?)", (key, time.time(), tokens))
+
+    def usage(self, key: str) -> QuotaUsage:
+        row = (
+            self._conn()
+            .execute("SELECT COALESCE(SUM(requests), 0), COALESCE(SUM(tokens), 0) FROM rate_events WHERE key = ? AND ts > ?", (key, time.time() - self.window))
+            .fetchone()
+        )
+        return QuotaUsage(key, int(row[0]), int(row[1]), self.window)
+
+    def usage_all(self) -> list[QuotaUsage]:
+        rows = self._conn().execute("SELECT key, SUM(requests), SUM(tokens) FROM rate_events WHERE ts > ? GROUP BY key ORDER BY key", (time.time() - self.window,)).fetchall()
+        return [QuotaUsage(key, int(r), int(n), self.window) for key, r, n in rows]
@@ -0,0 +1,106 @@
+# gpt_agents_py | James Delancey | MIT License
+import contextlib
+import contextvars
+import re
+import threading
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+MESSAGE_OVERHEAD = 4  # Role and separator tokens chat formats add around each message
+PROMPT_OVERHEAD = 3  # ... and around the whole prompt (the assistant reply primer)
+
+_PIECE_REGEX = re.compile(r"[^\W\d_]+|\d+|\S")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Token count of `text` from a BPE-like heuristic, without a tokenizer: short ASCII words are one token and longer
+    ones one per six characters, digits go in groups of three, other non-ASCII words one per three UTF-8 bytes
+    (about one per CJK character), and every other non-space character is a token. An approximation that tends to
+    overcount slightly; leave headroom when comparing it with a provider's hard limit.
+    """
+    count = 0
+    for piece in _PIECE_REGEX.findall(text):
+        if piece[0].isdigit():
+            count += (len(piece) + 2) // 3
+        elif len(piece) == 1:
+            count += 1
+        elif piece.isascii():
+            count += (len(piece) + 5) // 6
+        else:
+            count += (len(piece.encode("utf-8")) + 2) // 3
+    return count
+
+
+def estimate_prompt_tokens(contents: Iterable[str]) -> int:
+    """
+    Estimated input tokens of a chat prompt with the given message contents, including per-message overhead.
+    """
+    return sum(estimate_tokens(c) + MESSAGE_OVERHEAD for c in contents) + PROMPT_OVERHEAD
+
+
+class TokenUsage(NamedTuple):
+    llm_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    total_tokens: int = 0
+    estimated_calls: int = 0  # Calls whose provider reported no usage; their tokens are local estimates
+
+
+class UsageMeter:
+    """
+    Running TokenUsage of one scope (a task, agent or organization run), updated by call_llm from any thread.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._usage = TokenUsage()
+
+    def add(self, input_tokens: int, output_tokens: int, total_tokens: int, estimated: bool = False) -> None:
+        with self._lock:
+            u = self._usage
+            self._usage = TokenUsage(u.llm_calls + 1, u.input_tokens + input_tokens, u.output_tokens + output_tokens, u.total_tokens + total_tokens, u.estimated_calls + estimated)
+
+    def usage(self) -> TokenUsage:
+        with self._lock:
+            return self._usage
+
+
+_METERS: contextvars.ContextVar[tuple[UsageMeter, ...]] = contextvars.ContextVar("gpt_agents_usage_meters", default=())
+
+
+@contextlib.contextmanager
+def usage_scope(meter: Optional[UsageMeter] = None) -> Iterator[UsageMeter]:
+    """
+    Count the LLM calls made inside the block (and in threads started with a copied context) on `meter`, or a new
+    UsageMeter, in addition to every enclosing scope's meter.
+    """
+    if meter is None:
+        meter = UsageMeter()
+    token = _METERS.set(_METERS.get() + (meter,))
+    try:
+        yield meter
+    finally:
+        _METERS.reset(token)
+
+
+@contextlib.contextmanager
+def isolated_usage() -> Iterator[UsageMeter]:
+    """
+    Count the LLM calls made inside the block on a new UsageMeter only, not on the enclosing scopes', for work done
+    on behalf of other scopes (see current_meters).
+    """
+    meter = UsageMeter()
+    token = _METERS.set((meter,))
+    try:
+        yield meter
+    finally:
+        _METERS.reset(token)
+
+
+def current_meters() -> tuple[UsageMeter, ...]:
+    return _METERS.get()
+
+
+def record_usage(input_tokens: int, output_tokens: int, total_tokens: int, estimated: bool = False) -> None:
+    for meter in _METERS.get():
+        meter.add(input_tokens, output_tokens, total_tokens, estimated)
@@ -0,0 +1,177 @@
+# gpt_agents_py | James Delancey | MIT License
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, NamedTuple, Optional, ParamSpec, TypeVar
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+class Span(NamedTuple):
+    name: str
+    span_id: int
+    parent_id: Optional[int]
+    start: float  # time.perf_counter() at span start
+    thread_id: int
+    attributes: dict[str, object]
+
+
+class SpanEvent(NamedTuple):
+    phase: str  # "start" or "end"
+    span: Span
+    end: Optional[float] = None  # time.perf_counter() at span end, only for "end" events
+    duration: Optional[float] = None  # seconds, only for "end" events
+    error: Optional[str] = None  # exception type and message if the span body raised
+
+
+Hook = Callable[[SpanEvent], None]
+
+_HOOKS: list[Hook] = []
+_HOOKS_LOCK = threading.Lock()
+_SPAN_IDS = itertools.count(1)
+_CURRENT_SPAN: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("gpt_agents_current_span", default=None)
+
+
+def add_hook(hook: Hook) -> None:
+    """
+    Register a callback receiving a SpanEvent at the start and end of every traced executor step.
+    """
+    with _HOOKS_LOCK:
+        _HOOKS.append(hook)
+
+
+def remove_hook(hook: Hook) -> None:
+    with _HOOKS_LOCK:
+        _HOOKS.remove(hook)
+
+
+def current_span() -> Optional[Span]:
+    """
+    Return the innermost active span in this thread/context, or None outside of any run.
+    """
+    return _CURRENT_SPAN.get()
+
+
+def _emit(event: SpanEvent) -> None:
+    for hook in list(_HOOKS):
+        try:
+            hook(event)
+        except Exception:
+            # Profiling must never break an agent run
+            pass
+
+
+@contextmanager
+def span(name: str, **attributes: object) -> Iterator[Span]:
+    """
+    Open a span named `name` as a child of the current span and emit start/end events to the registered hooks.
+    Spans nest through contextvars: organization -> agent -> task -> attempt -> call_llm / tool_executor / validation_executor.
+    Worker threads inherit the parent only if started with contextvars.copy_context().run(...).
+    """
+    parent = _CURRENT_SPAN.get()
+    s = Span(
+        name=name,
+        span_id=next(_SPAN_IDS),
+        parent_id=parent.span_id if parent else None,
+        start=time.perf_counter(),
+        thread_id=threading.get_ident(),
+        attributes=attributes,
+    )
+    token = _CURRENT_SPAN.set(s)
+    if _HOOKS:
+        _emit(SpanEvent(phase="start", span=s))
+    error: Optional[str] = None
+    try:
+        yield s
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _CURRENT_SPAN.reset(token)
+        if _HOOKS:
+            end = time.perf_counter()
+            _emit(SpanEvent(phase="end", span=s, end=end, duration=end - s.start, error=error))
+
+
+def traced(
+    name: str, attributes: Optional[Callable[..., dict[str, object]]] = None, result_attributes: Optional[Callable[[Any], dict[str, object]]] = None
+) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """
+    Decorator running the wrapped function inside span(name). `attributes` receives the call's arguments and returns span attributes.
+    `result_attributes` receives the return value; its attributes are added to the span before the "end" event (only while hooks are registered).
+    """
+
+    def decorator(func: Callable[P, R]) -> Callable[P, R]:
+        @functools.wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            attrs = attributes(*args, **kwargs) if attributes else {}
+            with span(name, **attrs) as s:
+                result = func(*args, **kwargs)
+                if result_attributes is not None and _HOOKS:
+                    s.attributes.update(result_attributes(result))
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+class ChromeTraceExporter:
+    """
+    Hook that collects finished spans as Chrome trace-event "complete" events.
+    Load the written file in chrome://tracing, Perfetto or speedscope for a flamegraph view.
+
+        exporter = ChromeTraceExporter()
+        add_hook(exporter)
+        organization_executor(org)
+        exporter.write("trace.json")
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._events: list[dict[str, Any]] = []
+        self._pid = os.getpid()
+
+    def __call__(self, event: SpanEvent) -> None:
+        if event.phase != "end" or event.duration is None:
+            return
+        s = event.span
+        args: dict[str, Any] = {k: v if isinstance(v, (str, int, float, bool)) or v is None else repr(v) for k, v in s.attributes.items()}
+        args["span_id"] = s.span_id
+        args["parent_id"] = s.parent_id
+        if event.error:
+            args["error"] = event.error
+        with self._lock:
+            self._events.append(
+                {
+                    "name": s.name,
+                    "cat": "gpt_agents",
+                    "ph": "X",
+                    "ts": s.start * 1e6,
+                    "dur": event.duration * 1e6,
+                    "pid": self._pid,
+                    "tid": s.thread_id,
+                    "args": args,
+                }
+            )
+
+    def events(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return list(self._events)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._events.clear()
+
+    def to_json(self) -> str:
+        return json.dumps({"traceEvents": sorted(self.events(), key=lambda e: e["ts"]), "displayTimeUnit": "ms"})
+
+    def write(self, path: str) -> None:
+        with open(path, "w") as f:
+            f.write(self.to_json())
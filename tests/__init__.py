@@ -0,0 +1 @@
+# gpt_agents_py | James Delancey | MIT License
@@ -0,0 +1,44 @@
+# gpt_agents_py | James Delancey | MIT License
+import unittest
+from typing import Any, Callable, Optional
+
+from gpt_agents_py.gpt_agents import (
+    Agent,
+    Organization,
+    Task,
+    Tool,
+    get_llm_caller,
+    set_llm_caller,
+)
+
+
+def lookup_tool(func: Callable[[dict[str, Any]], str] = lambda args: "67000000", **kwargs: Any) -> Tool:
+    """
+    The lookup tool the scripted caller asks for, answering with `func`. Extra keyword arguments go to Tool.
+    """
+    return Tool(name="lookup", description="Lookup.", args_schema="{key: string}", func=func, **kwargs)
+
+
+LOOKUP = lookup_tool()
+
+
+def build_agent(n_tasks: int = 2, role: str = "Analyst", tools: Optional[list[Tool]] = None, **kwargs: Any) -> Agent:
+    """
+    Test agent with tasks t0, t1, ... that each look up a number with the lookup tool. Extra keyword arguments go to Agent.
+    """
+    tasks = [Task(name=f"t{i}", description=f"Step {i}.", expected_output="A number.", llm_messages=[]) for i in range(n_tasks)]
+    return Agent(role=role, goal="Report.", backstory="Facts.", tasks=tasks, tools=[LOOKUP] if tools is None else tools, **kwargs)
+
+
+def build_organization(n_tasks: int = 2, roles: tuple[str, ...] = ("Analyst",), **kwargs: Any) -> Organization:
+    """
+    Test organization of one build_agent per role.
+    """
+    return Organization(agents=[build_agent(n_tasks, role, **kwargs) for role in roles])
+
+
+def keep_llm_caller(test: unittest.TestCase) -> None:
+    """
+    Put the process-wide LLM caller back when `test` ends, so a caller set by one test never leaks into the next.
+    """
+    test.addCleanup(set_llm_caller, get_llm_caller())
@@ -0,0 +1,79 @@
+# gpt_agents_py | James Delancey | MIT License
+import unittest
+
+from gpt_agents_py.conversation import Conversation
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.gpt_agents import (
+    ActionHistory,
+    Message,
+    MessageType,
+    RunContext,
+    Task,
+    TaskRun,
+    Tool,
+    get_prompts,
+    task_executor,
+    use_run_context,
+)
+from gpt_agents_py.metrics import ACTION_REPEATS, LOOP_FORCED_ANSWERS, TOOL_CACHE_HITS
+
+FINAL = "Thought: I now know the final answer\nFinal Answer: 67000000"
+
+
+def action(name: str, key: str = "france") -> str:
+    return f'Thought: Check {name}.\nAction: {name}\nAction Input: {{"key": "{key}"}}'
+
+
+class TestActionLoops(unittest.TestCase):
+    def setUp(self) -> None:
+        self.calls: list[str] = []
+
+    def tool(self, name: str, idempotent: bool = True) -> Tool:
+        def func(args: dict[str, str]) -> str:
+            self.calls.append(name)
+            return "67000000"
+
+        return Tool(name=name, description="Lookup.", args_schema="{key: string}", func=func, idempotent=idempotent)
+
+    def run_task(self, script: tuple[str, ...], tools: list[Tool], output: str = "67000000") -> TaskRun:
+        # `output` defaults to a forced answer, which task_executor returns without the "Final Answer:" prefix
+        task = Task(name="population", description="Population of France.", expected_output="A number.", llm_messages=[], disable_validation=True)
+        run = TaskRun(Conversation([Message(role=MessageType.SYSTEM, content="Use tools."), Message(role=MessageType.USER, content="Population of France?")]))
+        with use_run_context(RunContext(llm_caller=ScriptedLLMCaller(script=script))):
+            conclusion = task_executor(task, tools, run)
+        self.assertEqual(conclusion.output, output)
+        return run
+
+    def test_repeated_calls_reuse_the_observation_and_force_an_answer(self) -> None:
+        before = (ACTION_REPEATS.get(pattern="repeat"), TOOL_CACHE_HITS.get(tool="lookup"), LOOP_FORCED_ANSWERS.get())
+        run = self.run_task((action("lookup"),) * 3 + (FINAL,), [self.tool("lookup")])
+        self.assertEqual(self.calls, ["lookup"])
+        self.assertEqual((ACTION_REPEATS.get(pattern="repeat"), TOOL_CACHE_HITS.get(tool="lookup"), LOOP_FORCED_ANSWERS.get()), (before[0] + 2, before[1] + 2, before[2] + 1))
+        feedback = [m.content for m in run.messages() if m.role is MessageType.USER]
+        self.assertIn("Observation: 67000000", feedback[-2])
+        self.assertIn(get_prompts().repeated_action_prompt.format(action="lookup"), feedback[-2])
+        self.assertEqual(feedback[-1], get_prompts().force_final_answer_prompt)
+        self.assertEqual(sum(1 for m in run.messages() if m.role is MessageType.ASSISTANT), 3)
+
+    def test_oscillation_is_detected(self) -> None:
+        before = ACTION_REPEATS.get(pattern="oscillation")
+        run = self.run_task((action("lookup"), action("census"), action("lookup"), action("census"), FINAL), [self.tool("lookup"), self.tool("census")])
+        self.assertEqual(self.calls, ["lookup", "census"])
+        self.assertEqual(ACTION_REPEATS.get(pattern="oscillation"), before + 1)
+        self.assertIn("(lookup -> census)", run.messages()[-2].content)
+
+    def test_non_idempotent_tools_run_again(self) -> None:
+        self.run_task((action("clock"), action("clock"), action("clock", "utc"), FINAL), [self.tool("clock", idempotent=False)], output="Final Answer: 67000000")
+        self.assertEqual(self.calls, ["clock"] * 3)
+
+    def test_inputs_are_compared_as_json(self) -> None:
+        history = ActionHistory()
+        self.assertIsNone(history.check("lookup", '{"a": 1, "b": 2}'))
+        history.record("lookup", '{"a": 1, "b": 2}', "\nObservation: 3\n")
+        repeat = history.check("lookup", '{"b":2,"a":1}')
+        assert repeat is not None
+        self.assertEqual((repeat.pattern, repeat.observation, history.exhausted), ("repeat", "\nObservation: 3\n", False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+# gpt_agents_py | James Delancey | MIT License
+import os
+import tempfile
+import unittest
+
+from gpt_agents_py.extensions.approx_cache import ApproxCacheLLMCaller, call_kind
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.gpt_agents import (
+    Message,
+    MessageType,
+    call_llm,
+    get_prompts,
+    set_llm_caller,
+)
+from gpt_agents_py.metrics import APPROX_CACHE
+from tests.common import keep_llm_caller
+
+REPORT = "The population of France was {n} in 2023 according to INSEE, up slightly from the previous census, driven mostly by net migration and longer life expectancy."
+
+
+def validation(final_answer: str, expected_output: str = "The population of France with its source.") -> list[Message]:
+    prompts = get_prompts()
+    return [
+        Message(role=MessageType.SYSTEM, content=prompts.validation_system_prompt),
+        Message(role=MessageType.USER, content=prompts.validation_user_prompt.format(final_answer=final_answer, expected_output=expected_output)),
+    ]
+
+
+def summary(results: list[str]) -> list[Message]:
+    prompts = get_prompts()
+    prompt = prompts.summary_single_shot_prompt.format(goal="Report on France.", results="\n\n".join(results))
+    return [Message(role=MessageType.SYSTEM, content=prompts.no_tools_template), Message(role=MessageType.USER, content=prompt)]
+
+
+class TestApproxCache(unittest.TestCase):
+    def setUp(self) -> None:
+        keep_llm_caller(self)
+        self.inner = ScriptedLLMCaller()
+
+    def test_near_duplicate_calls_are_served_from_the_cache(self) -> None:
+        set_llm_caller(ApproxCacheLLMCaller(self.inner, threshold=0.8))
+        hits = APPROX_CACHE.get(kind="validation", result="hit")
+        call_llm(validation(REPORT.format(n="68,042,591")))
+        call_llm(validation("  " + REPORT.format(n="68,042,591").upper().replace(" ", "\n  ")))
+        self.assertEqual((self.inner.calls, APPROX_CACHE.get(kind="validation", result="hit")), (1, hits + 1))
+        call_llm(validation("Spain has about 48 million inhabitants."))
+        self.assertEqual(self.inner.calls, 2)
+        # Reordered upstream results still match
+        results = [
+            "France had about 68 million inhabitants in 2023, most of them living in cities.",
+            "Its capital is Paris, which lies on the Seine in the north of the country.",
+            "The currency has been the euro since 2002, replacing the French franc.",
+            "The official language is French, spoken by nearly the whole population.",
+        ]
+        call_llm(summary(results))
+        call_llm(summary(results[::-1]))
+        self.assertEqual(self.inner.calls, 3)
+
+    def test_validations_of_different_answers_never_share_a_verdict(self) -> None:
+        set_llm_caller(ApproxCacheLLMCaller(self.inner))
+        call_llm(validation("67000000"))
+        call_llm(validation("I don't know"))
+        # The prompt template is the same for every validation, so only the answer and the expected output count
+        call_llm(validation(REPORT.format(n="68,042,591")))
+        call_llm(validation(REPORT.format(n="68,373,433")))
+        call_llm(validation("67000000", expected_output="The population of Spain."))
+        self.assertEqual(self.inner.calls, 5)
+        call_llm(validation("67000000"))
+        self.assertEqual(self.inner.calls, 5)
+
+    def test_task_mode_summaries_are_cached(self) -> None:
+        set_llm_caller(ApproxCacheLLMCaller(self.inner))
+        prompts = get_prompts()
+        persona = prompts.role_playing_template.format(role="Summary", goal="Summarize.", backstory="Final Answer: 67000000")
+        messages = [Message(role=MessageType.SYSTEM, content=prompts.no_tools_template), Message(role=MessageType.USER, content=persona)]
+        self.assertEqual(call_kind(messages), "summary")
+        call_llm(messages)
+        call_llm(messages)
+        self.assertEqual(self.inner.calls, 1)
+
+    def test_oldest_entries_are_evicted(self) -> None:
+        cache = ApproxCacheLLMCaller(self.inner, max_entries=2)
+        set_llm_caller(cache)
+        for answer in ("67000000", "48000000", "83000000", "67000000"):
+            call_llm(validation(answer))
+        self.assertEqual((self.inner.calls, len(cache._entries)), (4, 2))
+        call_llm(validation("83000000"))
+        self.assertEqual(self.inner.calls, 4)
+
+    def test_only_designated_kinds_are_cached(self) -> None:
+        set_llm_caller(ApproxCacheLLMCaller(self.inner))
+        react = [Message(role=MessageType.SYSTEM, content="Use tools."), Message(role=MessageType.USER, content="Population of France?")]
+        self.assertEqual([call_kind(react), call_kind(validation("x")), call_kind(summary(["x"]))], ["task", "validation", "summary"])
+        call_llm(react)
+        call_llm(react)
+        self.assertEqual(self.inner.calls, 2)
+
+    def test_batched_validations_are_never_cached(self) -> None:
+        # Verdicts are keyed by position: the same items in another order must not reuse them
+        set_llm_caller(ApproxCacheLLMCaller(self.inner, threshold=0.5, kinds=("validation", "batch_validation")))
+        answers = [REPORT.format(n="68,042,591"), "Spain has about 48 million inhabitants."]
+        prompts = get_prompts()
+        for batch in (answers, answers[::-1]):
+            items = "".join(prompts.batch_validation_item_prompt.format(number=i, final_answer=a, expected_output="France's population.") for i, a in enumerate(batch, start=1))
+            messages = [Message(role=MessageType.SYSTEM, content=prompts.batch_validation_system_prompt), Message(role=MessageType.USER, content=items)]
+            self.assertEqual(call_kind(messages), "batch_validation")
+            call_llm(messages)
+        self.assertEqual(self.inner.calls, 2)
+
+    def test_persisted_entries_and_hit_rates(self) -> None:
+        path = os.path.join(tempfile.mkdtemp(), "approx.db")
+        set_llm_caller(ApproxCacheLLMCaller(self.inner, path=path))
+        response = call_llm(validation(REPORT.format(n="68,042,591")))
+        reopened = ApproxCacheLLMCaller(self.inner, threshold=0.6, path=path)
+        set_llm_caller(reopened)
+        self.assertEqual(call_llm(validation(REPORT.format(n="68,373,433"))), response)
+        self.assertEqual(self.inner.calls, 1)
+        rates = reopened.hit_rates(thresholds=(0.6, 1.0))
+        self.assertEqual(rates["validation"], {0.6: 1.0, 1.0: 0.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+# gpt_agents_py | James Delancey | MIT License
+import io
+import json
+import unittest
+
+from gpt_agents_py import Message, MessageType, set_llm_caller
+from gpt_agents_py.batch import fill_organization, organization_from_dict, run_batch
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from tests.common import keep_llm_caller
+
+SPEC = {
+    "agents": [
+        {
+            "role": "Analyst",
+            "goal": "Report a population.",
+            "backstory": "Demographer.",
+            "disable_summary": True,
+            "tasks": [{"name": "Lookup", "description": "Get the population of {country}.", "expected_output": "A number."}],
+        }
+    ]
+}
+
+
+class EchoCountryCaller(ScriptedLLMCaller):
+    def respond(self, messages: list[Message]) -> str:
+        if messages[0].role is MessageType.SYSTEM and "validator" in messages[0].content:
+            return self.validation_response
+        country = messages[-1].content.split("Get the population of ")[1].split(".")[0]
+        return f"Thought: known\nFinal Answer: population of {country}"
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self) -> None:
+        keep_llm_caller(self)
+
+    def test_fill_organization_copies_tasks(self) -> None:
+        org = organization_from_dict(SPEC)
+        filled = fill_organization(org, {"country": "Spain"})
+        self.assertEqual(filled.agents[0].tasks[0].description, "Get the population of Spain.")
+        self.assertIsNot(filled.agents[0].tasks[0].llm_messages, org.agents[0].tasks[0].llm_messages)
+        with self.assertRaises(KeyError):
+            fill_organization(org, {})
+
+    def test_run_batch_streams_rows(self) -> None:
+        set_llm_caller(EchoCountryCaller())
+        rows = [{"country": c} for c in ("France", "Germany", "Spain")] + [{"city": "Paris"}]
+        out = io.StringIO()
+        stats = run_batch(organization_from_dict(SPEC), iter(rows), out, workers=2)
+        records = sorted((json.loads(line) for line in out.getvalue().splitlines()), key=lambda r: r["index"])
+        self.assertEqual((stats.rows, stats.succeeded, stats.failed), (4, 3, 1))
+        self.assertEqual(records[1]["conclusion"]["final_output"], "Final Answer: population of Germany")
+        self.assertEqual(records[3]["status"], "error")
+        self.assertIn("KeyError", records[3]["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
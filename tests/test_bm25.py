@@ -0,0 +1,23 @@
+# gpt_agents_py | James Delancey | MIT License
+import unittest
+
+from gpt_agents_py.bm25 import BM25Index, tokenize
+
+
+class TestBM25(unittest.TestCase):
+    def test_tokenize_splits_identifiers(self) -> None:
+        self.assertEqual(tokenize("get_weatherForecast for Zürich, 2024"), ["get", "weather", "forecast", "for", "zürich", "2024"])
+
+    def test_rare_terms_rank_first(self) -> None:
+        index: BM25Index[str] = BM25Index()
+        index.add("weather", "weather_forecast: Get the weather forecast for a city")
+        index.add("population", "population_lookup: Get the population of a country")
+        index.add("currency", "convert_currency: Convert an amount between currencies for a country")
+        self.assertEqual(index.top_k("Population of France (country)", 3), ["population", "currency"])
+        # Same term frequency: the shorter document ranks higher
+        self.assertEqual(index.top_k("Get it", 3), ["population", "weather"])
+        self.assertEqual(index.top_k("unrelated words", 3), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+# gpt_agents_py | James Delancey | MIT License
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from typing import cast
+
+from gpt_agents_py import Organization, OrganizationConclusion, get_llm_caller
+from gpt_agents_py.extensions.cassette import (
+    Cassette,
+    CassetteDivergenceError,
+    record_organization,
+    replay_organization,
+)
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from tests.common import build_organization, lookup_tool
+
+
+class TestCassette(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tool_calls = 0
+        self.path = os.path.join(tempfile.mkdtemp(), "run.json")
+
+        def lookup(args: dict[str, str]) -> str:
+            self.tool_calls += 1
+            return "67000000"
+
+        self.tools = [lookup_tool(lookup)]
+
+    def org(self, role: str = "Analyst") -> Organization:
+        return build_organization(1, roles=(role,), tools=self.tools)
+
+    def test_record_then_replay_without_network_or_tools(self) -> None:
+        org = self.org()
+        recorded = cast(OrganizationConclusion, record_organization(org, self.path, caller=ScriptedLLMCaller()))
+        self.assertEqual(self.tool_calls, 1)
+        cassette = Cassette.load(self.path)
+        self.assertEqual(len(cassette.llm), 5)
+        self.assertEqual(cassette.final_output, recorded.final_conclusion.output)
+
+        # The default caller would need api_key.json and the network; replay must not touch it
+        replayed, divergences = replay_organization(org, self.path)
+        self.assertEqual(divergences, [])
+        self.assertEqual(cast(OrganizationConclusion, replayed).final_conclusion.output, recorded.final_conclusion.output)
+        self.assertEqual(self.tool_calls, 1)
+
+    def test_divergence_detection(self) -> None:
+        record_organization(self.org(), self.path, caller=ScriptedLLMCaller())
+        changed = self.org("Senior Analyst")
+        with self.assertRaises(CassetteDivergenceError):
+            replay_organization(changed, self.path)
+        _, divergences = replay_organization(changed, self.path, strict=False)
+        self.assertTrue(divergences)
+        self.assertIsNotNone(divergences[0]["first_differing_message"])
+
+    def test_concurrent_replays_keep_their_own_callers(self) -> None:
+        org = self.org()
+        recorded = cast(OrganizationConclusion, record_organization(org, self.path, caller=ScriptedLLMCaller()))
+        default = get_llm_caller()
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda _: replay_organization(org, self.path), range(4)))
+        for replayed, divergences in results:
+            self.assertEqual(divergences, [])
+            self.assertEqual(cast(OrganizationConclusion, replayed).final_conclusion.output, recorded.final_conclusion.output)
+        self.assertIs(get_llm_caller(), default)
+
+
+if __name__ == "__main__":
+    unittest.main()
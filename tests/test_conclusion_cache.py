@@ -0,0 +1,64 @@
+# gpt_agents_py | James Delancey | MIT License
+import os
+import tempfile
+import unittest
+from typing import Optional
+
+from gpt_agents_py.extensions.conclusion_cache import (
+    ConclusionCache,
+    SQLiteConclusionStore,
+)
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.gpt_agents import (
+    AgentConclusion,
+    RunContext,
+    agent_executor,
+    set_conclusion_cache,
+    use_run_context,
+)
+from tests.common import build_agent, lookup_tool
+
+
+def run_agent(version: str = "1", context: Optional[list[AgentConclusion]] = None) -> tuple[AgentConclusion, int]:
+    caller = ScriptedLLMCaller()
+    agent = build_agent(tools=[lookup_tool(version=version)], disable_summary=True)
+    with use_run_context(RunContext(llm_caller=caller)):
+        return agent_executor(agent=agent, agent_conclusions=context or []), caller.calls
+
+
+class TestConclusionCache(unittest.TestCase):
+    def tearDown(self) -> None:
+        set_conclusion_cache(None)
+
+    def test_second_run_skips_the_llm(self) -> None:
+        set_conclusion_cache(ConclusionCache())
+        first, first_calls = run_agent()
+        second, second_calls = run_agent()
+        self.assertEqual((first_calls, second_calls), (6, 0))
+        self.assertEqual([tc[:2] for tc in second.task_conclusions], [tc[:2] for tc in first.task_conclusions])
+        self.assertEqual((second.usage.llm_calls, [tc.usage.llm_calls for tc in first.task_conclusions]), (0, [3, 3]))
+
+    def test_tool_version_and_context_change_the_key(self) -> None:
+        cache = ConclusionCache()
+        set_conclusion_cache(cache)
+        first, _ = run_agent()
+        self.assertEqual(run_agent(version="2")[1], 6)
+        self.assertEqual(run_agent(context=[first])[1], 6)
+        self.assertEqual(cache.invalidate_tool("lookup"), 6)
+        self.assertEqual(run_agent()[1], 6)
+
+    def test_sqlite_store_persists_with_ttl_and_invalidation(self) -> None:
+        path = os.path.join(tempfile.mkdtemp(), "conclusions.db")
+        set_conclusion_cache(ConclusionCache(SQLiteConclusionStore(path)))
+        run_agent()
+        cache = ConclusionCache(SQLiteConclusionStore(path), ttl=3600)
+        set_conclusion_cache(cache)
+        self.assertEqual(run_agent()[1], 0)
+        self.assertEqual(cache.invalidate_task("t1"), 1)
+        self.assertEqual(run_agent()[1], 3)
+        set_conclusion_cache(ConclusionCache(SQLiteConclusionStore(path), ttl=0))
+        self.assertEqual(run_agent()[1], 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
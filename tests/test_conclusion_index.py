@@ -0,0 +1,96 @@
+# gpt_agents_py | James Delancey | MIT License
+import unittest
+
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.gpt_agents import (
+    Agent,
+    ConclusionIndex,
+    Message,
+    Organization,
+    Task,
+    TaskConclusion,
+    get_prompts,
+    organization_executor,
+    set_llm_caller,
+)
+from tests.common import keep_llm_caller
+
+TOPICS = ["rainfall in Lyon", "wine exports", "population of France", "rail network", "tourism revenue", "nuclear power", "cheese varieties", "ski resorts"]
+
+
+class TopicCaller(ScriptedLLMCaller):
+    """
+    Answers each task with a fact about its topic and records the prompts of the last task.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.prompts: dict[str, str] = {}
+
+    def respond(self, messages: list[Message]) -> str:
+        if messages[0].content == get_prompts().validation_system_prompt:
+            return self.validation_response
+        prompt = messages[-1].content
+        if "Current Task: Report on " not in prompt:
+            self.prompts["Summary"] = "\n".join(m.content for m in messages)
+            return "Thought: done\nFinal Answer: A summary."
+        topic = prompt.split("Current Task: Report on ")[1].split(".")[0]
+        self.prompts[topic] = prompt
+        return f"Thought: done\nFinal Answer: A fact about {topic}."
+
+
+class TestConclusionIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        keep_llm_caller(self)
+
+    def test_select_keeps_the_latest_then_the_most_relevant(self) -> None:
+        conclusions = [TaskConclusion(input=f"Task Name: t{i}", output=f"Final Answer: A fact about {topic}.") for i, topic in enumerate(TOPICS)]
+        index = ConclusionIndex()
+        selected = index.select("What share of power is nuclear?", conclusions + conclusions[:2], k=2, budget=1000)
+        self.assertEqual(selected, [conclusions[1], conclusions[5]])
+        # Duplicates collapse, and the budget stops the selection after the latest conclusion
+        self.assertEqual(index.select("nuclear power", conclusions + conclusions, k=3, budget=1), [conclusions[-1]])
+
+    def test_task_prompts_only_include_relevant_context(self) -> None:
+        caller = TopicCaller()
+        set_llm_caller(caller)
+
+        def agent(topic: str, context_k: "int | None") -> Agent:
+            task = Task(name=topic, description=f"Report on {topic}.", expected_output="A fact.", llm_messages=[])
+            return Agent(role=f"{topic} analyst", goal="Report.", backstory="Facts.", tasks=[task], tools=[], disable_summary=True, context_k=context_k)
+
+        last = "wine exports by region"
+        organization_executor(Organization(agents=[agent(t, 2) for t in TOPICS] + [agent(last, 2)]))
+        prompt = caller.prompts[last]
+        self.assertEqual(prompt.count("Final Answer: A fact about"), 2)
+        self.assertIn("A fact about wine exports.", prompt)
+        self.assertIn("A fact about ski resorts.", prompt)
+        organization_executor(Organization(agents=[agent(t, None) for t in TOPICS] + [agent(last, None)]))
+        self.assertEqual(caller.prompts[last].count("Final Answer: A fact about"), len(TOPICS))
+
+    def test_task_summary_keeps_own_results_and_retrieves_upstream_ones(self) -> None:
+        caller = TopicCaller()
+        set_llm_caller(caller)
+        upstream = [
+            Agent(
+                role=f"{t} analyst",
+                goal="Report.",
+                backstory="Facts.",
+                tasks=[Task(name=t, description=f"Report on {t}.", expected_output="A fact.", llm_messages=[])],
+                tools=[],
+                disable_summary=True,
+            )
+            for t in TOPICS
+        ]
+        tasks = [Task(name=t, description=f"Report on {t}.", expected_output="A fact.", llm_messages=[]) for t in ("bread prices", "nuclear share")]
+        summarizer = Agent(role="Energy analyst", goal="Explain the nuclear power share.", backstory="Facts.", tasks=tasks, tools=[], context_k=2)
+        organization_executor(Organization(agents=upstream + [summarizer]))
+        summary = caller.prompts["Summary"]
+        # Upstream conclusions about nuclear power outrank "bread prices", which stays as one of the agent's own results
+        for topic in ("bread prices", "nuclear share", "nuclear power", "ski resorts"):
+            self.assertIn(f"A fact about {topic}.", summary)
+        self.assertEqual(summary.count("Final Answer: A fact about"), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+# gpt_agents_py | James Delancey | MIT License
+import unittest
+
+from gpt_agents_py.conversation import Conversation, Interner
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.gpt_agents import (
+    Message,
+    MessageType,
+    RunContext,
+    organization_executor,
+)
+from tests.common import build_organization
+
+
+class TestConversation(unittest.TestCase):
+    def test_branches_share_their_prefix(self) -> None:
+        base = Conversation(["system", "user"])
+        retry_a = base.append("a1").append("a2")
+        retry_b = base.append("b1")
+        self.assertEqual(base, ["system", "user"])
+        self.assertEqual(retry_a, ["system", "user", "a1", "a2"])
+        self.assertEqual(retry_b.to_list(), ["system", "user", "b1"])
+        self.assertEqual((len(retry_a), retry_a[-1], retry_a[1:3]), (4, "a2", ["user", "a1"]))
+        self.assertEqual(base.extend(["x", "y"]), Conversation(["system", "user", "x", "y"]))
+
+    def test_interner_returns_one_instance_per_value(self) -> None:
+        intern: Interner[Message] = Interner()
+        first = intern(Message(role=MessageType.SYSTEM, content="".join(["sys", "tem"])))
+        self.assertIs(intern(Message(role=MessageType.SYSTEM, content="system")), first)
+        self.assertEqual(len(intern), 1)
+
+
+class TestRunState(unittest.TestCase):
+    def test_runs_do_not_mutate_the_organization(self) -> None:
+        org = build_organization(disable_summary=True)
+        first = organization_executor(org, context=RunContext(llm_caller=ScriptedLLMCaller()))
+        second = organization_executor(org, context=RunContext(llm_caller=ScriptedLLMCaller()))
+        assert first is not None and second is not None
+        self.assertEqual([t.llm_messages for t in org.agents[0].tasks], [[], []])
+        self.assertEqual(first.histories, second.histories)
+        self.assertEqual([(h.agent, h.task, len(h.messages)) for h in first.histories], [("Analyst", "t0", 6), ("Analyst", "t1", 6)])
+        # The system prompt is stored once per run and shared by every task's conversation
+        self.assertIs(first.histories[0].messages[0], first.histories[1].messages[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+# gpt_agents_py | James Delancey | MIT License
+import threading
+import time
+import unittest
+from typing import Any, Optional
+
+from gpt_agents_py.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    RunCancelled,
+    deadline_scope,
+    deadline_timeout,
+)
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.gpt_agents import (
+    OrganizationConclusion,
+    RunContext,
+    Tool,
+    organization_executor,
+)
+from gpt_agents_py.metrics import RUN_INTERRUPTIONS
+from tests.common import build_organization, lookup_tool
+
+
+def run(tool: Tool, deadline: Deadline, agents: int = 1, tasks: int = 3) -> Optional[OrganizationConclusion]:
+    org = build_organization(tasks, roles=tuple(f"Analyst {a}" for a in range(agents)), tools=[tool], disable_summary=True)
+    return organization_executor(org, deadline=deadline, context=RunContext(llm_caller=ScriptedLLMCaller()))
+
+
+class TestDeadline(unittest.TestCase):
+    def setUp(self) -> None:
+        self.release = threading.Event()
+
+    def tearDown(self) -> None:
+        self.release.set()
+
+    def cancelling_tool(self, deadline: Deadline, on_call: int) -> Tool:
+        calls = []
+
+        def lookup(args: dict[str, Any]) -> str:
+            calls.append(args)
+            if len(calls) == on_call:
+                deadline.cancel()
+            return "67000000"
+
+        return lookup_tool(lookup)
+
+    def test_cancel_returns_partial_agent_conclusion(self) -> None:
+        deadline = Deadline()
+        cancelled = RUN_INTERRUPTIONS.get(reason="cancelled")
+        conclusion = run(self.cancelling_tool(deadline, on_call=2), deadline)
+        assert conclusion is not None
+        self.assertEqual(conclusion.interrupted, "cancelled")
+        self.assertEqual(RUN_INTERRUPTIONS.get(reason="cancelled"), cancelled + 1)
+        self.assertEqual([tc.input.splitlines()[0] for tc in conclusion.agent_conclusions[0].task_conclusions], ["Task Name: t0"])
+        self.assertEqual(conclusion.final_conclusion.output, "Final Answer: 67000000")
+
+    def test_finished_agents_are_kept(self) -> None:
+        deadline = Deadline()
+        conclusion = run(self.cancelling_tool(deadline, on_call=3), deadline, agents=2, tasks=2)
+        assert conclusion is not None
+        self.assertEqual([ac.agent.role for ac in conclusion.agent_conclusions], ["Analyst 0"])
+        self.assertEqual(len(conclusion.agent_conclusions[0].task_conclusions), 2)
+
+    def test_expiry_abandons_a_blocked_tool(self) -> None:
+        slow = lookup_tool(lambda args: str(self.release.wait(10)))
+        expired = RUN_INTERRUPTIONS.get(reason="deadline")
+        start = time.perf_counter()
+        conclusion = run(slow, Deadline(0.2))
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertIsNone(conclusion)
+        self.assertEqual(RUN_INTERRUPTIONS.get(reason="deadline"), expired + 1)
+
+    def test_http_timeout_shrinks_to_the_remaining_budget(self) -> None:
+        self.assertEqual(deadline_timeout(30.0), 30.0)
+        with deadline_scope(Deadline(1.0)):
+            self.assertLessEqual(deadline_timeout(30.0), 1.0)
+            self.assertEqual(deadline_timeout(0.5), 0.5)
+        with deadline_scope(Deadline(0.0)):
+            with self.assertRaises(DeadlineExceeded):
+                deadline_timeout(30.0)
+        cancelled = Deadline(10.0)
+        cancelled.cancel()
+        with self.assertRaises(RunCancelled):
+            cancelled.sleep(5.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+# gpt_agents_py | James Delancey | MIT License
+import asyncio
+import threading
+import time
+import unittest
+from typing import Any
+
+from gpt_agents_py.events import (
+    AgentStarted,
+    LLMCallFinished,
+    RunEvent,
+    RunFinished,
+    TaskFinished,
+    ToolInvoked,
+    ToolReturned,
+    ValidationVerdict,
+    organization_events,
+    organization_events_async,
+)
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.gpt_agents import Organization, RunContext, organization_executor
+from gpt_agents_py.metrics import RUN_INTERRUPTIONS
+from tests.common import build_organization, lookup_tool
+
+
+class TestEventStream(unittest.TestCase):
+    def setUp(self) -> None:
+        self.context = RunContext(llm_caller=ScriptedLLMCaller())
+        self.release = threading.Event()
+        self.lookups = 0
+
+    def tearDown(self) -> None:
+        self.release.set()
+
+    def lookup(self, args: dict[str, Any]) -> str:
+        # The second task's tool call blocks until the test releases it
+        self.lookups += 1
+        if self.lookups == 2:
+            self.release.wait(10)
+        return "67000000"
+
+    def make_org(self) -> Organization:
+        return build_organization(tools=[lookup_tool(self.lookup)], disable_summary=True)
+
+    def test_events_arrive_while_the_run_is_in_progress(self) -> None:
+        events: list[RunEvent] = []
+        for event in organization_events(self.make_org(), context=self.context):
+            events.append(event)
+            if isinstance(event, TaskFinished) and event.task == "t0":
+                # t1 cannot finish until released, so this event arrived mid-run; an unrelated run must not leak into the stream
+                self.assertFalse(self.release.is_set())
+                organization_executor(build_organization(1, roles=("Other",), disable_summary=True), context=self.context)
+                self.release.set()
+        self.assertIsInstance(events[0], AgentStarted)
+        finished = events[-1]
+        assert isinstance(finished, RunFinished) and finished.conclusion is not None
+        self.assertEqual(finished.conclusion.final_conclusion.output, "Final Answer: 67000000")
+        self.assertEqual([e.task for e in events if isinstance(e, TaskFinished)], ["t0", "t1"])
+        self.assertEqual([e.input for e in events if isinstance(e, ToolInvoked)], ['{"key": "france"}'] * 2)
+        self.assertTrue(all(e.output and "67000000" in e.output for e in events if isinstance(e, ToolReturned)))
+        self.assertEqual([e.passed for e in events if isinstance(e, ValidationVerdict)], [True, True])
+        self.assertEqual(sum(1 for e in events if isinstance(e, LLMCallFinished) and e.response), 6)
+        self.assertEqual(sum(1 for e in events if isinstance(e, AgentStarted)), 1)
+
+    def test_closing_the_stream_cancels_the_run(self) -> None:
+        cancelled = RUN_INTERRUPTIONS.get(reason="cancelled")
+        stream = organization_events(self.make_org(), context=self.context)
+        for event in stream:
+            if isinstance(event, TaskFinished):
+                break
+        stream.close()
+        self.release.set()
+        deadline = time.time() + 5
+        while RUN_INTERRUPTIONS.get(reason="cancelled") == cancelled and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(RUN_INTERRUPTIONS.get(reason="cancelled"), cancelled + 1)
+
+    def test_async_iterator(self) -> None:
+        self.release.set()
+
+        async def collect() -> list[RunEvent]:
+            return [event async for event in organization_events_async(self.make_org(), context=self.context)]
+
+        events = asyncio.run(collect())
+        self.assertIsInstance(events[-1], RunFinished)
+        self.assertEqual(sum(1 for e in events if isinstance(e, TaskFinished)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+# gpt_agents_py | James Delancey | MIT License
+import asyncio
+import io
+import json
+import queue
+import threading
+import unittest
+
+from gpt_agents_py.batch import organization_from_dict, run_batch
+from gpt_agents_py.extensions.human_input import (
+    AsyncHumanInput,
+    PendingHumanInput,
+    QueueHumanInput,
+)
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.gpt_agents import (
+    Agent,
+    HumanInputProviderBase,
+    HumanInputRequest,
+    MessageType,
+    Organization,
+    OrganizationConclusion,
+    RunContext,
+    Task,
+    await_human_input,
+    organization_executor,
+    set_human_input_provider,
+    set_llm_caller,
+)
+from gpt_agents_py.metrics import HUMAN_INPUTS
+from tests.common import keep_llm_caller
+
+
+def run(provider: HumanInputProviderBase) -> OrganizationConclusion:
+    task = Task(name="review", description="Draft a report.", expected_output="A report.", llm_messages=[], require_human_input=True)
+    agent = Agent(role="Writer", goal="Write.", backstory="Editor.", tasks=[task], tools=[], disable_summary=True)
+    conclusion = organization_executor(Organization(agents=[agent]), context=RunContext(human_input=provider))
+    assert conclusion is not None
+    return conclusion
+
+
+class TestHumanInput(unittest.TestCase):
+    def setUp(self) -> None:
+        keep_llm_caller(self)
+        set_llm_caller(ScriptedLLMCaller())
+
+    def tearDown(self) -> None:
+        set_human_input_provider(HumanInputProviderBase())
+
+    def test_queue_provider_guidance_reaches_the_task(self) -> None:
+        seen: list[HumanInputRequest] = []
+
+        def answer(pending: PendingHumanInput) -> None:
+            seen.append(pending.request)
+            provider.respond(pending.id, "Cite the 2024 census." if pending.request.round == 1 else "q")
+
+        provider = QueueHumanInput(on_request=answer)
+        conclusion = run(provider)
+        self.assertEqual([(r.task, r.round) for r in seen], [("review", 1), ("review", 2)])
+        self.assertTrue(seen[0].answer.startswith("Final Answer:"))
+        user_messages = [m.content for m in conclusion.histories[0].messages if m.role is MessageType.USER]
+        self.assertIn("Cite the 2024 census.", user_messages)
+        self.assertEqual((provider.pending(), provider.requests.qsize()), ([], 2))
+
+    def test_timeout_returns_the_default(self) -> None:
+        timeouts = HUMAN_INPUTS.get(outcome="timeout")
+        provider = QueueHumanInput(timeout=0.05)
+        conclusion = run(provider)
+        self.assertEqual(conclusion.final_conclusion.output, "Final Answer: Summary of the previous results.")
+        self.assertEqual(HUMAN_INPUTS.get(outcome="timeout"), timeouts + 1)
+        self.assertEqual(provider.pending(), [])
+
+    def test_console_provider(self) -> None:
+        lines: queue.Queue[str] = queue.Queue()
+        prompts: list[str] = []
+
+        def readline(prompt: str) -> str:
+            prompts.append(prompt)
+            return lines.get()
+
+        lines.put("Cite the 2024 census.")
+        lines.put("q")
+        provider = HumanInputProviderBase(readline=readline)
+        conclusion = run(provider)
+        self.assertEqual(len(prompts), 2)
+        self.assertIn("[Human Input Required for task 'review']", prompts[0])
+        user_messages = [m.content for m in conclusion.histories[0].messages if m.role is MessageType.USER]
+        self.assertIn("Cite the 2024 census.", user_messages)
+
+    def test_console_line_after_a_timeout_goes_to_the_next_request(self) -> None:
+        lines: queue.Queue[str] = queue.Queue()
+        provider = HumanInputProviderBase(timeout=0.05, readline=lambda prompt: lines.get())
+        set_human_input_provider(provider)
+        self.assertEqual(await_human_input(HumanInputRequest(agent="Writer", task="a", answer="Final Answer: A", round=1)), "q")
+        # The reader is still blocked on the prompt for "a"; the next line must reach "b"
+        threading.Timer(0.05, lines.put, args=("Guidance for b.",)).start()
+        provider.timeout = 5
+        self.assertEqual(await_human_input(HumanInputRequest(agent="Writer", task="b", answer="Final Answer: B", round=1)), "Guidance for b.")
+
+    def test_async_provider(self) -> None:
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+
+        async def ask(request: HumanInputRequest) -> str:
+            await asyncio.sleep(0.01)
+            return "q"
+
+        try:
+            self.assertIsNotNone(run(AsyncHumanInput(ask, loop)).final_conclusion)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+
+    def test_parked_rows_release_their_worker(self) -> None:
+        # With one worker, row "a" waits for a person until row "b" has asked too; b can only ask if a gave up its slot
+        timeouts = HUMAN_INPUTS.get(outcome="timeout")
+        lock = threading.Lock()
+        waiting: dict[str, PendingHumanInput] = {}
+
+        def answer(pending: PendingHumanInput) -> None:
+            with lock:
+                waiting[pending.request.task] = pending
+                if len(waiting) == 2:
+                    for p in waiting.values():
+                        provider.respond(p.id, "q")
+
+        provider = QueueHumanInput(timeout=5, on_request=answer)
+        set_human_input_provider(provider)
+        spec = {
+            "agents": [
+                {
+                    "role": "Writer",
+                    "goal": "Write.",
+                    "backstory": "Editor.",
+                    "disable_summary": True,
+                    "tasks": [{"name": "{row}", "description": "Draft {row}.", "expected_output": "A draft.", "require_human_input": True}],
+                }
+            ]
+        }
+        out = io.StringIO()
+        stats = run_batch(organization_from_dict(spec), iter([{"row": "a"}, {"row": "b"}]), out, workers=1, human_slots=1)
+        self.assertEqual((stats.succeeded, stats.failed), (2, 0))
+        self.assertEqual(HUMAN_INPUTS.get(outcome="timeout"), timeouts)
+        self.assertEqual(sorted(json.loads(line)["params"]["row"] for line in out.getvalue().splitlines()), ["a", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
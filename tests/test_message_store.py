@@ -0,0 +1,51 @@
+# gpt_agents_py | James Delancey | MIT License
+import os
+import tempfile
+import unittest
+from typing import Optional
+
+from gpt_agents_py.extensions.message_store import SQLiteMessageStore, StoredMessages
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.gpt_agents import (
+    OrganizationConclusion,
+    RunContext,
+    ValidationJudge,
+    organization_executor,
+)
+from tests.common import build_organization
+
+
+def run(store: Optional[SQLiteMessageStore] = None, speculative: bool = False, judge: Optional[ValidationJudge] = None) -> OrganizationConclusion:
+    context = RunContext(llm_caller=ScriptedLLMCaller(), history_store=store, validation_judge=judge)
+    conclusion = organization_executor(build_organization(3, speculative=speculative), context=context)
+    assert conclusion is not None
+    return conclusion
+
+
+class TestSQLiteMessageStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.store = SQLiteMessageStore(os.path.join(tempfile.mkdtemp(), "messages.db"))
+
+    def test_histories_are_stored_and_loaded_lazily(self) -> None:
+        in_memory = run()
+        stored = run(self.store)
+        self.assertEqual([h.task for h in stored.histories], ["t0", "t1", "t2", "Summary"])
+        for expected, history in zip(in_memory.histories, stored.histories):
+            messages = history.messages
+            assert isinstance(messages, StoredMessages)
+            self.assertEqual(list(messages), list(expected.messages))
+            self.assertEqual((messages[-1], messages[1:3]), (expected.messages[-1], list(expected.messages[1:3])))
+            reopened = SQLiteMessageStore(self.store.path).get(messages.history_id)
+            assert reopened is not None
+            self.assertEqual(reopened.messages, messages)
+
+    def test_discarded_speculative_histories_are_deleted(self) -> None:
+        verdicts = iter(["no"])
+        conclusion = run(self.store, speculative=True, judge=lambda final_answer, expected_output: next(verdicts, "yes"))
+        rows = self.store._conn().execute("SELECT task FROM histories ORDER BY id").fetchall()
+        self.assertEqual([r[0] for r in rows], [h.task for h in conclusion.histories])
+        self.assertEqual([h.task for h in conclusion.histories], ["t0", "t1", "t2", "Summary"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+# gpt_agents_py | James Delancey | MIT License
+import unittest
+import urllib.request
+
+from gpt_agents_py import (
+    LLMCallerBase,
+    LLMResponseText,
+    Message,
+    MessageType,
+    Tool,
+    call_llm,
+    set_llm_caller,
+    tool_executor,
+)
+from gpt_agents_py.metrics import (
+    LLM_CALLS,
+    LLM_TOKENS,
+    TOOL_CALLS,
+    MetricsRegistry,
+    start_metrics_server,
+)
+from tests.common import keep_llm_caller
+
+
+class FixedCaller(LLMCallerBase):
+    provider = "fixed"
+    model = "fixed-1"
+
+    def prepare_llm_response(self, messages: list[Message], api_key: str = "api_key") -> None:
+        self._response_text = LLMResponseText("Thought: done\nFinal Answer: ok")
+        self._input_tokens = 7
+        self._output_tokens = 3
+        self._tokens_used = 10
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_prometheus_rendering(self) -> None:
+        registry = MetricsRegistry()
+        calls = registry.counter("calls_total", "Calls.", ("status",))
+        latency = registry.histogram("latency_seconds", "Latency.", (), buckets=(0.1, 1.0))
+        calls.inc(status="ok")
+        calls.inc(2, status="ok")
+        latency.observe(0.05)
+        latency.observe(0.5)
+        text = registry.render_prometheus()
+        self.assertIn("# TYPE calls_total counter", text)
+        self.assertIn('calls_total{status="ok"} 3', text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 2', text)
+        self.assertIn("latency_seconds_count 2", text)
+        self.assertAlmostEqual(latency.quantile(0.5), 0.1)
+
+    def test_label_mismatch_and_listener(self) -> None:
+        registry = MetricsRegistry()
+        seen: list[tuple[str, dict[str, str], float]] = []
+        registry.add_listener(lambda name, labels, value: seen.append((name, labels, value)))
+        counter = registry.counter("x_total", "X.", ("a",))
+        with self.assertRaises(ValueError):
+            counter.inc(b="1")
+        counter.inc(a="1")
+        self.assertEqual(seen, [("x_total", {"a": "1"}, 1.0)])
+
+    def test_metrics_server(self) -> None:
+        registry = MetricsRegistry()
+        registry.counter("served_total", "Served.").inc()
+        server = start_metrics_server(port=0, registry=registry)
+        try:
+            port = server.server_address[1]
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as resp:
+                self.assertIn("served_total 1", resp.read().decode("utf-8"))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class TestExecutorInstrumentation(unittest.TestCase):
+    def setUp(self) -> None:
+        keep_llm_caller(self)
+
+    def test_call_llm_records_tokens(self) -> None:
+        set_llm_caller(FixedCaller())
+        before_calls = LLM_CALLS.get(provider="fixed", model="fixed-1", status="ok")
+        before_in = LLM_TOKENS.get(provider="fixed", model="fixed-1", direction="input")
+        call_llm([Message(role=MessageType.USER, content="hi")])
+        self.assertEqual(LLM_CALLS.get(provider="fixed", model="fixed-1", status="ok"), before_calls + 1)
+        self.assertEqual(LLM_TOKENS.get(provider="fixed", model="fixed-1", direction="input"), before_in + 7)
+
+    def test_tool_executor_records_status(self) -> None:
+        tool = Tool(name="echo_metrics", description="Echo", args_schema="{text: string}", func=lambda args: args["text"])
+        tool_executor("echo_metrics", '{"text": "hi"}', [tool], "Thought: x")
+        with self.assertRaises(Exception):
+            tool_executor("echo_metrics", '{"other": "hi"}', [tool], "Thought: x")
+        self.assertEqual(TOOL_CALLS.get(tool="echo_metrics", status="ok"), 1)
+        self.assertEqual(TOOL_CALLS.get(tool="echo_metrics", status="error"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
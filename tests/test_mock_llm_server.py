@@ -0,0 +1,65 @@
+# gpt_agents_py | James Delancey | MIT License
+import json
+import unittest
+import urllib.error
+import urllib.request
+from unittest.mock import patch
+
+from gpt_agents_py import LLMCallerBase, Message, MessageType, http_retry_delay
+from gpt_agents_py.extensions.anthropic_llm_caller import AnthropicLLMCaller
+from gpt_agents_py.extensions.mock_llm_server import (
+    MockLLMServerConfig,
+    start_mock_llm_server,
+)
+
+MESSAGES = [Message(role=MessageType.SYSTEM, content="You are terse."), Message(role=MessageType.USER, content="Hello")]
+
+
+class TestMockLLMServer(unittest.TestCase):
+    def test_openai_and_anthropic_callers_hit_base_url(self) -> None:
+        server = start_mock_llm_server(responder=lambda messages: f"echo {messages[-1].content}")
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            for caller in (LLMCallerBase(base_url=base_url, api_key_value="mock"), AnthropicLLMCaller(base_url=base_url, api_key_value="mock")):
+                caller.prepare_llm_response(MESSAGES)
+                self.assertEqual(caller.get_llm_response(), "echo Hello")
+                self.assertIsNotNone(caller.get_llm_input_tokens())
+            self.assertEqual(server.stats, {"200": 2})
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_429_retries_honor_retry_after(self) -> None:
+        server = start_mock_llm_server(MockLLMServerConfig(rate_429=1.0, retry_after_s=0.25))
+        caller = LLMCallerBase(base_url=f"http://127.0.0.1:{server.server_address[1]}", api_key_value="mock")
+        try:
+            with patch("gpt_agents_py.gpt_agents.time.sleep") as sleep:
+                with self.assertRaises(Exception):
+                    caller.prepare_llm_response(MESSAGES)
+            self.assertEqual(server.stats["429"], 5)
+            self.assertEqual([c.args[0] for c in sleep.call_args_list], [0.25] * 4)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_streaming_response(self) -> None:
+        server = start_mock_llm_server(MockLLMServerConfig(stream_chunk_chars=4), responder=lambda messages: "abcdefghij")
+        try:
+            body = json.dumps({"model": "m", "stream": True, "messages": [{"role": "user", "content": "hi"}]}).encode("utf-8")
+            req = urllib.request.Request(f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions", data=body, method="POST")
+            with urllib.request.urlopen(req, timeout=5) as resp:
+                lines = [line for line in resp.read().decode("utf-8").split("\n") if line.startswith("data: ")]
+            self.assertEqual(lines[-1], "data: [DONE]")
+            text = "".join(json.loads(line[6:])["choices"][0]["delta"].get("content", "") for line in lines[:-1])
+            self.assertEqual(text, "abcdefghij")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_http_retry_delay_backoff(self) -> None:
+        error = urllib.error.HTTPError("http://x", 503, "busy", {}, None)  # type: ignore[arg-type]
+        self.assertEqual([http_retry_delay(error, a) for a in range(3)], [0.5, 1.0, 2.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
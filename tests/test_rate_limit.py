@@ -0,0 +1,82 @@
+# gpt_agents_py | James Delancey | MIT License
+import os
+import tempfile
+import time
+import unittest
+
+from gpt_agents_py import LLMCallerBase, Message, MessageType
+from gpt_agents_py.deadline import Deadline, RunInterrupted, deadline_scope
+from gpt_agents_py.extensions.mock_llm_server import start_mock_llm_server
+from gpt_agents_py.rate_limit import (
+    InProcessRateLimiter,
+    QuotaUsage,
+    RateLimiter,
+    SQLiteRateLimiter,
+)
+
+
+class TestRateLimit(unittest.TestCase):
+    def setUp(self) -> None:
+        self.path = os.path.join(tempfile.mkdtemp(), "limits.db")
+
+    def test_requests_per_window(self) -> None:
+        limiter = InProcessRateLimiter(rpm=2, window=0.2)
+        self.assertEqual(limiter.acquire("k"), 0.0)
+        self.assertEqual(limiter.acquire("k"), 0.0)
+        self.assertEqual(limiter.acquire("other"), 0.0)
+        start = time.perf_counter()
+        self.assertGreater(limiter.acquire("k"), 0.0)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.15)
+
+    def test_base_limiter_admits_everything(self) -> None:
+        limiter = RateLimiter()
+        for _ in range(100):
+            self.assertEqual(limiter.acquire("k"), 0.0)
+        limiter.record_tokens("k", 10**9)
+        self.assertEqual(limiter.usage("k"), QuotaUsage("k", 0, 0, 60.0))
+
+    def test_waiting_honours_the_deadline(self) -> None:
+        limiter = InProcessRateLimiter(rpm=1, window=5)
+        limiter.acquire("k")
+        start = time.perf_counter()
+        with self.assertRaises(RunInterrupted), deadline_scope(Deadline(0.1)):
+            limiter.acquire("k")
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+    def test_tokens_per_window(self) -> None:
+        limiter = InProcessRateLimiter(tpm=100, window=0.2)
+        limiter.acquire("k")
+        limiter.record_tokens("k", 60)
+        self.assertEqual(limiter.acquire("k"), 0.0)
+        limiter.record_tokens("k", 60)
+        self.assertEqual(limiter.usage("k").tokens, 120)
+        self.assertGreater(limiter.acquire("k"), 0.0)
+        self.assertLess(limiter.usage("k").tokens, 120)
+
+    def test_sqlite_limit_is_shared_between_instances(self) -> None:
+        # Separate instances have separate connections, exactly like separate processes
+        first = SQLiteRateLimiter(self.path, rpm=2, window=0.3)
+        second = SQLiteRateLimiter(self.path, rpm=2, window=0.3)
+        first.acquire("anthropic")
+        first.record_tokens("anthropic", 42)
+        second.acquire("anthropic")
+        self.assertEqual(second.usage("anthropic")[1:3], (2, 42))
+        self.assertGreater(second.acquire("anthropic"), 0.0)
+        self.assertEqual([u.key for u in first.usage_all()], ["anthropic"])
+
+    def test_caller_reports_tokens(self) -> None:
+        server = start_mock_llm_server()
+        caller = LLMCallerBase(base_url=f"http://127.0.0.1:{server.server_address[1]}", api_key_value="mock")
+        caller.rate_limiter = SQLiteRateLimiter(self.path, rpm=100)
+        try:
+            caller.prepare_llm_response([Message(role=MessageType.USER, content="Hello")])
+            usage = SQLiteRateLimiter(self.path).usage("api_key")
+            self.assertEqual(usage.requests, 1)
+            self.assertEqual(usage.tokens, caller.get_llm_tokens_used())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+# gpt_agents_py | James Delancey | MIT License
+import threading
+import unittest
+from typing import List, Optional
+
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.gpt_agents import (
+    PROMPTS,
+    LLMCallerBase,
+    Message,
+    OrganizationConclusion,
+    RunContext,
+    RunCounters,
+    organization_executor,
+    replace_prompt,
+    set_llm_caller,
+)
+from gpt_agents_py.metrics import RUN_INTERRUPTIONS
+from tests.common import build_organization, keep_llm_caller
+
+
+class PromptRecordingCaller(ScriptedLLMCaller):
+    def __init__(self, answer: str) -> None:
+        super().__init__(script=(f"Thought: done\nFinal Answer: {answer}",))
+        self.seen: list[str] = []
+
+    def respond(self, messages: List[Message]) -> str:
+        self.seen.extend(m.content for m in messages)
+        return super().respond(messages)
+
+
+class TestRunContext(unittest.TestCase):
+    def setUp(self) -> None:
+        # The process-wide caller would need an API key; every run below must use its own
+        keep_llm_caller(self)
+        set_llm_caller(LLMCallerBase(api_key_value="unused", base_url="http://127.0.0.1:9"))
+
+    def test_concurrent_runs_use_their_own_caller_and_prompts(self) -> None:
+        callers = {name: PromptRecordingCaller(answer=name) for name in ("a", "b")}
+        prompts = {"a": replace_prompt(PROMPTS, "instruction_prompt", "Answer tersely."), "b": None}
+        results: dict[str, Optional[OrganizationConclusion]] = {}
+
+        def run(name: str) -> None:
+            results[name] = organization_executor(build_organization(1, disable_summary=True), context=RunContext(prompts=prompts[name], llm_caller=callers[name]))
+
+        threads = [threading.Thread(target=run, args=(name,)) for name in callers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        for name in callers:
+            conclusion = results[name]
+            assert conclusion is not None
+            self.assertEqual(conclusion.final_conclusion.output, f"Final Answer: {name}")
+        self.assertTrue(any("Answer tersely." in c for c in callers["a"].seen))
+        self.assertFalse(any("Answer tersely." in c for c in callers["b"].seen))
+        self.assertNotEqual(PROMPTS.instruction_prompt, "Answer tersely.")
+
+    def test_call_budget_stops_the_run_with_a_partial_result(self) -> None:
+        counters = RunCounters()
+        budget = RUN_INTERRUPTIONS.get(reason="budget")
+        conclusion = organization_executor(build_organization(disable_summary=True), context=RunContext(llm_caller=ScriptedLLMCaller(), max_llm_calls=4, counters=counters))
+        assert conclusion is not None
+        self.assertEqual(conclusion.interrupted, "budget")
+        self.assertEqual(len(conclusion.agent_conclusions[0].task_conclusions), 1)
+        self.assertEqual(counters.llm_calls, 4)
+        self.assertEqual(RUN_INTERRUPTIONS.get(reason="budget"), budget + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+# gpt_agents_py | James Delancey | MIT License
+import threading
+import time
+import unittest
+
+from gpt_agents_py.deadline import Deadline, RunInterrupted, deadline_scope
+from gpt_agents_py.extensions.scheduler import (
+    PriorityClass,
+    SchedulerQueueFullError,
+    SchedulingLLMCaller,
+    scheduling,
+)
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.gpt_agents import Message, MessageType
+
+
+class OrderRecordingCaller(ScriptedLLMCaller):
+    def __init__(self) -> None:
+        super().__init__()
+        self.order: list[str] = []
+        self.release_holder = threading.Event()
+
+    def respond(self, messages: list[Message]) -> str:
+        if messages[-1].content == "hold":
+            self.release_holder.wait(5)
+        else:
+            self.order.append(messages[-1].content)
+        return "Thought: ok\nFinal Answer: ok"
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.inner = OrderRecordingCaller()
+        self.caller = SchedulingLLMCaller(self.inner, max_concurrency=1, tenant_weights={"x": 2.0})
+        self.threads: list[threading.Thread] = []
+
+    def submit(self, content: str, priority_class: str = "interactive", tenant: str = "default") -> None:
+        def call() -> None:
+            with scheduling(priority_class, tenant):
+                self.caller.prepare_llm_response([Message(role=MessageType.USER, content=content)])
+
+        queued = sum(self.caller.queue_depths().values())
+        thread = threading.Thread(target=call)
+        thread.start()
+        self.threads.append(thread)
+        # Enqueue one at a time so arrival order is deterministic
+        deadline = time.time() + 5
+        while content != "hold" and sum(self.caller.queue_depths().values()) == queued and time.time() < deadline:
+            time.sleep(0.001)
+
+    def drain(self) -> None:
+        self.inner.release_holder.set()
+        for thread in self.threads:
+            thread.join(5)
+
+    def test_interactive_calls_overtake_queued_batch_calls(self) -> None:
+        self.submit("hold")
+        time.sleep(0.05)
+        for i in range(3):
+            self.submit(f"batch{i}", "batch")
+        for i in range(2):
+            self.submit(f"interactive{i}")
+        self.drain()
+        self.assertEqual(self.inner.order, ["interactive0", "interactive1", "batch0", "batch1", "batch2"])
+
+    def test_weighted_fair_share_between_tenants(self) -> None:
+        self.submit("hold")
+        time.sleep(0.05)
+        for i in range(6):
+            self.submit(f"y{i}", "batch", "y")
+        for i in range(6):
+            self.submit(f"x{i}", "batch", "x")
+        self.drain()
+        first_six = self.inner.order[:6]
+        self.assertEqual(sum(1 for c in first_six if c.startswith("x")), 4)
+
+    def test_idle_tenants_are_forgotten(self) -> None:
+        self.submit("hold")
+        time.sleep(0.05)
+        for i in range(20):
+            self.submit(f"t{i}", "batch", f"tenant{i}")
+        self.drain()
+        self.assertEqual(len(self.inner.order), 20)
+        self.assertEqual(self.caller._last_finish, {})
+
+    def test_wrapper_takes_over_the_inner_callers_settings(self) -> None:
+        self.inner.base_url, self.inner.max_prompt_tokens, self.inner.prompt_overflow = "http://127.0.0.1:9", 100, "reject"
+        caller = SchedulingLLMCaller(self.inner)
+        self.assertEqual((caller.base_url, caller.max_prompt_tokens, caller.prompt_overflow), ("http://127.0.0.1:9", 100, "reject"))
+
+    def test_bounded_queue_depth(self) -> None:
+        self.caller = SchedulingLLMCaller(self.inner, max_concurrency=1, classes={"interactive": PriorityClass(priority=0, max_queue=1)})
+        self.submit("hold")
+        time.sleep(0.05)
+        self.submit("waiting")
+        with self.assertRaises(SchedulerQueueFullError):
+            self.caller.prepare_llm_response([Message(role=MessageType.USER, content="rejected")])
+        self.drain()
+        self.assertEqual(self.inner.order, ["waiting"])
+
+    def test_expired_calls_leave_the_queue(self) -> None:
+        self.submit("hold")
+        time.sleep(0.05)
+        start = time.monotonic()
+        with self.assertRaises(RunInterrupted), deadline_scope(Deadline(0.1)):
+            self.caller.prepare_llm_response([Message(role=MessageType.USER, content="expired")])
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(self.caller.queue_depths(), {"interactive": 0, "batch": 0})
+        self.submit("after")
+        self.drain()
+        self.assertEqual(self.inner.order, ["after"])
+
+
+if __name__ == "__main__":
+    unittest.main()
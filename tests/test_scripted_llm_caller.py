@@ -0,0 +1,42 @@
+# gpt_agents_py | James Delancey | MIT License
+import unittest
+from typing import cast
+
+from gpt_agents_py import (
+    OrganizationConclusion,
+    RunContext,
+    call_llm,
+    organization_executor,
+    set_llm_caller,
+)
+from gpt_agents_py.extensions.scripted_llm_caller import (
+    ScriptedLLMCaller,
+    ScriptedLLMError,
+)
+from tests.common import build_organization, keep_llm_caller, lookup_tool
+
+
+def lookup(args: dict[str, str]) -> str:
+    return {"france": "67000000"}[args["key"]]
+
+
+class TestScriptedLLMCaller(unittest.TestCase):
+    def setUp(self) -> None:
+        keep_llm_caller(self)
+
+    def test_replays_react_conversation(self) -> None:
+        caller = ScriptedLLMCaller()
+        org = build_organization(1, tools=[lookup_tool(lookup)])
+        result = cast(OrganizationConclusion, organization_executor(org, context=RunContext(llm_caller=caller)))
+        self.assertIn("67000000", result.final_conclusion.output)
+        # tool call, final answer, validation, summary answer, summary validation
+        self.assertEqual(caller.calls, 5)
+
+    def test_error_injection(self) -> None:
+        set_llm_caller(ScriptedLLMCaller(error_rate=1.0, seed=1))
+        with self.assertRaises(ScriptedLLMError):
+            call_llm([])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+# gpt_agents_py | James Delancey | MIT License
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from gpt_agents_py import Message, MessageType, call_llm, set_llm_caller
+from gpt_agents_py.deadline import (
+    Deadline,
+    RunInterrupted,
+    deadline_scope,
+    deadline_sleep,
+)
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.extensions.single_flight import SingleFlightLLMCaller
+from gpt_agents_py.metrics import LLM_COALESCED
+from tests.common import keep_llm_caller
+
+MESSAGES = [Message(role=MessageType.SYSTEM, content="Use tools."), Message(role=MessageType.USER, content="Population of France?")]
+
+
+class DeadlineAwareCaller(ScriptedLLMCaller):
+    """
+    Sleeps like an HTTP request whose timeout is bounded by the caller's deadline.
+    """
+
+    def __init__(self, latency: float) -> None:
+        super().__init__()
+        self.delay = latency
+        self.started = 0
+
+    def prepare_llm_response(self, messages: List[Message], api_key: str = "scripted") -> None:
+        self.started += 1
+        deadline_sleep(self.delay)
+        super().prepare_llm_response(messages, api_key)
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self) -> None:
+        keep_llm_caller(self)
+
+    def run_concurrently(self, n: int) -> list[object]:
+        barrier = threading.Barrier(n)
+
+        def call() -> object:
+            barrier.wait()
+            try:
+                return call_llm(list(MESSAGES))
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=n) as pool:
+            return list(pool.map(lambda _: call(), range(n)))
+
+    def test_identical_concurrent_calls_share_one_request(self) -> None:
+        inner = ScriptedLLMCaller(latency=0.3)
+        set_llm_caller(SingleFlightLLMCaller(inner))
+        before = LLM_COALESCED.get(provider="scripted", model="scripted")
+        results = self.run_concurrently(5)
+        self.assertEqual(inner.calls, 1)
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(LLM_COALESCED.get(provider="scripted", model="scripted"), before + 4)
+        # A later identical call is not served from a finished flight
+        call_llm(list(MESSAGES))
+        self.assertEqual(inner.calls, 2)
+
+    def test_followers_receive_the_leaders_error(self) -> None:
+        inner = ScriptedLLMCaller(latency=0.3, error_rate=1.0)
+        set_llm_caller(SingleFlightLLMCaller(inner))
+        results = self.run_concurrently(3)
+        self.assertEqual(inner.calls, 1)
+        self.assertTrue(all(isinstance(r, Exception) for r in results))
+
+    def test_leaders_deadline_does_not_reach_followers(self) -> None:
+        inner = DeadlineAwareCaller(latency=0.3)
+        set_llm_caller(SingleFlightLLMCaller(inner))
+        results: dict[str, object] = {}
+
+        def lead() -> None:
+            try:
+                with deadline_scope(Deadline(0.1)):
+                    results["leader"] = call_llm(list(MESSAGES))
+            except RunInterrupted as e:
+                results["leader"] = e
+
+        leader = threading.Thread(target=lead)
+        leader.start()
+        time.sleep(0.02)
+        results["follower"] = call_llm(list(MESSAGES))
+        leader.join()
+        self.assertIsInstance(results["leader"], RunInterrupted)
+        self.assertEqual(results["follower"], inner.script[0])
+        self.assertEqual((inner.started, inner.calls), (2, 1))
+
+    def test_follower_stops_waiting_at_its_own_deadline(self) -> None:
+        inner = DeadlineAwareCaller(latency=0.5)
+        set_llm_caller(SingleFlightLLMCaller(inner))
+        leader = threading.Thread(target=call_llm, args=(list(MESSAGES),))
+        leader.start()
+        time.sleep(0.02)
+        start = time.monotonic()
+        with self.assertRaises(RunInterrupted), deadline_scope(Deadline(0.1)):
+            call_llm(list(MESSAGES))
+        self.assertLess(time.monotonic() - start, 0.4)
+        leader.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+# gpt_agents_py | James Delancey | MIT License
+import threading
+import time
+import unittest
+from typing import List, Optional
+
+from gpt_agents_py.deadline import Deadline
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.gpt_agents import (
+    AgentConclusion,
+    Message,
+    OrganizationConclusion,
+    RunContext,
+    ValidationJudge,
+    agent_executor,
+    organization_executor,
+    use_run_context,
+)
+from gpt_agents_py.metrics import SPECULATIONS, SPECULATIVE_WASTED_CALLS
+from tests.common import build_agent, build_organization
+
+
+class CancellingCaller(ScriptedLLMCaller):
+    """
+    Cancels `deadline` on the first LLM call of the second task, once `ready` is set.
+    """
+
+    def __init__(self, deadline: Deadline, ready: threading.Event) -> None:
+        super().__init__()
+        self.deadline = deadline
+        self.ready = ready
+
+    def respond(self, messages: List[Message]) -> str:
+        if self.calls == 3:
+            self.ready.wait(5)
+            time.sleep(0.05)  # Let a finished verdict reach its future
+            self.deadline.cancel()
+        return super().respond(messages)
+
+
+def run_agent(speculative: bool, judge: Optional[ValidationJudge] = None) -> AgentConclusion:
+    with use_run_context(RunContext(llm_caller=ScriptedLLMCaller(), validation_judge=judge)):
+        return agent_executor(agent=build_agent(3, disable_summary=True, speculative=speculative), agent_conclusions=[])
+
+
+class TestSpeculativeExecution(unittest.TestCase):
+    def test_speculation_hits_match_sequential_result(self) -> None:
+        sequential = run_agent(speculative=False)
+        hits = SPECULATIONS.get(outcome="hit")
+        speculative = run_agent(speculative=True)
+        # The last task has nothing to overlap with, so only the first two speculate
+        self.assertEqual(SPECULATIONS.get(outcome="hit"), hits + 2)
+        self.assertEqual(speculative.task_conclusions, sequential.task_conclusions)
+
+    def test_failed_validation_discards_speculative_work(self) -> None:
+        verdicts = iter(["no"])
+        lock = threading.Lock()
+        judged: list[str] = []
+
+        def judge(final_answer: str, expected_output: str) -> str:
+            with lock:
+                judged.append(final_answer)
+                return next(verdicts, "yes")
+
+        misses, wasted = SPECULATIONS.get(outcome="miss"), SPECULATIVE_WASTED_CALLS.get()
+        conclusion = run_agent(speculative=True, judge=judge)
+        self.assertEqual(SPECULATIONS.get(outcome="miss"), misses + 1)
+        self.assertGreater(SPECULATIVE_WASTED_CALLS.get(), wasted)
+        self.assertEqual(len(conclusion.task_conclusions), 3)
+        # t0 speculatively, the discarded t1, t0 inline on the redo, then t1 and t2
+        self.assertEqual(len(judged), 5)
+
+    def run_interrupted(self, verdict: str) -> Optional[OrganizationConclusion]:
+        """
+        Run three speculative tasks and cancel the run on the second task's first LLM call, after t0's validation
+        has started. A "no" verdict is still pending at that point; a "yes" is already in.
+        """
+        judged, release = threading.Event(), threading.Event()
+
+        def judge(final_answer: str, expected_output: str) -> str:
+            judged.set()
+            if verdict == "no":
+                release.wait(5)
+            return verdict
+
+        deadline = Deadline()
+        context = RunContext(llm_caller=CancellingCaller(deadline, judged), validation_judge=judge)
+        try:
+            return organization_executor(build_organization(3, disable_summary=True, speculative=True), deadline=deadline, context=context)
+        finally:
+            release.set()
+
+    def test_interrupted_runs_drop_unvalidated_answers(self) -> None:
+        self.assertIsNone(self.run_interrupted("no"))
+        conclusion = self.run_interrupted("yes")
+        assert conclusion is not None
+        self.assertEqual(conclusion.interrupted, "cancelled")
+        self.assertEqual([tc.input.splitlines()[0] for tc in conclusion.agent_conclusions[0].task_conclusions], ["Task Name: t0"])
+
+
+if __name__ == "__main__":
+    unittest.main()
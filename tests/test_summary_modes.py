@@ -0,0 +1,42 @@
+# gpt_agents_py | James Delancey | MIT License
+import unittest
+
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.gpt_agents import (
+    AgentConclusion,
+    RunContext,
+    agent_executor,
+    use_run_context,
+)
+from tests.common import build_agent
+
+
+def run_agent(summary_mode: str) -> tuple[AgentConclusion, int]:
+    caller = ScriptedLLMCaller()
+    with use_run_context(RunContext(llm_caller=caller)):
+        return agent_executor(agent=build_agent(summary_mode=summary_mode), agent_conclusions=[]), caller.calls
+
+
+class TestSummaryModes(unittest.TestCase):
+    def test_llm_calls_per_mode(self) -> None:
+        # Each task takes a tool turn, a final answer and a validation: 6 calls before the summary
+        calls = {mode: run_agent(mode)[1] for mode in ("task", "single_shot", "incremental", "extractive")}
+        self.assertEqual(calls, {"task": 8, "single_shot": 7, "incremental": 7, "extractive": 6})
+
+    def test_extractive_joins_final_answers(self) -> None:
+        conclusion, _ = run_agent("extractive")
+        self.assertEqual(conclusion.output, "Final Answer: 67000000\n\n67000000")
+        self.assertEqual(len(conclusion.task_conclusions), 2)
+        self.assertTrue(conclusion.input.startswith("Task Name: Summary"))
+
+    def test_single_shot_uses_one_unvalidated_call(self) -> None:
+        conclusion, _ = run_agent("single_shot")
+        self.assertEqual(conclusion.output, "Final Answer: Summary of the previous results.")
+
+    def test_unknown_mode(self) -> None:
+        with self.assertRaises(ValueError):
+            run_agent("bullet_points")
+
+
+if __name__ == "__main__":
+    unittest.main()
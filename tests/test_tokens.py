@@ -0,0 +1,117 @@
+# gpt_agents_py | James Delancey | MIT License
+import unittest
+from typing import List
+
+from gpt_agents_py.extensions.approx_cache import ApproxCacheLLMCaller
+from gpt_agents_py.extensions.cassette import Cassette, RecordingLLMCaller
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.extensions.single_flight import SingleFlightLLMCaller
+from gpt_agents_py.gpt_agents import (
+    LLMResponseText,
+    Message,
+    MessageType,
+    PromptTooLongError,
+    RunContext,
+    call_llm,
+    fit_prompt,
+    get_prompts,
+    organization_executor,
+    use_run_context,
+)
+from gpt_agents_py.metrics import PROMPT_OVERFLOWS
+from gpt_agents_py.tokens import (
+    TokenUsage,
+    estimate_prompt_tokens,
+    estimate_tokens,
+    usage_scope,
+)
+from tests.common import build_organization
+
+
+class SilentLLMCaller(ScriptedLLMCaller):
+    """
+    A provider that reports no token usage.
+    """
+
+    def prepare_llm_response(self, messages: List[Message], api_key: str = "scripted") -> None:
+        super().prepare_llm_response(messages, api_key)
+        self._input_tokens = self._output_tokens = self._tokens_used = None
+
+
+def conversation(turns: int) -> list[Message]:
+    messages = [Message(role=MessageType.SYSTEM, content="Use tools."), Message(role=MessageType.USER, content="What is the population of France?")]
+    for i in range(turns):
+        messages.append(Message(role=MessageType.ASSISTANT, content=f'Thought: Look it up.\nAction: lookup\nAction Input: {{"key": "france-{i}"}}'))
+        messages.append(Message(role=MessageType.USER, content="Observation: " + "67 million people live in France. " * 10))
+    return messages
+
+
+class TestTokens(unittest.TestCase):
+    def test_estimate_tokens(self) -> None:
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("The capital of France is Paris."), 8)
+        self.assertEqual(estimate_tokens("internationalization 1234567"), 4 + 3)
+        self.assertEqual(estimate_tokens("東京都"), 3)
+        self.assertEqual(estimate_prompt_tokens(["Hi", "there"]), 2 + 2 * 4 + 3)
+
+    def test_usage_rolls_up_per_task_agent_and_organization(self) -> None:
+        caller = ScriptedLLMCaller()
+        with usage_scope() as outer:
+            conclusion = organization_executor(build_organization(roles=("Analyst", "Editor")), context=RunContext(llm_caller=caller))
+        assert conclusion is not None
+        self.assertEqual(conclusion.usage, outer.usage())
+        self.assertEqual(conclusion.usage.llm_calls, caller.calls)
+        self.assertEqual(conclusion.usage.estimated_calls, 0)
+        for ac in conclusion.agent_conclusions:
+            own = [tc.usage for tc in ac.task_conclusions if tc.usage.llm_calls][-2:]
+            self.assertEqual([u.llm_calls for u in own], [3, 3])  # Two ReAct turns and a validation each
+            self.assertEqual(ac.usage.llm_calls, 8)  # ... plus the summary task and its validation
+            self.assertGreater(ac.usage.total_tokens, sum(u.total_tokens for u in own))
+        self.assertEqual(sum(ac.usage.total_tokens for ac in conclusion.agent_conclusions), conclusion.usage.total_tokens)
+
+    def test_missing_provider_usage_is_estimated(self) -> None:
+        messages = conversation(0)
+        with use_run_context(RunContext(llm_caller=SilentLLMCaller())), usage_scope() as meter:
+            response = call_llm(messages)
+        expected_input = estimate_prompt_tokens(m.content for m in messages)
+        self.assertEqual(meter.usage(), TokenUsage(1, expected_input, estimate_tokens(response), expected_input + estimate_tokens(response), 1))
+
+    def test_fit_prompt_trims_the_oldest_turns(self) -> None:
+        messages = conversation(4)
+        self.assertIs(fit_prompt(messages, None), messages)
+        self.assertIs(fit_prompt(messages, 10_000), messages)
+        trimmed = PROMPT_OVERFLOWS.get(action="trimmed")
+        limit = estimate_prompt_tokens(m.content for m in messages) - 1
+        fitted = fit_prompt(messages, limit)
+        self.assertEqual(fitted[:2], messages[:2])
+        self.assertEqual(fitted[2].content, get_prompts().context_trimmed_prompt.format(count=2))
+        self.assertEqual(fitted[3:], messages[4:])
+        self.assertLessEqual(estimate_prompt_tokens(m.content for m in fitted), limit)
+        self.assertEqual(PROMPT_OVERFLOWS.get(action="trimmed"), trimmed + 1)
+        with self.assertRaises(PromptTooLongError):
+            fit_prompt(messages, limit, overflow="reject")
+        with self.assertRaises(PromptTooLongError):
+            fit_prompt(messages, 30)  # The task prompt and the last message alone do not fit
+
+    def test_over_limit_prompts_never_reach_the_provider(self) -> None:
+        caller = ScriptedLLMCaller()
+        caller.max_prompt_tokens = 20
+        with use_run_context(RunContext(llm_caller=caller)):
+            with self.assertRaises(PromptTooLongError) as e:
+                call_llm(conversation(1))
+            self.assertEqual((caller.calls, e.exception.limit), (0, 20))
+            caller.max_prompt_tokens = 1000
+            self.assertEqual(call_llm(conversation(1)), LLMResponseText(caller.script[-1]))
+        self.assertEqual(caller.calls, 1)
+
+    def test_wrappers_keep_the_inner_callers_limit(self) -> None:
+        caller = ScriptedLLMCaller()
+        caller.max_prompt_tokens, caller.prompt_overflow = 10, "reject"
+        wrapped = RecordingLLMCaller(SingleFlightLLMCaller(ApproxCacheLLMCaller(caller)), Cassette())
+        with use_run_context(RunContext(llm_caller=wrapped)), self.assertRaises(PromptTooLongError):
+            call_llm(conversation(0))
+        self.assertEqual(caller.calls, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
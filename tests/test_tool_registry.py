@@ -0,0 +1,72 @@
+# gpt_agents_py | James Delancey | MIT License
+import unittest
+
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.gpt_agents import (
+    Agent,
+    Message,
+    Organization,
+    RunContext,
+    Task,
+    Tool,
+    ToolRegistry,
+    organization_executor,
+    tool_executor,
+)
+from gpt_agents_py.metrics import TOOL_SELECTION_FALLBACKS
+
+
+class RecordingCaller(ScriptedLLMCaller):
+    def __init__(self, script: tuple[str, ...]) -> None:
+        super().__init__(script=script)
+        self.system_prompts: list[str] = []
+
+    def respond(self, messages: list[Message]) -> str:
+        self.system_prompts.append(messages[0].content)
+        return super().respond(messages)
+
+
+def catalog() -> list[Tool]:
+    tools = [
+        Tool(name=f"convert_unit_{i}", description=f"Convert measurement unit {i} into another unit.", args_schema="{value: number}", func=lambda args: "1") for i in range(40)
+    ]
+    tools.insert(25, Tool(name="lookup", description="Look up the population of a country.", args_schema="{key: string}", func=lambda args: "67000000"))
+    tools.append(Tool(name="archive", description="Archive documents by id.", args_schema="{id: string}", func=lambda args: "archived"))
+    return tools
+
+
+class TestToolRegistry(unittest.TestCase):
+    def run_org(self, first_action: str) -> RecordingCaller:
+        caller = RecordingCaller(script=(first_action, "Thought: I now know the final answer\nFinal Answer: 67000000"))
+        task = Task(name="population", description="Find the population of France, a country.", expected_output="A number.", llm_messages=[])
+        agent = Agent(role="Analyst", goal="Report.", backstory="Facts.", tasks=[task], tools=catalog(), disable_summary=True, max_tools=3)
+        conclusion = organization_executor(Organization(agents=[agent]), context=RunContext(llm_caller=caller))
+        assert conclusion is not None
+        self.assertEqual(conclusion.final_conclusion.output, "Final Answer: 67000000")
+        return caller
+
+    def test_prompt_lists_only_the_most_relevant_tools(self) -> None:
+        caller = self.run_org('Thought: Look it up.\nAction: lookup\nAction Input: {"key": "france"}')
+        system = caller.system_prompts[0]
+        self.assertIn("- lookup: Look up the population", system)
+        self.assertEqual(system.count("(args:"), 3)
+        self.assertNotIn("archive", system)
+
+    def test_unlisted_catalog_tools_still_run(self) -> None:
+        before = TOOL_SELECTION_FALLBACKS.get(tool="archive")
+        self.run_org('Thought: Archive first.\nAction: archive\nAction Input: {"id": "7"}')
+        self.assertEqual(TOOL_SELECTION_FALLBACKS.get(tool="archive"), before + 1)
+
+    def test_unknown_tools_list_the_closest_matches(self) -> None:
+        registry = ToolRegistry(catalog(), max_tools=2)
+        task_tools = registry.select("Population of France")
+        self.assertEqual([t.name for t in task_tools], ["lookup", "convert_unit_0"])
+        self.assertEqual(registry.get("convert_unit_39"), registry.catalog[40])
+        with self.assertRaises(Exception) as raised:
+            tool_executor("archive_document", "{}", task_tools, "Thought: x")
+        self.assertIn('["lookup", "convert_unit_0", "archive"]', str(raised.exception))
+        self.assertEqual(raised.exception.args[0].count("convert_unit"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
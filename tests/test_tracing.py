@@ -0,0 +1,92 @@
+# gpt_agents_py | James Delancey | MIT License
+import json
+import unittest
+
+from gpt_agents_py import (
+    Agent,
+    LLMCallerBase,
+    LLMResponseText,
+    Message,
+    Organization,
+    Task,
+    organization_executor,
+    set_llm_caller,
+)
+from gpt_agents_py.tracing import (
+    ChromeTraceExporter,
+    SpanEvent,
+    add_hook,
+    current_span,
+    remove_hook,
+    span,
+)
+from tests.common import keep_llm_caller
+
+
+class QueueCaller(LLMCallerBase):
+    def __init__(self, responses: list[str]) -> None:
+        super().__init__()
+        self.responses = list(responses)
+
+    def prepare_llm_response(self, messages: list[Message], api_key: str = "api_key") -> None:
+        self._response_text = LLMResponseText(self.responses.pop(0))
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self) -> None:
+        keep_llm_caller(self)
+        self.events: list[SpanEvent] = []
+        add_hook(self.events.append)
+
+    def tearDown(self) -> None:
+        remove_hook(self.events.append)
+
+    def test_span_nesting(self) -> None:
+        with span("outer") as outer:
+            with span("inner", x=1) as inner:
+                self.assertEqual(current_span(), inner)
+            self.assertEqual(inner.parent_id, outer.span_id)
+        self.assertIsNone(current_span())
+        self.assertEqual([(e.phase, e.span.name) for e in self.events], [("start", "outer"), ("start", "inner"), ("end", "inner"), ("end", "outer")])
+
+    def test_span_records_error(self) -> None:
+        with self.assertRaises(ValueError):
+            with span("boom"):
+                raise ValueError("bad")
+        self.assertEqual(self.events[-1].error, "ValueError: bad")
+
+    def test_organization_span_tree_and_chrome_export(self) -> None:
+        exporter = ChromeTraceExporter()
+        add_hook(exporter)
+        try:
+            set_llm_caller(QueueCaller(["Thought: easy\nFinal Answer: 42", "Thought: ok\nFinal Answer: yes"]))
+            agent = Agent(
+                role="Answerer",
+                goal="Answer",
+                backstory="Knows",
+                tasks=[Task(name="Ultimate", description="What is the answer?", expected_output="42", llm_messages=[])],
+                tools=[],
+                disable_summary=True,
+            )
+            organization_executor(Organization(agents=[agent]))
+        finally:
+            remove_hook(exporter)
+        ends = {e.span.span_id: e.span for e in self.events if e.phase == "end"}
+
+        def ancestry(name: str) -> list[str]:
+            s = next(s for s in ends.values() if s.name == name)
+            names = [s.name]
+            while s.parent_id is not None:
+                s = ends[s.parent_id]
+                names.append(s.name)
+            return names
+
+        self.assertEqual(ancestry("validation_executor"), ["validation_executor", "attempt", "task_executor", "agent_executor", "organization_executor"])
+        self.assertIn("call_llm", ancestry("call_llm"))
+        trace = json.loads(exporter.to_json())
+        self.assertEqual({e["name"] for e in trace["traceEvents"]}, {s.name for s in ends.values()})
+        self.assertTrue(all(e["ph"] == "X" and e["dur"] >= 0 for e in trace["traceEvents"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+# gpt_agents_py | James Delancey | MIT License
+import json
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from gpt_agents_py.deadline import Deadline, RunInterrupted, deadline_scope
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.extensions.validation_batcher import (
+    ValidationBatcher,
+    parse_batch_verdicts,
+)
+from gpt_agents_py.gpt_agents import (
+    Message,
+    RunContext,
+    RunCounters,
+    Task,
+    get_prompts,
+    organization_executor,
+    set_llm_caller,
+    set_validation_judge,
+    use_run_context,
+    validation_executor,
+    validation_verdict,
+)
+from gpt_agents_py.tokens import TokenUsage, usage_scope
+from tests.common import build_organization, keep_llm_caller
+
+
+class BatchJudgeCaller(ScriptedLLMCaller):
+    def __init__(self, garbled: bool = False) -> None:
+        super().__init__()
+        self.garbled = garbled
+        self.batch_calls = 0
+        self.tokens = 0
+
+    def prepare_llm_response(self, messages: List[Message], api_key: str = "scripted") -> None:
+        super().prepare_llm_response(messages, api_key)
+        self.tokens += self._tokens_used or 0
+
+    def respond(self, messages: list[Message]) -> str:
+        if messages[0].content != get_prompts().batch_validation_system_prompt:
+            return super().respond(messages)
+        self.batch_calls += 1
+        if self.garbled:
+            return "Thought: hmm\nFinal Answer: they all look fine"
+        items = messages[1].content.split("Item ")[1:]
+        verdicts = {str(i): "no" if "wrong" in item else "yes" for i, item in enumerate(items, start=1)}
+        return f"Thought: checked\nFinal Answer: {json.dumps(verdicts)}"
+
+
+class TestValidationBatcher(unittest.TestCase):
+    def setUp(self) -> None:
+        keep_llm_caller(self)
+
+    def tearDown(self) -> None:
+        set_validation_judge(validation_verdict)
+
+    def validate_concurrently(self, answers: list[str]) -> list[object]:
+        barrier = threading.Barrier(len(answers))
+        task = Task(name="t", description="d", expected_output="A number.", llm_messages=[])
+
+        def validate(answer: str) -> object:
+            barrier.wait()
+            try:
+                return validation_executor(answer, task).output
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=len(answers)) as pool:
+            return list(pool.map(validate, answers))
+
+    def test_concurrent_validations_share_one_call(self) -> None:
+        caller = BatchJudgeCaller()
+        set_llm_caller(caller)
+        set_validation_judge(ValidationBatcher(window=0.5))
+        results = self.validate_concurrently(["1", "2", "wrong", "4"])
+        self.assertEqual((caller.calls, caller.batch_calls), (1, 1))
+        self.assertEqual([r == "yes" for r in results], [True, True, False, True])
+        self.assertIsInstance(results[2], Exception)
+
+    def test_unparsable_batch_falls_back_to_single_validation(self) -> None:
+        caller = BatchJudgeCaller(garbled=True)
+        set_llm_caller(caller)
+        set_validation_judge(ValidationBatcher(window=0.5, max_batch=3))
+        results = self.validate_concurrently(["1", "2", "3"])
+        self.assertEqual(results, ["yes"] * 3)
+        self.assertEqual((caller.calls, caller.batch_calls), (4, 1))
+
+    def test_leaders_deadline_does_not_reach_other_items(self) -> None:
+        caller = BatchJudgeCaller()
+        set_llm_caller(caller)
+        judge = ValidationBatcher(window=0.3)
+        results: dict[str, object] = {}
+
+        def lead() -> None:
+            try:
+                with deadline_scope(Deadline(0.1)):
+                    results["leader"] = judge("1", "A number.")
+            except RunInterrupted as e:
+                results["leader"] = e
+
+        leader = threading.Thread(target=lead)
+        leader.start()
+        time.sleep(0.02)
+        results["other"] = judge("2", "A number.")
+        leader.join()
+        self.assertIsInstance(results["leader"], RunInterrupted)
+        self.assertEqual(results["other"], "yes")
+        self.assertEqual((caller.calls, caller.batch_calls), (1, 0))
+
+    def test_batches_stay_with_one_caller_and_split_usage(self) -> None:
+        judge = ValidationBatcher(window=0.3)
+        callers = [BatchJudgeCaller(), BatchJudgeCaller()]
+        contexts = [RunContext(llm_caller=c, counters=RunCounters()) for c in callers]  # With counters, use_run_context keeps the same object
+        barrier = threading.Barrier(4)
+
+        def validate(i: int) -> tuple[str, TokenUsage]:
+            barrier.wait()
+            with use_run_context(contexts[i % 2]), usage_scope() as meter:
+                return judge(str(i), "A number."), meter.usage()
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(validate, range(4)))
+        self.assertEqual([r[0] for r in results], ["yes"] * 4)
+        self.assertEqual([(c.calls, c.batch_calls) for c in callers], [(1, 1), (1, 1)])
+        for i, caller in enumerate(callers):
+            shares = [usage for j, (_, usage) in enumerate(results) if j % 2 == i]
+            self.assertEqual(sum(u.total_tokens for u in shares), caller.tokens)
+            self.assertEqual([u.llm_calls for u in shares], [1, 1])
+
+    def test_organizations_with_their_own_contexts_share_a_batch(self) -> None:
+        caller = BatchJudgeCaller()
+        judge = ValidationBatcher(window=0.5)
+        contexts = [RunContext(llm_caller=caller, validation_judge=judge, counters=RunCounters()) for _ in range(2)]
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            conclusions = list(pool.map(lambda context: organization_executor(build_organization(1, disable_summary=True), context=context), contexts))
+        self.assertTrue(all(c is not None and c.interrupted is None for c in conclusions))
+        # Two ReAct turns per run, then one validation call for both
+        self.assertEqual((caller.calls, caller.batch_calls), (5, 1))
+        self.assertEqual([c.counters.llm_calls for c in contexts if c.counters is not None], [3, 3])
+
+    def test_parse_batch_verdicts(self) -> None:
+        self.assertEqual(parse_batch_verdicts('Thought: ok\nFinal Answer: {"1": "Yes", "2": "no", "7": "yes"}', 2), {1: "yes", 2: "no"})
+        self.assertEqual(parse_batch_verdicts("Final Answer: yes", 2), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+# gpt_agents_py | James Delancey | MIT License
+import os
+import tempfile
+import threading
+import time
+import unittest
+from typing import List
+
+from gpt_agents_py import Message, set_llm_caller
+from gpt_agents_py.extensions.scripted_llm_caller import ScriptedLLMCaller
+from gpt_agents_py.extensions.work_queue import (
+    Worker,
+    WorkerConfig,
+    WorkQueue,
+    launch_workers,
+)
+from tests.common import keep_llm_caller
+
+SPEC = {
+    "agents": [
+        {
+            "role": "Analyst",
+            "goal": "Report a population.",
+            "backstory": "Demographer.",
+            "disable_summary": True,
+            "tasks": [
+                {"name": "Lookup", "description": "Get the population of {country}.", "expected_output": "A number."},
+                {"name": "Round", "description": "Round it.", "expected_output": "A number."},
+            ],
+        }
+    ]
+}
+
+
+class Abort(BaseException):
+    pass
+
+
+class AbortingCaller(ScriptedLLMCaller):
+    def prepare_llm_response(self, messages: List[Message], api_key: str = "scripted") -> None:
+        raise Abort()
+
+
+def heartbeat_running(job_id: int) -> bool:
+    return any(t.name == f"heartbeat-{job_id}" and t.is_alive() for t in threading.enumerate())
+
+
+class TestWorkQueue(unittest.TestCase):
+    def setUp(self) -> None:
+        keep_llm_caller(self)
+        self.path = os.path.join(tempfile.mkdtemp(), "queue.db")
+        self.queue = WorkQueue(self.path)
+
+    def tearDown(self) -> None:
+        self.queue.close()
+
+    def test_worker_runs_all_job_kinds(self) -> None:
+        set_llm_caller(ScriptedLLMCaller())
+        org_job = self.queue.enqueue_organization(SPEC, {"country": "France"})
+        task_job = self.queue.enqueue(
+            "task", {"organization": SPEC, "params": {"country": "Spain"}, "agent_index": 0, "task_index": 1, "context": [{"input": "Lookup", "output": "47000000"}]}
+        )
+        bad_job = self.queue.enqueue_organization(SPEC, {}, max_attempts=2)
+        self.assertEqual(Worker(self.queue).run(stop_when_empty=True), 4)
+        org_result = self.queue.get(org_job)
+        assert org_result is not None
+        self.assertEqual(org_result["status"], "done")
+        self.assertEqual(len(org_result["result"]["agents"][0]["task_conclusions"]), 2)
+        task_result = self.queue.get(task_job)
+        assert task_result is not None
+        self.assertEqual(task_result["result"]["output"], "Final Answer: Summary of the previous results.")
+        bad = self.queue.get(bad_job)
+        assert bad is not None
+        self.assertEqual((bad["status"], bad["attempts"]), ("failed", 2))
+        self.assertIn("KeyError", bad["error"])
+
+    def test_duplicate_context_keeps_the_agents_own_conclusions(self) -> None:
+        set_llm_caller(ScriptedLLMCaller())
+        context = [{"input": "Lookup", "output": "47000000"}] * 2
+        job_id = self.queue.enqueue("agent", {"organization": SPEC, "params": {"country": "Spain"}, "agent_index": 0, "context": context})
+        self.assertEqual(Worker(self.queue).run(stop_when_empty=True), 1)
+        result = self.queue.get(job_id)
+        assert result is not None
+        own = result["result"]["task_conclusions"]
+        self.assertEqual(len(own), 2)
+        self.assertIn("Get the population of Spain.", own[0]["input"])
+
+    def test_expired_lease_is_reclaimed(self) -> None:
+        job_id = self.queue.enqueue_organization(SPEC, {"country": "France"}, max_attempts=2)
+        stale = self.queue.claim("crashed-worker", lease_seconds=0.05)
+        assert stale is not None
+        self.assertIsNone(self.queue.claim("other", lease_seconds=60))
+        time.sleep(0.1)
+        retry = self.queue.claim("other", lease_seconds=60)
+        assert retry is not None
+        self.assertEqual((retry.id, retry.attempts), (job_id, 2))
+        # The crashed worker's late result must not overwrite the new owner's
+        self.assertFalse(self.queue.complete(stale, {"late": True}))
+        self.assertFalse(self.queue.heartbeat(stale))
+        self.assertTrue(self.queue.complete(retry, {"ok": True}))
+        self.assertEqual(self.queue.counts(), {"done": 1})
+
+    def test_lost_lease_stops_the_job(self) -> None:
+        caller = ScriptedLLMCaller(latency=0.05)
+        set_llm_caller(caller)
+        job_id = self.queue.enqueue_organization(SPEC, {"country": "France"})
+        outcome: list[object] = []
+        worker = threading.Thread(target=lambda: outcome.append(Worker(self.queue, lease_seconds=0.3).run_one()))
+        worker.start()
+        time.sleep(0.12)
+        self.queue._conn().execute("UPDATE jobs SET lease_owner = 'other' WHERE id = ?", (job_id,))
+        worker.join(5)
+        self.assertEqual(outcome, [False])
+        self.assertLess(caller.calls, 6)  # Two tasks of two turns and a validation each, had it run to the end
+        self.assertFalse(heartbeat_running(job_id))
+
+    def test_heartbeat_stops_when_the_job_raises_a_base_exception(self) -> None:
+        set_llm_caller(AbortingCaller())
+        job_id = self.queue.enqueue_organization(SPEC, {"country": "France"})
+        with self.assertRaises(Abort):
+            Worker(self.queue, lease_seconds=0.3).run_one()
+        time.sleep(0.2)
+        self.assertFalse(heartbeat_running(job_id))
+
+    def test_launch_worker_processes(self) -> None:
+        ids = [self.queue.enqueue_organization(SPEC, {"country": c}) for c in ("France", "Germany", "Spain", "Italy")]
+        for proc in launch_workers(self.path, 2, WorkerConfig(provider="scripted")):
+            proc.join(timeout=60)
+            self.assertEqual(proc.exitcode, 0)
+        self.assertEqual(self.queue.counts(), {"done": len(ids)})
+
+
+if __name__ == "__main__":
+    unittest.main()